@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import ContactSubmission
+from .exports import export_actions
+from .models import ContactSubmission, Product
 
 
-admin.site.register(ContactSubmission)
+@admin.register(ContactSubmission)
+class ContactSubmissionAdmin(admin.ModelAdmin):
+    actions = export_actions
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    actions = export_actions
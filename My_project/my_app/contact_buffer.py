@@ -0,0 +1,196 @@
+"""
+Write-behind ingestion for ContactSubmission.
+
+One INSERT per contact POST lets a bot burst tie up SQLite's single
+writer. Submissions are instead appended to an in-process buffer and
+written with bulk_create:
+
+* by the submission that makes CONTACT_FLUSH_MAX_PENDING,
+* by a background thread every CONTACT_FLUSH_INTERVAL seconds (None
+  disables this), started by the first buffered submission, so a quiet
+  site doesn't leave the last submissions of a burst unwritten,
+* and at interpreter exit.
+
+A failed flush puts its submissions back for the next one. After
+CONTACT_FLUSH_MAX_ATTEMPTS failed flushes a submission is logged at
+ERROR level and dropped, so one row the database keeps rejecting can't
+grow the buffer and fail every later flush with it.
+
+A submission whose email and message match one accepted in the last
+CONTACT_DEDUPE_SECONDS is dropped, so a bot replaying one payload costs
+a hash lookup rather than a row.
+
+CONTACT_INGEST_MODE picks the durability trade-off: "buffer" (default)
+answers the client before the row is written, so a crash can lose up to
+one flush worth of submissions; "sync" writes each submission before the
+response, as before. Buffered rows get submitted_at from the flush, at
+most one interval late.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import ContactSubmission
+
+logger = logging.getLogger(__name__)
+
+BUFFER = "buffer"
+SYNC = "sync"
+
+
+def fingerprint(data):
+    text = f"{data['email'].strip().lower()}\0{data['message'].strip()}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ContactBuffer:
+    def __init__(self):
+        self._pending = []  # (failed flushes, unsaved ContactSubmission)
+        self._seen = {}  # fingerprint -> monotonic time accepted
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+
+    def submit(self, data):
+        """
+        Accept cleaned ContactForm data. Returns False when it repeats a
+        recent submission and was dropped.
+        """
+        window = getattr(settings, "CONTACT_DEDUPE_SECONDS", 60)
+        interval = getattr(settings, "CONTACT_FLUSH_INTERVAL", 5)
+        max_pending = getattr(settings, "CONTACT_FLUSH_MAX_PENDING", 500)
+        key = fingerprint(data)
+        now = time.monotonic()
+        with self._lock:
+            seen_at = self._seen.get(key)
+            if seen_at is not None and now - seen_at < window:
+                return False
+            self._seen[key] = now
+            if len(self._seen) > 2 * max_pending:
+                self._forget_older_than(now - window)
+
+        if getattr(settings, "CONTACT_INGEST_MODE", BUFFER) == SYNC:
+            try:
+                ContactSubmission.objects.create(**data)
+            except Exception:
+                # Not stored, so a retry must not be treated as a repeat.
+                with self._lock:
+                    self._seen.pop(key, None)
+                raise
+            return True
+
+        with self._lock:
+            self._pending.append((0, ContactSubmission(**data)))
+            pending = len(self._pending)
+        if interval is not None:
+            self._start_flusher()
+        if pending >= max_pending:
+            try:
+                self.flush(blocking=False)
+            except Exception:
+                logger.exception("Could not flush contact submissions")
+        return True
+
+    def flush(self, blocking=True):
+        """Write all buffered submissions; returns how many were written."""
+        if not self._flush_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            try:
+                with transaction.atomic():
+                    ContactSubmission.objects.bulk_create(
+                        [submission for _, submission in pending], batch_size=500
+                    )
+            except Exception:
+                # Put them back so the next flush retries them, up to a point.
+                self._requeue(pending)
+                raise
+            logger.info("Flushed %d contact submissions", len(pending))
+            return len(pending)
+        finally:
+            self._flush_lock.release()
+
+    def _requeue(self, pending):
+        max_attempts = getattr(settings, "CONTACT_FLUSH_MAX_ATTEMPTS", 5)
+        retry = []
+        for failures, submission in pending:
+            failures += 1
+            if failures < max_attempts:
+                retry.append((failures, submission))
+            else:
+                logger.error(
+                    "Dropping contact submission after %d failed flushes: "
+                    "name=%r email=%r message=%r",
+                    failures,
+                    submission.name,
+                    submission.email,
+                    submission.message,
+                )
+        with self._lock:
+            self._pending[:0] = retry
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def discard(self):
+        """Drop buffered submissions and dedupe state without writing (tests)."""
+        with self._lock:
+            self._pending.clear()
+            self._seen.clear()
+
+    def _start_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically,
+                    name="contact-buffer-flush",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def _flush_periodically(self):
+        # Ends when the interval is set to None; the next submission
+        # starts a new thread if it is turned back on.
+        while (interval := getattr(settings, "CONTACT_FLUSH_INTERVAL", 5)) is not None:
+            wait = self._last_flush + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            elif not self.pending():
+                time.sleep(interval)
+            else:
+                try:
+                    self.flush(blocking=False)
+                except Exception:
+                    logger.exception("Could not flush contact submissions")
+                finally:
+                    # This thread's own connection; don't hold it between ticks.
+                    connections.close_all()
+
+    def _forget_older_than(self, cutoff):
+        self._seen = {k: t for k, t in self._seen.items() if t >= cutoff}
+
+
+contact_buffer = ContactBuffer()
+
+
+@atexit.register
+def flush_at_exit():
+    try:
+        contact_buffer.flush()
+    except Exception:
+        logger.exception("Could not flush contact submissions at exit")
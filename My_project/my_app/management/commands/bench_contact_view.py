@@ -0,0 +1,50 @@
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from my_project.benchutils import scratch_database, timeit
+
+
+class Command(BaseCommand):
+    help = "Measure contact page GET latency and allocations, cold vs cached forms."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def run(self, repeat, **options):
+        client = Client()
+        url = reverse("my_app:contact_view")
+
+        def cold():
+            # Every form is built and rendered, as before the fragment cache.
+            cache.clear()
+            client.get(url)
+
+        def cached():
+            client.get(url)
+
+        client.get(url)  # warm up imports and template loading
+        for label, func in [("cold", cold), ("cached", cached)]:
+            ms = timeit(func, repeat)
+            peak = self.peak_allocated(func)
+            self.stdout.write(
+                f"{label:>7}: p50 {ms:7.3f} ms, peak allocated {peak / 1024:7.1f} KiB"
+            )
+
+    @staticmethod
+    def peak_allocated(func):
+        """Peak memory allocated (tracemalloc) during one call, in bytes."""
+        func()  # let the cache settle into the state being measured
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,67 @@
+import os
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from my_app.exports import EXPORTS, export_response
+from my_project.benchutils import scratch_database
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = "Export a large contact-submissions table and report peak RSS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5_000_000)
+        parser.add_argument(
+            "--naive",
+            action="store_true",
+            help="Finish with list(queryset) for comparison (needs a lot of RAM).",
+        )
+
+    def handle(self, *args, **options):
+        # On disk, so the table itself doesn't count towards our RSS.
+        with tempfile.TemporaryDirectory() as tmp:
+            with scratch_database(test_name=os.path.join(tmp, "bench.sqlite3")):
+                self.run(**options)
+
+    def run(self, rows, naive, **options):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+                "WHERE i < %s) "
+                "INSERT INTO my_app_contactsubmission "
+                "(name, email, message, submitted_at) "
+                "SELECT 'Sender ' || i, 'sender' || i || '@example.com', "
+                "'Hello, this is message number ' || i, '2024-01-01 00:00:00' "
+                "FROM n",
+                [rows],
+            )
+        self.stdout.write(f"Seeded {rows} rows; peak RSS {peak_rss_mib():.0f} MiB")
+
+        model, fields = EXPORTS["contact-submissions"]
+        for fmt in ["csv", "ndjson"]:
+            started = time.perf_counter()
+            response = export_response(model.objects.all(), fields, fmt, "bench")
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            self.stdout.write(
+                f"{fmt:>7}: {size / 2**20:7.0f} MiB in "
+                f"{time.perf_counter() - started:6.1f}s, "
+                f"peak RSS {peak_rss_mib():.0f} MiB"
+            )
+
+        if naive:
+            started = time.perf_counter()
+            instances = list(model.objects.all())
+            self.stdout.write(
+                f"list(queryset): {len(instances)} instances in "
+                f"{time.perf_counter() - started:6.1f}s, "
+                f"peak RSS {peak_rss_mib():.0f} MiB"
+            )
@@ -1,3 +1,251 @@
-from django.test import TestCase
+import csv
+import json
+import threading
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .contact_buffer import contact_buffer
+from my_auth.models import User
+from my_blog.models import Blog
+
+from .models import ContactSubmission, Product
+from .views import CONTACT_PAGE_FORMS
+
+# Tests flush contact submissions explicitly; leftovers must not reach the
+# dev database at exit.
+no_timed_flush = override_settings(CONTACT_FLUSH_INTERVAL=None)
+
+
+def setUpModule():
+    no_timed_flush.enable()
+
+
+def tearDownModule():
+    contact_buffer.discard()
+    no_timed_flush.disable()
+
+
+class ContactViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("my_app:contact_view")
+
+    def test_forms_are_built_once_then_served_from_cache(self):
+        built = Counter()
+
+        def counting(form_class):
+            def build():
+                built[form_class.__name__] += 1
+                return form_class()
+
+            return build
+
+        forms = {name: counting(cls) for name, cls in CONTACT_PAGE_FORMS.items()}
+        with mock.patch.dict(CONTACT_PAGE_FORMS, forms):
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+
+        # Only the four forms the page shows, and only on the first request.
+        self.assertEqual(
+            built,
+            {
+                "ContactForm": 1,
+                "PasswordForgotForm": 1,
+                "ProductForm": 1,
+                "CheckoutForm": 1,
+            },
+        )
+        self.assertEqual(
+            first.content.count(b"<input"), second.content.count(b"<input")
+        )
+        self.assertContains(second, 'placeholder="Your Message"')
+
+    def test_csrf_token_is_not_cached(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        first = client.get(self.url).context["csrf_token"]
+        client.cookies.clear()
+        second = client.get(self.url)
+        token = str(second.context["csrf_token"])
+        self.assertNotEqual(str(first), token)
+        self.assertContains(second, f'value="{token}"', count=4)
+
+
+class ContactIngestionTests(TestCase):
+    def setUp(self):
+        contact_buffer.discard()
+        self.url = reverse("my_app:contact_view")
+
+    def post(self, email="bot@example.com", message="Buy now"):
+        response = self.client.post(
+            self.url, {"name": "Bot", "email": email, "message": message}
+        )
+        self.assertEqual(response.json()["success"], True)
+        return response
+
+    def test_submissions_are_written_in_one_batch(self):
+        for n in range(3):
+            self.post(message=f"message {n}")
+        self.assertEqual(ContactSubmission.objects.count(), 0)
+        # SAVEPOINT, one INSERT for all three rows, RELEASE.
+        with self.assertNumQueries(3):
+            self.assertEqual(contact_buffer.flush(), 3)
+        self.assertEqual(ContactSubmission.objects.count(), 3)
+
+    def test_repeats_are_dropped(self):
+        self.post()
+        self.post(email="BOT@example.com")
+        self.post(message="Something else")
+        contact_buffer.flush()
+        self.assertEqual(ContactSubmission.objects.count(), 2)
+
+    @override_settings(CONTACT_DEDUPE_SECONDS=0)
+    def test_repeats_outside_window_are_kept(self):
+        self.post()
+        self.post()
+        self.assertEqual(contact_buffer.pending(), 2)
+
+    @override_settings(CONTACT_FLUSH_MAX_PENDING=2)
+    def test_flushes_when_buffer_is_full(self):
+        self.post(message="one")
+        self.assertEqual(ContactSubmission.objects.count(), 0)
+        self.post(message="two")
+        self.assertEqual(ContactSubmission.objects.count(), 2)
+        self.assertEqual(contact_buffer.pending(), 0)
+
+    @override_settings(CONTACT_FLUSH_INTERVAL=0.05)
+    def test_background_thread_flushes_after_the_interval(self):
+        flushed = threading.Event()
+
+        def flush(blocking=True):
+            contact_buffer.discard()
+            flushed.set()
+            return 1
+
+        # No further submission arrives to trigger it.
+        with mock.patch.object(contact_buffer, "flush", side_effect=flush):
+            self.post()
+            self.assertTrue(flushed.wait(5))
+
+    @override_settings(CONTACT_INGEST_MODE="sync")
+    def test_sync_mode_writes_before_responding(self):
+        self.post()
+        self.post()
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+        self.assertEqual(contact_buffer.pending(), 0)
+
+    def test_failed_flush_keeps_submissions(self):
+        self.post()
+        with mock.patch.object(
+            ContactSubmission.objects, "bulk_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                contact_buffer.flush()
+        self.assertEqual(contact_buffer.pending(), 1)
+        self.assertEqual(contact_buffer.flush(), 1)
+
+    @override_settings(CONTACT_FLUSH_MAX_ATTEMPTS=2)
+    def test_submission_is_dropped_after_max_attempts(self):
+        self.post(email="first@example.com")
+        with mock.patch.object(
+            ContactSubmission.objects, "bulk_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                contact_buffer.flush()
+            self.post(email="second@example.com")
+            with self.assertLogs("my_app.contact_buffer", "ERROR") as logs:
+                with self.assertRaises(RuntimeError):
+                    contact_buffer.flush()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("first@example.com", logs.output[0])
+        # The newer submission has one failure left and is still written.
+        self.assertEqual(contact_buffer.flush(), 1)
+        self.assertEqual(ContactSubmission.objects.get().email, "second@example.com")
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", "staff@example.com", "pw")
+        cls.staff.is_staff = True
+        cls.staff.is_superuser = True
+        cls.staff.save()
+        ContactSubmission.objects.bulk_create(
+            ContactSubmission(name=f"N{n}", email=f"n{n}@example.com", message="hi")
+            for n in range(3)
+        )
+
+    def setUp(self):
+        self.client.force_login(
+            self.staff, backend="django.contrib.auth.backends.ModelBackend"
+        )
+
+    def get(self, name, fmt):
+        url = reverse("my_app:export_view", args=[name, fmt])
+        return self.client.get(url)
+
+    def test_csv_is_streamed(self):
+        response = self.get("contact-submissions", "csv")
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="contact-submissions.csv"',
+        )
+        body = b"".join(response.streaming_content).decode()
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0], ["id", "name", "email", "message", "submitted_at"])
+        self.assertEqual([row[1] for row in rows[1:]], ["N0", "N1", "N2"])
+
+    def test_csv_neutralizes_formulas(self):
+        ContactSubmission.objects.create(
+            name='=HYPERLINK("http://evil.example","click")',
+            email="bot@example.com",
+            message="@SUM(A1:A9)",
+        )
+        body = b"".join(self.get("contact-submissions", "csv").streaming_content)
+        row = list(csv.reader(body.decode().splitlines()))[-1]
+        self.assertEqual(row[1], '\'=HYPERLINK("http://evil.example","click")')
+        self.assertEqual(row[3], "'@SUM(A1:A9)")
+
+    def test_ndjson(self):
+        Product.objects.create(
+            title="Shoe", slug="shoe", marked_price="10.50", selling_price="9.99"
+        )
+        response = self.get("products", "ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        product = json.loads(lines[0])
+        self.assertEqual(product["title"], "Shoe")
+        self.assertEqual(product["selling_price"], "9.99")
+
+    def test_rows_are_not_model_instances(self):
+        Blog.objects.create(title="One", slug="one", content="x")
+        with mock.patch.object(
+            Blog, "__init__", side_effect=AssertionError("instance built")
+        ):
+            response = self.get("blogs", "csv")
+            body = b"".join(response.streaming_content)
+        self.assertIn(b"One", body)
+
+    def test_unknown_export_is_404(self):
+        self.assertEqual(self.get("users", "csv").status_code, 404)
+        self.assertEqual(self.get("blogs", "xml").status_code, 404)
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.get("products", "csv").status_code, 302)
+
+    def test_admin_action(self):
+        response = self.client.post(
+            reverse("admin:my_app_contactsubmission_changelist"),
+            {
+                "action": "export_csv",
+                "_selected_action": list(
+                    ContactSubmission.objects.values_list("pk", flat=True)[:2]
+                ),
+            },
+        )
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 3)
@@ -9,4 +9,5 @@ urlpatterns = [
     path("about/", views.about_view, name="about_view"),
     path("services/", views.services_view, name="services_view"),
     path("profile/", views.profile_view, name="profile_view"),
+    path("export/<slug:name>.<str:fmt>", views.export_view, name="export_view"),
 ]
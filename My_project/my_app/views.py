@@ -1,5 +1,8 @@
-from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.utils.functional import SimpleLazyObject
 
 from .forms import (
     ContactForm,
@@ -10,7 +13,18 @@ from .forms import (
     PasswordForgotForm,
     PasswordResetForm,
 )
-from .models import ContactSubmission
+from .contact_buffer import contact_buffer
+from .exports import EXPORTS, FORMATS, export_response
+
+CONTACT_PAGE_FORMS = {
+    "form": ContactForm,
+    "checkoutform": CheckoutForm,
+    "customer_registration_form": CustomerRegistrationForm,
+    "customer_login_form": CustomerLoginForm,
+    "product_form": ProductForm,
+    "password_forgot_form": PasswordForgotForm,
+    "password_reset_form": PasswordResetForm,
+}
 
 
 # Create your views here.
@@ -30,34 +44,26 @@ def contact_view(request):
     if request.method == "POST":
         form = ContactForm(request.POST)
         if form.is_valid():
-            # Save to database (optional)
-            ContactSubmission.objects.create(**form.cleaned_data)
+            # Buffered and written in batches; repeats of a recent message
+            # are dropped, but get the same answer so bots learn nothing.
+            contact_buffer.submit(form.cleaned_data)
             return JsonResponse(
                 {"success": True, "message": "Thank you for your message!"}
             )
         else:
             return JsonResponse({"success": False, "errors": form.errors})
 
-    form = ContactForm()
-    checkoutform = CheckoutForm()
-    customer_registration_form = CustomerRegistrationForm()
-    customer_login_form = CustomerLoginForm()
-    product_form = ProductForm()
-    password_forgot_form = PasswordForgotForm()
-    password_reset_form = PasswordResetForm()
-    return render(
-        request,
-        "contact/contact.html",
-        {
-            "form": form,
-            "checkoutform": checkoutform,
-            "customer_registration_form": customer_registration_form,
-            "customer_login_form": customer_login_form,
-            "product_form": product_form,
-            "password_forgot_form": password_forgot_form,
-            "password_reset_form": password_reset_form,
-        },
+    # contact/contact.html caches the unbound form markup (CSRF tokens are
+    # rendered outside the cached fragments), so a form is only built when
+    # its fragment is missing from the cache.
+    context = {
+        name: SimpleLazyObject(form_class)
+        for name, form_class in CONTACT_PAGE_FORMS.items()
+    }
+    context["form_cache_timeout"] = getattr(
+        settings, "CONTACT_FORM_CACHE_TIMEOUT", 3600
     )
+    return render(request, "contact/contact.html", context)
 
 
 def services_view(request):
@@ -66,3 +72,11 @@ def services_view(request):
 
 def blogs_view(request):
     return HttpResponse("Blogs")
+
+
+@staff_member_required
+def export_view(request, name, fmt):
+    if name not in EXPORTS or fmt not in FORMATS:
+        raise Http404("Unknown export")
+    model, fields = EXPORTS[name]
+    return export_response(model.objects.all(), fields, fmt, name)
@@ -1,6 +1,13 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import User
+from .models import Outbox, User
 
 admin.site.register(User)
+
+
+@admin.register(Outbox)
+class OutboxAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
@@ -1,7 +1,10 @@
+from my_project.lazy_context import lazy_processor
+
 from .forms import LogInForm, SignUpForm
 
 
+# Only the login and register pages use these; every other page skips
+# building two ModelForms.
+@lazy_processor("signupform", "loginform")
 def forms(request):
-    return {'signupform':SignUpForm(),
-            'loginform':LogInForm()
-            }
+    return {"signupform": SignUpForm(), "loginform": LogInForm()}
@@ -1,10 +1,160 @@
+"""
+Process-wide email dispatcher, used by send_outbox (see outbox.py).
+
+A fixed pool of worker threads drains a bounded queue. Each worker keeps
+one open connection from get_connection() and reuses it for every
+message until it has been idle for a while, so a signup spike costs a few
+SMTP handshakes instead of one thread and one handshake per email.
+
+When the queue is full, dispatch() sends on the caller's thread: the
+caller slows down instead of memory growing without bound.
+"""
+
+import atexit
+import logging
+import queue
 import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        workers=2,
+        queue_size=500,
+        max_retries=3,
+        retry_backoff=1.0,
+        idle_timeout=30.0,
+        enqueue_timeout=0.5,
+    ):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+
+    def dispatch(self, message, on_done=None, max_retries=None):
+        """
+        Queue ``message`` (an EmailMessage) for sending.
+
+        ``on_done(error)`` is called once the message is sent (``error`` is
+        None) or given up on (the last exception), on the thread that sent
+        it. Failures passed to ``on_done`` are left to it to report.
+        ``max_retries`` overrides the dispatcher's own for this message;
+        callers that schedule their own retries pass 0.
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        self._start()
+        item = (message, on_done, max_retries)
+        try:
+            self._queue.put(item, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning("Email queue full, sending on the caller's thread")
+            self._send_with_retry(*item, connection=None)
+
+    def join(self):
+        """Block until every queued message has been handled."""
+        self._queue.join()
+
+    def shutdown(self, timeout=None):
+        """Send what is queued, then stop the workers."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+
+    def _start(self):
+        if self._threads:
+            return
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"email-dispatch-{len(self._threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        connection = None
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # Don't hold an SMTP session open while there's nothing to send.
+                connection = self._close(connection)
+                continue
+            if item is _STOP:
+                self._close(connection)
+                self._queue.task_done()
+                return
+            try:
+                connection = self._send_with_retry(*item, connection=connection)
+            finally:
+                self._queue.task_done()
+
+    def _send_with_retry(self, message, on_done, max_retries, connection):
+        """Send ``message``; returns the connection to keep using."""
+        for attempt in range(max_retries + 1):
+            try:
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                    connection.open()
+                connection.send_messages([message])
+                with self._lock:
+                    self.sent += 1
+                self._done(on_done, None)
+                return connection
+            except Exception as exc:
+                # The session may be broken; start the next try on a new one.
+                connection = self._close(connection)
+                if attempt == max_retries:
+                    if on_done is None:
+                        logger.exception("Giving up on email to %s", message.to)
+                    with self._lock:
+                        self.failed += 1
+                    self._done(on_done, exc)
+                    return None
+                time.sleep(self.retry_backoff * 2**attempt)
+
+    @staticmethod
+    def _done(on_done, error):
+        if on_done is not None:
+            try:
+                on_done(error)
+            except Exception:
+                logger.exception("Error in email on_done callback")
 
+    @staticmethod
+    def _close(connection):
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Error closing email connection")
+        return None
 
-class EmailThread(threading.Thread):
-    def __init__(self, email_message):
-        self.email_message = email_message
-        threading.Thread.__init__(self)
 
-    def run(self):
-        self.email_message.send()
+email_dispatcher = EmailDispatcher(
+    workers=getattr(settings, "EMAIL_DISPATCH_WORKERS", 2),
+    queue_size=getattr(settings, "EMAIL_DISPATCH_QUEUE_SIZE", 500),
+    max_retries=getattr(settings, "EMAIL_DISPATCH_MAX_RETRIES", 3),
+    retry_backoff=getattr(settings, "EMAIL_DISPATCH_RETRY_BACKOFF", 1.0),
+)
+atexit.register(email_dispatcher.shutdown, timeout=30)
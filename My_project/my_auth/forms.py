@@ -20,7 +20,7 @@ class EmailChangeForm(forms.Form):
         if new_email != confirm_email:
             raise ValidationError("The new email addresses do not match.")
 
-        if User.objects.filter(email=new_email).exists():
+        if new_email and User.objects.with_email(new_email).exists():
             raise ValidationError("This email is already taken by another user.")
 
         return cleaned_data
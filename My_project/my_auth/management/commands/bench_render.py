@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from my_auth.context_processors import forms
+from my_blog.models import Blog
+from my_blog.sidebar import get_sidebars
+from my_project.benchutils import scratch_database, timeit
+
+# The forms processor as it was before it was made lazy.
+eager_forms = forms.__wrapped__
+
+EAGER = "my_auth.management.commands.bench_render.eager_forms"
+LAZY = "my_auth.context_processors.forms"
+
+
+class Command(BaseCommand):
+    help = "Time home.html and blogs/blog_listing.html with eager and lazy forms."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=500)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def run(self, repeat, **options):
+        Blog.objects.bulk_create(
+            Blog(title=f"Blog {i}", slug=f"blog-{i}", content="x" * 500)
+            for i in range(20)
+        )
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        listing = {
+            "blogs": Paginator(Blog.objects.order_by("-date_created"), 3).get_page(1),
+            "search_query": "",
+            **get_sidebars(),
+        }
+        pages = [("home.html", {}), ("blogs/blog_listing.html", listing)]
+
+        for label, processor in [("eager", EAGER), ("lazy", LAZY)]:
+            with override_settings(TEMPLATES=self.templates(processor)):
+                for template, context in pages:
+                    ms = timeit(
+                        lambda: render_to_string(template, context, request), repeat
+                    )
+                    self.stdout.write(f"{label:>6} {template:>24}: {ms:7.3f} ms")
+
+    @staticmethod
+    def templates(processor):
+        templates = [dict(engine) for engine in settings.TEMPLATES]
+        options = dict(templates[0]["OPTIONS"])
+        options["context_processors"] = [
+            processor if path == LAZY else path
+            for path in options["context_processors"]
+        ]
+        templates[0]["OPTIONS"] = options
+        return templates
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from my_auth import outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued emails from the outbox in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=outbox.MAX_ATTEMPTS)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new emails instead of exiting when done.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between polls with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed, seconds = outbox.send_pending(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+                on_batch=self.report_batch if options["verbosity"] > 1 else None,
+            )
+            if sent or failed or not options["loop"]:
+                self.stdout.write(
+                    f"Sent {sent}, failed {failed} in {seconds:.2f}s "
+                    f"({self.rate(sent, seconds)} msg/s)"
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
+
+    def report_batch(self, sent, failed, seconds):
+        self.stdout.write(
+            f"  batch: {sent} sent, {failed} failed in {seconds:.2f}s "
+            f"({self.rate(sent, seconds)} msg/s)"
+        )
+
+    @staticmethod
+    def rate(sent, seconds):
+        return f"{sent / seconds:.1f}" if seconds else "-"
@@ -1,13 +1,130 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as DjangoUserManager
+from django.core.mail import EmailMessage
 from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+def email_match(email):
+    """
+    Case-insensitive email match written so it can use user_email_ci_unique:
+    the same LOWER(email) expression, plus the index's email <> '' condition.
+    """
+    return Q(email_lower=Lower(Value(email))) & ~Q(email="")
+
+
+class UserManager(DjangoUserManager):
+    def with_email(self, email):
+        """Users whose email equals ``email``, ignoring case."""
+        return self.alias(email_lower=Lower("email")).filter(email_match(email))
+
+    def taken_by(self, username, email):
+        """
+        ``(username, email_taken)`` rows for the users holding ``username``
+        or ``email``: at most two, found through the two unique indexes.
+        """
+        return (
+            self.alias(email_lower=Lower("email"))
+            .filter(Q(username=username) | email_match(email))
+            .annotate(
+                email_taken=ExpressionWrapper(
+                    email_match(email), output_field=BooleanField()
+                )
+            )
+            .values_list("username", "email_taken")[:2]
+        )
+
+    def availability(self, username, email):
+        """Return ``(username_taken, email_taken)`` in one query."""
+        username_taken = email_taken = False
+        for row_username, row_email_taken in self.taken_by(username, email):
+            username_taken = username_taken or row_username == username
+            email_taken = email_taken or bool(row_email_taken)
+        return username_taken, email_taken
+
+
 class User(AbstractUser):
     profile_picture = models.ImageField(
         upload_to="uploads/profile_pictures/", null=True, blank=True
     )
     is_email_verified = models.BooleanField(default=False)
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Superusers made from the shell may have no email, so blank
+            # emails are left out.
+            models.UniqueConstraint(
+                Lower("email"),
+                condition=~Q(email=""),
+                name="user_email_ci_unique",
+            ),
+        ]
+
     def __str__(self):
         return str(self.username)
+
+
+class Outbox(models.Model):
+    """
+    An email waiting to be sent by ``manage.py send_outbox``.
+
+    Views add rows in the same transaction as the change the email is
+    about, so a message is stored exactly when that change commits and a
+    restart can't lose it.
+    """
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (SENT, "Sent"), (FAILED, "Failed")]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default="plain")
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Not sent before this; pushed back after every failed attempt.
+    available_at = models.DateTimeField(default=timezone.now)
+    # Set while a worker holds the row; an expired lease can be reclaimed.
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "outbox"
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    @classmethod
+    def enqueue(cls, message):
+        """Store an EmailMessage for the outbox worker."""
+        return cls.objects.create(
+            subject=message.subject,
+            body=message.body,
+            content_subtype=message.content_subtype,
+            from_email=message.from_email,
+            to=list(message.to),
+        )
+
+    def to_message(self, connection=None):
+        message = EmailMessage(
+            self.subject,
+            self.body,
+            self.from_email,
+            self.to,
+            connection=connection,
+        )
+        message.content_subtype = self.content_subtype
+        return message
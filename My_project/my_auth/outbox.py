@@ -0,0 +1,142 @@
+"""
+Batch sender for the Outbox table.
+
+send_pending() claims due rows in batches, hands each batch to the
+EmailDispatcher (emailthreading.py), whose workers reuse their SMTP
+connections from one batch to the next, and records the outcome. The
+outbox owns retries: each claim makes one attempt per row, and a failed
+row waits for its backoff instead of holding up the batch in the
+dispatcher's retry loop.
+
+Claiming sets a lease (claimed_until) instead of holding a transaction
+open while talking to SMTP, so several workers can run side by side and
+rows held by a worker that died become claimable again once the lease
+runs out.
+
+Delivery is at-least-once: a worker killed mid-batch leaves its rows
+leased but unmarked, and they are sent again after the lease expires.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .emailthreading import email_dispatcher
+from .models import Outbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "OUTBOX_BATCH_SIZE", 100)
+MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+# Seconds before the first retry, doubled after every further failure.
+RETRY_BACKOFF = getattr(settings, "OUTBOX_RETRY_BACKOFF", 60)
+LEASE_SECONDS = getattr(settings, "OUTBOX_LEASE_SECONDS", 300)
+
+
+def due_rows(now):
+    return Outbox.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+        status=Outbox.PENDING,
+        available_at__lte=now,
+    )
+
+
+def claim_batch(batch_size=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    """Lease up to ``batch_size`` due rows to the caller and return them."""
+    now = timezone.now()
+    until = now + timedelta(seconds=lease_seconds)
+    with transaction.atomic():
+        # SKIP LOCKED lets concurrent workers pass each other on backends
+        # that have it; SQLite serializes writers anyway.
+        ids = list(
+            due_rows(now)
+            .select_for_update(skip_locked=True)
+            .order_by("available_at", "pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        # Re-checking "due" makes this a no-op for rows another worker
+        # leased in the meantime.
+        due_rows(now).filter(pk__in=ids).update(claimed_until=until)
+    return list(Outbox.objects.filter(pk__in=ids, claimed_until=until).order_by("pk"))
+
+
+def send_batch(
+    rows, max_attempts=MAX_ATTEMPTS, retry_backoff=RETRY_BACKOFF, dispatcher=None
+):
+    """Send ``rows`` through ``dispatcher``; returns ``(sent, failed)``."""
+    dispatcher = dispatcher or email_dispatcher
+    errors = {}
+    for row in rows:
+        dispatcher.dispatch(
+            row.to_message(), partial(errors.__setitem__, row.pk), max_retries=0
+        )
+    dispatcher.join()
+
+    sent = failed = 0
+    for row in rows:
+        row.attempts += 1
+        row.claimed_until = None
+        exc = errors[row.pk]
+        if exc is not None:
+            failed += 1
+            row.last_error = f"{type(exc).__name__}: {exc}"
+            if row.attempts >= max_attempts:
+                row.status = Outbox.FAILED
+                logger.error("Giving up on outbox email %s: %s", row.pk, exc)
+            else:
+                delay = retry_backoff * 2 ** (row.attempts - 1)
+                row.available_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            sent += 1
+            row.status = Outbox.SENT
+            row.sent_at = timezone.now()
+            row.last_error = ""
+
+    Outbox.objects.bulk_update(
+        rows,
+        [
+            "status",
+            "attempts",
+            "last_error",
+            "available_at",
+            "claimed_until",
+            "sent_at",
+        ],
+    )
+    return sent, failed
+
+
+def send_pending(
+    batch_size=BATCH_SIZE,
+    max_attempts=MAX_ATTEMPTS,
+    retry_backoff=RETRY_BACKOFF,
+    lease_seconds=LEASE_SECONDS,
+    on_batch=None,
+    dispatcher=None,
+):
+    """
+    Send batches until nothing is due. Returns ``(sent, failed, seconds)``.
+
+    ``on_batch(sent, failed, seconds)`` is called after every batch.
+    """
+    total_sent = total_failed = 0
+    started = time.perf_counter()
+    while True:
+        rows = claim_batch(batch_size, lease_seconds)
+        if not rows:
+            break
+        batch_started = time.perf_counter()
+        sent, failed = send_batch(rows, max_attempts, retry_backoff, dispatcher)
+        total_sent += sent
+        total_failed += failed
+        if on_batch is not None:
+            on_batch(sent, failed, time.perf_counter() - batch_started)
+    return total_sent, total_failed, time.perf_counter() - started
@@ -0,0 +1,258 @@
+"""
+reCAPTCHA verification.
+
+get_verifier() returns the verifier named by RECAPTCHA_VERIFIER:
+
+* SiteVerifyClient (default) talks to Google's siteverify endpoint over a
+  small pool of keep-alive connections, so signups don't each pay a new
+  TLS handshake, with separate connect and read timeouts so a slow
+  upstream can't hold a worker. A circuit breaker stops calling Google
+  after repeated failures; while it is open, or when a call fails, the
+  result is RECAPTCHA_FAIL_OPEN (reject by default).
+* FakeVerifier answers locally, for tests and benchmarks.
+
+Every verifier has ``verify(token, remote_ip=None)`` and an awaitable
+``averify()`` for async views.
+"""
+
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SITEVERIFY_URL = "https://www.google.com/recaptcha/api/siteverify"
+
+
+class VerifierUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures. Once
+    ``reset_timeout`` seconds have passed one trial call is let through:
+    success closes the breaker, failure keeps it open for another period.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Half-open: this caller is the trial; others keep waiting.
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("reCAPTCHA circuit breaker opened")
+                self._opened_at = time.monotonic()
+
+
+class BaseVerifier:
+    def verify(self, token, remote_ip=None):
+        raise NotImplementedError
+
+    async def averify(self, token, remote_ip=None):
+        # No async HTTP client is available, so run the (pooled, timed-out)
+        # blocking call on the executor rather than on the event loop.
+        return await sync_to_async(self.verify, thread_sensitive=False)(
+            token, remote_ip
+        )
+
+
+class SiteVerifyClient(BaseVerifier):
+    def __init__(
+        self,
+        secret,
+        url=SITEVERIFY_URL,
+        pool_size=4,
+        connect_timeout=2.0,
+        read_timeout=3.0,
+        fail_open=False,
+        breaker=None,
+    ):
+        parts = urlsplit(url)
+        self.secret = secret
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.fail_open = fail_open
+        self.breaker = breaker or CircuitBreaker()
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+    def verify(self, token, remote_ip=None):
+        if not token:
+            return False
+        if not self.breaker.allow():
+            return self.fail_open
+        try:
+            result = self._post({"secret": self.secret, "response": token}, remote_ip)
+        except VerifierUnavailable as exc:
+            self.breaker.record_failure()
+            logger.warning("reCAPTCHA verification unavailable: %s", exc)
+            return self.fail_open
+        self.breaker.record_success()
+        return bool(result.get("success"))
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _post(self, fields, remote_ip):
+        if remote_ip:
+            fields["remoteip"] = remote_ip
+        body = urlencode(fields)
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        connection, reused = self._acquire()
+        try:
+            try:
+                response = self._request(connection, body, headers)
+            except (http.client.RemoteDisconnected, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry once
+                # on a fresh one.
+                connection.close()
+                connection = self._new_connection()
+                response = self._request(connection, body, headers)
+            payload = response.read()
+            if response.status != 200:
+                raise VerifierUnavailable(f"HTTP {response.status}")
+            result = json.loads(payload)
+        except VerifierUnavailable:
+            connection.close()
+            raise
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            connection.close()
+            raise VerifierUnavailable(exc) from exc
+        self._release(connection, response)
+        return result
+
+    def _request(self, connection, body, headers):
+        if connection.sock is None:
+            connection.connect()
+            connection.sock.settimeout(self.read_timeout)
+        connection.request("POST", self.path, body, headers)
+        return connection.getresponse()
+
+    def _new_connection(self):
+        return self.connection_class(
+            self.host, self.port, timeout=self.connect_timeout
+        )
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, connection, response):
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
+class FakeVerifier(BaseVerifier):
+    """
+    Accepts every token except ``reject_token``, after sleeping ``delay``
+    seconds to stand in for upstream latency. Tokens seen are kept in
+    ``calls``.
+    """
+
+    reject_token = "invalid"
+
+    def __init__(self, delay=0.0, **kwargs):
+        self.delay = delay
+        self.calls = []
+
+    def verify(self, token, remote_ip=None):
+        self.calls.append(token)
+        if self.delay:
+            time.sleep(self.delay)
+        return bool(token) and token != self.reject_token
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def build_verifier():
+    verifier_class = import_string(
+        getattr(settings, "RECAPTCHA_VERIFIER", "my_auth.recaptcha.SiteVerifyClient")
+    )
+    return verifier_class(
+        secret=settings.GOOGLE_RECAPTCHA_SECRET_KEY,
+        url=getattr(settings, "RECAPTCHA_VERIFY_URL", SITEVERIFY_URL),
+        pool_size=getattr(settings, "RECAPTCHA_POOL_SIZE", 4),
+        connect_timeout=getattr(settings, "RECAPTCHA_CONNECT_TIMEOUT", 2.0),
+        read_timeout=getattr(settings, "RECAPTCHA_READ_TIMEOUT", 3.0),
+        fail_open=getattr(settings, "RECAPTCHA_FAIL_OPEN", False),
+        breaker=CircuitBreaker(
+            failure_threshold=getattr(settings, "RECAPTCHA_BREAKER_THRESHOLD", 5),
+            reset_timeout=getattr(settings, "RECAPTCHA_BREAKER_RESET_SECONDS", 30),
+        ),
+    )
+
+
+def get_verifier():
+    """The process-wide verifier; built on first use."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = build_verifier()
+    return _verifier
+
+
+@receiver(setting_changed)
+def reset_verifier(setting, **kwargs):
+    global _verifier
+    if setting.startswith("RECAPTCHA_") or setting == "GOOGLE_RECAPTCHA_SECRET_KEY":
+        _verifier = None
@@ -1,3 +1,579 @@
-from django.test import TestCase
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .emailthreading import EmailDispatcher
+from .forms import EmailChangeForm
+from .models import Outbox, User
+from .outbox import claim_batch, send_pending
+from .recaptcha import CircuitBreaker, SiteVerifyClient, get_verifier
+from .user_import import Checkpoint
+
+
+class CountingBackend(EmailBackend):
+    """locmem backend that counts how many connections were opened."""
+
+    opened = 0
+    failures_left = 0
+
+    def open(self):
+        type(self).opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if type(self).failures_left:
+            type(self).failures_left -= 1
+            raise ConnectionError("SMTP server went away")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="my_auth.tests.CountingBackend")
+class EmailDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        CountingBackend.opened = 0
+        CountingBackend.failures_left = 0
+        self.dispatcher = EmailDispatcher(workers=1, retry_backoff=0)
+
+    def tearDown(self):
+        self.dispatcher.shutdown(timeout=5)
+
+    def message(self, n=0):
+        return EmailMessage(f"Subject {n}", "body", "from@example.com", ["to@a.com"])
+
+    def test_worker_reuses_one_connection(self):
+        for n in range(5):
+            self.dispatcher.dispatch(self.message(n))
+        self.dispatcher.join()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(self.dispatcher.sent, 5)
+
+    def test_failed_send_is_retried_on_a_new_connection(self):
+        CountingBackend.failures_left = 2
+        self.dispatcher.dispatch(self.message())
+        self.dispatcher.join()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(CountingBackend.opened, 3)
+        self.assertEqual(self.dispatcher.failed, 0)
+
+    def test_gives_up_after_max_retries(self):
+        CountingBackend.failures_left = 10
+        dispatcher = EmailDispatcher(workers=1, max_retries=2, retry_backoff=0)
+        with self.assertLogs("my_auth.emailthreading", "ERROR"):
+            dispatcher.dispatch(self.message())
+            dispatcher.join()
+        dispatcher.shutdown(timeout=5)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(CountingBackend.opened, 3)
+        self.assertEqual(dispatcher.failed, 1)
+
+    def test_on_done_gets_the_outcome(self):
+        CountingBackend.failures_left = 10
+        dispatcher = EmailDispatcher(workers=1, max_retries=0)
+        outcomes = []
+        dispatcher.dispatch(self.message(1), outcomes.append)
+        dispatcher.join()
+        CountingBackend.failures_left = 0
+        dispatcher.dispatch(self.message(2), outcomes.append)
+        dispatcher.shutdown(timeout=5)
+        self.assertIsInstance(outcomes[0], ConnectionError)
+        self.assertIsNone(outcomes[1])
+
+    def test_full_queue_sends_on_the_callers_thread(self):
+        dispatcher = EmailDispatcher(workers=0, queue_size=1, enqueue_timeout=0)
+        dispatcher.dispatch(self.message(1))
+        with self.assertLogs("my_auth.emailthreading", "WARNING"):
+            dispatcher.dispatch(self.message(2))
+        # Nothing drains the queue, so only the overflow message went out.
+        self.assertEqual([m.subject for m in mail.outbox], ["Subject 2"])
+
+    def test_shutdown_sends_queued_messages(self):
+        for n in range(3):
+            self.dispatcher.dispatch(self.message(n))
+        self.dispatcher.shutdown(timeout=5)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib to deliver a message."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.sessions += 1
+        envelope = {}
+        self.reply("220 localhost stand-in")
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                envelope = {"from": command[10:].strip("<>"), "to": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command[8:].strip("<>")
+                if address in server.rejected:
+                    self.reply("550 No such user")
+                else:
+                    envelope["to"].append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (line := self.rfile.readline()) not in (b".\r\n", b""):
+                    data.append(line)
+                envelope["data"] = b"".join(data)
+                server.messages.append(envelope)
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.sessions = 0
+        self.messages = []
+        self.rejected = set()
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.smtp = LocalSMTPServer()
+        self.smtp.start()
+        self.addCleanup(self.smtp.stop)
+        settings = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        dispatcher = EmailDispatcher(workers=1)
+        self.addCleanup(dispatcher.shutdown, timeout=5)
+        patcher = mock.patch("my_auth.outbox.email_dispatcher", dispatcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queue(self, count, to="user@example.com"):
+        for n in range(count):
+            Outbox.enqueue(
+                EmailMessage(f"Subject {n}", "body", "from@example.com", [to])
+            )
+
+    def test_request_only_queues_the_email(self):
+        User.objects.create_user("alice", "alice@example.com", "secret123")
+        response = self.client.post(
+            reverse("my_auth:request-reset-password-view"),
+            {"email": "alice@example.com"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.smtp.sessions, 0)
+        row = Outbox.objects.get()
+        self.assertEqual(row.to, ["alice@example.com"])
+        self.assertEqual(row.status, Outbox.PENDING)
+
+    def test_connection_is_reused_across_batches(self):
+        self.queue(5)
+        sent, failed, _ = send_pending(batch_size=2)
+        self.assertEqual((sent, failed), (5, 0))
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(self.smtp.sessions, 1)
+        self.assertEqual(Outbox.objects.filter(status=Outbox.SENT).count(), 5)
+        self.assertFalse(Outbox.objects.exclude(sent_at__isnull=False).exists())
+
+    def test_failure_is_recorded_and_retried_later(self):
+        self.smtp.rejected.add("gone@example.com")
+        self.queue(1, to="gone@example.com")
+        self.queue(1)
+        sent, failed, _ = send_pending(retry_backoff=60)
+        self.assertEqual((sent, failed), (1, 1))
+        # One try for the failed row, no dispatcher retries: the failed
+        # session plus the one that sent the other row.
+        self.assertEqual(self.smtp.sessions, 2)
+        row = Outbox.objects.get(status=Outbox.PENDING)
+        self.assertEqual(row.attempts, 1)
+        self.assertIn("SMTPRecipientsRefused", row.last_error)
+        self.assertGreater(row.available_at, timezone.now() + timedelta(seconds=50))
+        # Not due yet, so a second run leaves it alone.
+        self.assertEqual(send_pending()[:2], (0, 0))
+
+    def test_gives_up_after_max_attempts(self):
+        self.smtp.rejected.add("gone@example.com")
+        self.queue(1, to="gone@example.com")
+        with self.assertLogs("my_auth.outbox", "ERROR"):
+            send_pending(max_attempts=3, retry_backoff=0)
+        row = Outbox.objects.get()
+        self.assertEqual((row.status, row.attempts), (Outbox.FAILED, 3))
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        self.queue(3)
+        first = claim_batch(batch_size=2)
+        second = claim_batch(batch_size=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(claim_batch(), [])
+
+    def test_expired_lease_is_reclaimed(self):
+        self.queue(1)
+        claim_batch(lease_seconds=-1)
+        self.assertEqual(len(claim_batch()), 1)
+
+    def test_command_reports_throughput(self):
+        self.queue(3)
+        out = StringIO()
+        call_command("send_outbox", stdout=out)
+        self.assertIn("Sent 3, failed 0", out.getvalue())
+        self.assertIn("msg/s", out.getvalue())
+        self.assertEqual(len(self.smtp.messages), 3)
+
+
+class SiteVerifyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        body = json.dumps({"success": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSiteVerifyServer(socketserver.ThreadingTCPServer):
+    """Stands in for Google's siteverify endpoint."""
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), SiteVerifyHandler)
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self.url = "http://127.0.0.1:%d/siteverify" % self.server_address[1]
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out have hung up; don't print their tracebacks.
+        pass
+
+
+class SiteVerifyClientTests(TestCase):
+    def start_server(self, **kwargs):
+        server = LocalSiteVerifyServer(**kwargs)
+        thread = threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def make_client(self, url, **kwargs):
+        client = SiteVerifyClient("secret", url=url, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_connection_is_reused(self):
+        server = self.start_server()
+        client = self.make_client(server.url)
+        self.assertTrue(client.verify("token"))
+        self.assertTrue(client.verify("token"))
+        self.assertEqual((server.connections, server.requests), (1, 2))
+
+    def test_slow_upstream_times_out_and_fails_closed(self):
+        server = self.start_server(delay=0.5)
+        client = self.make_client(server.url, read_timeout=0.05)
+        started = time.monotonic()
+        with self.assertLogs("my_auth.recaptcha", "WARNING"):
+            self.assertFalse(client.verify("token"))
+        self.assertLess(time.monotonic() - started, 0.4)
+
+    def test_fail_open(self):
+        client = self.make_client("http://127.0.0.1:1/siteverify", fail_open=True)
+        with self.assertLogs("my_auth.recaptcha", "WARNING"):
+            self.assertTrue(client.verify("token"))
+
+    def test_open_breaker_skips_upstream(self):
+        server = self.start_server(delay=0.5)
+        client = self.make_client(
+            server.url,
+            read_timeout=0.05,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+        with self.assertLogs("my_auth.recaptcha", "WARNING"):
+            client.verify("token")
+            client.verify("token")
+        self.assertTrue(client.breaker.is_open)
+        self.assertFalse(client.verify("token"))
+        self.assertEqual(server.requests, 2)
+
+    def test_breaker_closes_after_successful_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        with self.assertLogs("my_auth.recaptcha", "WARNING"):
+            breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+
+    def test_async_verify(self):
+        server = self.start_server()
+        client = self.make_client(server.url)
+        self.assertTrue(async_to_sync(client.averify)("token"))
+
+    @override_settings(RECAPTCHA_VERIFIER="my_auth.recaptcha.FakeVerifier")
+    def test_registration_with_fake_verifier(self):
+        form = {
+            "email": "bob@example.com",
+            "username": "bob",
+            "password1": "secret123",
+            "password2": "secret123",
+        }
+        url = reverse("my_auth:register-view")
+        response = self.client.post(url, {**form, "g-recaptcha-response": "invalid"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, {**form, "g-recaptcha-response": "ok"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(get_verifier().calls, ["invalid", "ok"])
+        self.assertTrue(User.objects.filter(username="bob").exists())
+        self.assertEqual(Outbox.objects.get().to, ["bob@example.com"])
+
+
+class UserLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", "Alice@Example.com", "pw")
+
+    def test_availability_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                User.objects.availability("alice", "ALICE@example.com"), (True, True)
+            )
+        self.assertEqual(
+            User.objects.availability("alice", "new@example.com"), (True, False)
+        )
+        self.assertEqual(
+            User.objects.availability("bob", "alice@example.COM"), (False, True)
+        )
+        self.assertEqual(
+            User.objects.availability("bob", "bob@example.com"), (False, False)
+        )
+
+    def test_email_is_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user("alice2", "alice@example.com", "pw")
+
+    def test_blank_emails_are_not_unique(self):
+        User.objects.create_user("nomail1", "", "pw")
+        User.objects.create_user("nomail2", "", "pw")
+        self.assertFalse(User.objects.with_email("").exists())
+
+    def test_with_email_uses_the_index(self):
+        plan = User.objects.with_email("alice@example.com").explain()
+        self.assertIn("user_email_ci_unique", plan)
+        self.assertEqual(
+            list(User.objects.with_email("ALICE@EXAMPLE.COM")), [self.alice]
+        )
+
+    def test_reset_password_matches_any_case(self):
+        self.client.post(
+            reverse("my_auth:request-reset-password-view"),
+            {"email": "alice@EXAMPLE.com"},
+        )
+        self.assertEqual(Outbox.objects.get().to, [self.alice.email])
+
+    def test_email_change_form_rejects_taken_email(self):
+        form = EmailChangeForm(
+            {"new_email": "ALICE@example.com", "confirm_email": "ALICE@example.com"}
+        )
+        self.assertFalse(form.is_valid())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def import_users(self, path, *args):
+        out = StringIO()
+        self.err = StringIO()
+        call_command(
+            "import_users",
+            path,
+            "--workers=2",
+            "--batch-size=2",
+            *args,
+            stdout=out,
+            stderr=self.err,
+        )
+        return out.getvalue()
+
+    def test_csv(self):
+        path = self.write(
+            "users.csv",
+            "username,email,password,first_name\n"
+            + "".join(f"user{n},user{n}@Example.com,pw{n},User\n" for n in range(5)),
+        )
+        out = self.import_users(path, "--verified")
+        self.assertIn("Imported 5 rows", out)
+        self.assertIn("rows/s", out)
+        user = User.objects.get(username="user3")
+        self.assertEqual(user.email, "user3@example.com")
+        self.assertTrue(user.check_password("pw3"))
+        self.assertTrue(user.is_email_verified)
+        self.assertFalse(os.path.exists(path + ".checkpoint"))
+
+    def test_jsonl_blank_password_is_unusable(self):
+        path = self.write(
+            "users.jsonl",
+            '{"username": "a", "email": "a@example.com", "password": "secret"}\n'
+            '{"username": "b", "email": "b@example.com", "password": ""}\n',
+        )
+        self.import_users(path)
+        self.assertTrue(User.objects.get(username="a").check_password("secret"))
+        self.assertFalse(User.objects.get(username="b").has_usable_password())
+
+    def test_resumes_from_checkpoint(self):
+        path = self.write(
+            "users.jsonl",
+            "".join(
+                json.dumps({"username": f"u{n}", "email": f"u{n}@example.com"}) + "\n"
+                for n in range(5)
+            ),
+        )
+        # As if an earlier run committed the first two rows, then died.
+        Checkpoint(path + ".checkpoint").save(path, 2)
+        out = self.import_users(path)
+        self.assertIn("Resuming after row 2", out)
+        self.assertEqual(
+            sorted(User.objects.values_list("username", flat=True)),
+            ["u2", "u3", "u4"],
+        )
+
+    def test_replayed_rows_are_skipped(self):
+        User.objects.create_user("u0", "u0@example.com", "old")
+        path = self.write(
+            "users.jsonl",
+            '{"username": "u0", "email": "u0@example.com", "password": "new"}\n'
+            '{"username": "u1", "email": "u1@example.com", "password": "new"}\n',
+        )
+        out = self.import_users(path)
+        self.assertIn("Imported 1 rows, skipped 1 existing", out)
+        self.assertTrue(User.objects.get(username="u0").check_password("old"))
+        self.assertTrue(User.objects.filter(username="u1").exists())
+
+    def test_invalid_jsonl_rows_are_reported_and_skipped(self):
+        path = self.write(
+            "users.jsonl",
+            '{"username": "a", "email": "a@example.com"}\n'
+            '["b", "b@example.com"]\n'
+            "\n"
+            '{"username": " ", "email": "c@example.com"}\n'
+            '{"email": "d@example.com"}\n'
+            '{"username": "e", "email": 5}\n'
+            "not json\n"
+            '{"username": "f", "email": "f@example.com"}\n',
+        )
+        out = self.import_users(path)
+        self.assertIn("Imported 2 rows, skipped 0 existing and 5 invalid", out)
+        self.assertEqual(
+            sorted(User.objects.values_list("username", flat=True)), ["a", "f"]
+        )
+        errors = self.err.getvalue().splitlines()
+        self.assertEqual(
+            [line.split(":")[0] for line in errors],
+            ["Line 2", "Line 4", "Line 5", "Line 6", "Line 7"],
+        )
+        self.assertIn("not a JSON object", errors[0])
+        self.assertIn("username is missing", errors[1])
+        self.assertIn("email is not a string", errors[3])
+        self.assertFalse(os.path.exists(path + ".checkpoint"))
+
+    def test_csv_row_without_username_is_skipped(self):
+        path = self.write(
+            "users.csv",
+            "username,email\n"
+            "a,a@example.com\n"
+            ",b@example.com\n"
+            "c,c@example.com\n",
+        )
+        out = self.import_users(path)
+        self.assertIn("Imported 2 rows, skipped 0 existing and 1 invalid", out)
+        self.assertEqual(self.err.getvalue(), "Line 3: username is missing, skipped\n")
+
+    def test_checkpoint_for_another_file_is_rejected(self):
+        path = self.write("users.jsonl", "")
+        Checkpoint(path + ".checkpoint").save("other.jsonl", 10)
+        with self.assertRaises(CommandError):
+            self.import_users(path)
+
+
+class LazyFormsContextTests(TestCase):
+    def test_forms_are_built_only_where_used(self):
+        with mock.patch("my_auth.context_processors.SignUpForm") as signup:
+            with mock.patch("my_auth.context_processors.LogInForm") as login:
+                self.client.get(reverse("my_app:home_view"))
+        signup.assert_not_called()
+        login.assert_not_called()
+
+    def test_login_page_renders_form(self):
+        response = self.client.get(reverse("my_auth:login-view"))
+        self.assertContains(response, 'name="username"')
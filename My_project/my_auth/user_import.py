@@ -0,0 +1,106 @@
+"""
+Helpers for ``manage.py import_users``.
+
+Rows are read lazily from CSV or JSONL, so the file is never held in
+memory, and passwords are hashed in worker processes because PBKDF2 is
+CPU-bound and the GIL would serialize it on threads.
+"""
+
+import csv
+import json
+import os
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+
+FIELDS = ("username", "email", "password", "first_name", "last_name")
+
+
+def read_rows(path, fmt=None):
+    """
+    Yield ``(line number, row)`` per user from a CSV (with a header row) or
+    JSONL file. A CSV row is a dict; a JSONL row is whatever the line holds,
+    or the ValueError for a line that isn't JSON, for the caller to reject.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError as exc:
+                        yield number, exc
+
+
+def row_error(row, max_lengths):
+    """Why ``row`` can't be imported, or None if it can."""
+    if isinstance(row, ValueError):
+        return f"not valid JSON ({row})"
+    if not isinstance(row, dict):
+        return "not a JSON object"
+    for field in FIELDS:
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            return f"{field} is not a string"
+        if field in max_lengths and len((value or "").strip()) > max_lengths[field]:
+            return f"{field} is longer than {max_lengths[field]} characters"
+    if not (row.get("username") or "").strip():
+        return "username is missing"
+    return None
+
+
+def init_worker():
+    # Under the "spawn" start method workers begin with an unconfigured
+    # Django; with "fork" they inherit the parent's and this is a no-op.
+    if not apps.ready:
+        django.setup()
+
+
+def hash_password(raw):
+    """Hash one password; blank passwords become unusable ones."""
+    return make_password(raw or None)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class Checkpoint:
+    """
+    Number of input rows already imported, kept in a small JSON file that
+    is replaced atomically after every committed batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, source):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if state.get("source") != os.path.abspath(source):
+            raise ValueError(
+                f"{self.path} is a checkpoint for {state.get('source')}, "
+                f"not {source}"
+            )
+        return state["rows"]
+
+    def save(self, source, rows):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": os.path.abspath(source), "rows": rows}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,7 +1,3 @@
-import json
-import urllib
-
-from my_project.settings import GOOGLE_RECAPTCHA_SECRET_KEY
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, get_user_model, login, logout
@@ -10,7 +6,8 @@ from django.contrib.auth.tokens import (
     default_token_generator,
 )
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import EmailMessage, send_mail
+from django.core.mail import EmailMessage
+from django.db import transaction
 from django.shortcuts import redirect, render
 from django.template import loader
 from django.template.loader import render_to_string
@@ -28,7 +25,8 @@ import datetime
 
 from django.contrib import sessions
 
-from .emailthreading import EmailThread
+from .models import Outbox
+from .recaptcha import get_verifier
 from .utils import generate_token
 
 
@@ -56,16 +54,9 @@ class RegistrationView(View):
         password2 = request.POST.get("password2")
         print("email:", email)
         # Recaptcha check
-        recaptcha_response = request.POST.get("g-recaptcha-response")
-        url = "https://www.google.com/recaptcha/api/siteverify"
-        recaptcha_dict = {
-            "secret": GOOGLE_RECAPTCHA_SECRET_KEY,
-            "response": recaptcha_response,
-        }
-        data = urllib.parse.urlencode(recaptcha_dict).encode()
-        req = urllib.request.Request(url, data=data)
-        response = urllib.request.urlopen(req)
-        result = json.loads(response.read().decode())
+        recaptcha_ok = get_verifier().verify(
+            request.POST.get("g-recaptcha-response"), request.META.get("REMOTE_ADDR")
+        )
 
         if len(password1) < 6:
             messages.error(request, "Password must be at least 6 characters long.")
@@ -78,38 +69,36 @@ class RegistrationView(View):
             messages.error(request, "Please provide a valid email")
             context["has_error"] = True
 
-        # recaptcha api sends json object with one key'sucsess', It's value is boolean
-        if not result["success"]:
+        if not recaptcha_ok:
             messages.error(request, "Recaptcha Failed")
             context["has_error"] = True
 
-        try:
-            if email:
-                if User.objects.get(email=email):
-                    messages.error(request, "User with that Email already exist!")
-                    context["has_error"] = True
-
-        except Exception as identifier:
-            pass
-
-        try:
-            if name:
-                if User.objects.get(username=name):
-                    messages.error(request, "Username is taken")
-                    context["has_error"] = True
-
-        except Exception as identifier:
-            pass
+        username_taken, email_taken = User.objects.availability(name, email)
+        if email and email_taken:
+            messages.error(request, "User with that Email already exist!")
+            context["has_error"] = True
+        if name and username_taken:
+            messages.error(request, "Username is taken")
+            context["has_error"] = True
 
         if context["has_error"]:
             # messages.error(request,"Unable to register. Client error!")
             return render(request, "authentication/register.html", context, status=400)
 
-        user = User.objects.create(username=name, email=email, password=password1)
-        user.set_password(password1)
-        user.is_active = False
-        user.save()
+        # The activation email is queued in the same transaction as the user,
+        # so neither exists without the other.
+        with transaction.atomic():
+            user = User.objects.create(username=name, email=email, password=password1)
+            user.set_password(password1)
+            user.is_active = False
+            user.save()
+            self.queue_activation_email(request, user, email)
+
+        messages.success(request, "Your Account was created succesfully.")
+
+        return redirect("my_auth:login-view")
 
+    def queue_activation_email(self, request, user, email):
         current_site = get_current_site(request)
         email_subject = "Active your Account"
 
@@ -139,10 +128,7 @@ class RegistrationView(View):
             email_subject, message, settings.EMAIL_HOST_USER, [email]
         )
         email_message.content_subtype = "html"
-        EmailThread(email_message).start()
-        messages.success(request, "Your Account was created succesfully.")
-
-        return redirect("my_auth:login-view")
+        Outbox.enqueue(email_message)
 
 
 class LoginView(View):
@@ -216,9 +202,9 @@ class RequestResetPasswordView(View):
             messages.error(request, "Please enter a valid email")
             return render(request, "authentication/request-reset-password.html")
 
-        user = User.objects.filter(email=email)
+        user = User.objects.with_email(email).first()
 
-        if user.exists():
+        if user is not None:
             current_site = get_current_site(request)
             email_subject = "Reset your Password"
 
@@ -227,16 +213,16 @@ class RequestResetPasswordView(View):
                 "authentication/reset-user-password.html",
                 {
                     "domain": current_site.domain,
-                    "uid": urlsafe_base64_encode(force_bytes(user[0].pk)),
-                    "token": PasswordResetTokenGenerator().make_token(user[0]),
+                    "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+                    "token": PasswordResetTokenGenerator().make_token(user),
                 },
             )
 
             email_message = EmailMessage(
-                email_subject, message, settings.EMAIL_HOST_USER, [email]
+                email_subject, message, settings.EMAIL_HOST_USER, [user.email]
             )
 
-            EmailThread(email_message).start()
+            Outbox.enqueue(email_message)
 
         messages.success(
             request,
@@ -326,7 +312,9 @@ class ChangeEmailView(View):
                     "confirmation_link": confirmation_link,
                 },
             )
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [new_email])
+            Outbox.enqueue(
+                EmailMessage(subject, message, settings.EMAIL_HOST_USER, [new_email])
+            )
 
             # Inform the user to check their email
             messages.success(
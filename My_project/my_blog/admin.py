@@ -1,5 +1,11 @@
 from django.contrib import admin
+from my_app.exports import export_actions
 from .models import Category, Blog
 
 # Register your models here.
-admin.site.register((Category, Blog))
+admin.site.register(Category)
+
+
+@admin.register(Blog)
+class BlogAdmin(admin.ModelAdmin):
+    actions = export_actions
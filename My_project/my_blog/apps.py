@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MyBlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'my_blog'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,66 @@
+import random
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from my_blog.models import Blog
+from my_blog.view_counter import view_counter
+from my_project.benchutils import scratch_database, timeit
+
+
+class Command(BaseCommand):
+    help = "Measure blog detail page latency with and without cached sidebars."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            try:
+                self.run(**options)
+            finally:
+                # Pending counts belong to the scratch database.
+                view_counter.discard()
+
+    def run(self, rows, repeat, **options):
+        rng = random.Random(42)
+        Blog.objects.bulk_create(
+            (
+                Blog(
+                    title=f"Blog {i}",
+                    slug=f"blog-{i}",
+                    content="x" * 500,
+                    views=rng.randrange(100_000),
+                )
+                for i in range(rows)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {rows} blogs")
+        client = Client()
+        url = Blog.objects.get(slug="blog-0").get_absolute_url()
+
+        def uncached():
+            cache.clear()  # every request recomputes both sidebars
+            client.get(url)
+
+        def cached():
+            client.get(url)
+
+        # Baseline: what every request used to pay, a sort over the table.
+        indexes = list(Blog._meta.indexes)
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Blog, index)
+        self.report("recompute, no indexes", uncached, repeat)
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Blog, index)
+        self.report("recompute, indexed", uncached, repeat)
+        self.report("cached", cached, repeat)
+
+    def report(self, label, func, repeat):
+        self.stdout.write(f"{label:>22}: {timeit(func, repeat):8.2f} ms")
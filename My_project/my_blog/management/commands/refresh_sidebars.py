@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from my_blog.sidebar import refresh_sidebars
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached recent/popular blog sidebars (run from cron)."
+
+    def handle(self, *args, **options):
+        sidebars = refresh_sidebars()
+        self.stdout.write(
+            f"Refreshed {len(sidebars['recent_blogs'])} recent and "
+            f"{len(sidebars['popular_blogs'])} popular blogs."
+        )
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from my_blog.search, so
+# later changes to that module can't alter what this migration does.
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS my_blog_blog_fts USING fts5("
+            "title, content, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        # Column weights for bm25(): title, content.
+        cursor.execute(
+            "INSERT INTO my_blog_blog_fts(my_blog_blog_fts, rank) "
+            "VALUES ('rank', 'bm25(10.0, 1.0)')"
+        )
+        cursor.execute(
+            "INSERT INTO my_blog_blog_fts(rowid, title, content) "
+            "SELECT id, COALESCE(title, ''), content FROM my_blog_blog"
+        )
+        cursor.execute(
+            "INSERT INTO my_blog_blog_fts(my_blog_blog_fts) VALUES ('optimize')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS my_blog_blog_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_blog", "0006_alter_blog_thumbnail"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
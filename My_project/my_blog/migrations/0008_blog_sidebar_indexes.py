@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_blog', '0007_blog_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-date_created'], name='blog_date_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-views'], name='blog_views_idx'),
+        ),
+    ]
@@ -43,6 +43,13 @@ class Blog(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # "Recent" and "popular" sidebars (see sidebar.py)
+            models.Index(fields=["-date_created"], name="blog_date_created_idx"),
+            models.Index(fields=["-views"], name="blog_views_idx"),
+        ]
+
     def get_absolute_url(self):
         return reverse(
             "my_blog:blog_detail_view",
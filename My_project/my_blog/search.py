@@ -0,0 +1,133 @@
+"""
+Full-text blog search on SQLite FTS5.
+
+my_blog_blog_fts holds each blog's title and content under the blog's id
+(its rowid). Migration 0007 creates it and sets its rank to bm25()
+weighting the title 10 and the content 1. signals.py updates it on
+save/delete; the rebuild_blog_search command reloads it in bulk.
+
+Query syntax accepted in the search box:
+
+    django orm      both terms, any order
+    "query set"     exact phrase
+    optim*          prefix
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = "my_blog_blog_fts"
+
+# Control characters don't occur in blog text, so they can mark the
+# highlighted terms until the snippet has been HTML-escaped.
+MARK_START, MARK_END = "\x02", "\x03"
+
+TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_available(conn=connection):
+    return conn.vendor == "sqlite"
+
+
+def rebuild_blog_index(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, content) "
+            "SELECT id, COALESCE(title, ''), content FROM my_blog_blog"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def index_blog(blog):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [blog.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (%s, %s, %s)",
+            [blog.pk, blog.title or "", blog.content],
+        )
+
+
+def unindex_blog(pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+
+def to_match_expression(search):
+    """
+    Turn the search box input into a safe FTS5 MATCH expression. Every
+    term is quoted, so FTS5 operators typed by users are matched as text.
+    """
+    terms = []
+    for phrase, word in TOKEN_RE.findall(search):
+        prefix = False
+        if word:
+            prefix = word.endswith("*")
+            phrase = word.rstrip("*")
+        phrase = phrase.strip()
+        if not phrase:
+            continue
+        term = '"%s"' % phrase.replace('"', '""')
+        terms.append(term + "*" if prefix else term)
+    return " ".join(terms)
+
+
+def search_blogs(queryset, search):
+    """Filter ``queryset`` to blogs matching ``search``, best match first."""
+    if not fts_available():
+        return queryset.filter(
+            Q(title__icontains=search) | Q(content__icontains=search)
+        )
+
+    expression = to_match_expression(search)
+    if not expression:
+        return queryset.none()
+
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+        params=[expression],
+        select={"search_rank": f"{FTS_TABLE}.rank"},
+        order_by=["search_rank"],
+    )
+
+
+def add_highlights(blogs, search):
+    """
+    Set ``search_title`` and ``search_snippet`` on each blog, with the
+    matched terms marked for the ``highlight`` template filter.
+
+    Only called for the blogs on the current page, so snippets are built
+    for a handful of rows instead of for every match.
+    """
+    blogs = list(blogs)
+    expression = to_match_expression(search)
+    if not blogs or not expression or not fts_available():
+        return blogs
+
+    by_id = {blog.pk: blog for blog in blogs}
+    placeholders = ", ".join(["%s"] * len(by_id))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, "
+            f"highlight({FTS_TABLE}, 0, '{MARK_START}', '{MARK_END}'), "
+            f"snippet({FTS_TABLE}, 1, '{MARK_START}', '{MARK_END}', '…', 30) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"AND rowid IN ({placeholders})",
+            [expression, *by_id],
+        )
+        for pk, title, snippet in cursor.fetchall():
+            by_id[pk].search_title = title
+            by_id[pk].search_snippet = snippet
+    return blogs
+
+
+def render_highlight(text):
+    """HTML-escape ``text`` and turn the match markers into <mark> tags."""
+    html = escape(text).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return mark_safe(html)
@@ -0,0 +1,90 @@
+"""
+Precomputed "recent" and "popular" blog sidebars.
+
+Both lists live in the cache as one entry stamped with a freshness
+deadline and the generation it was computed at. When it goes stale
+(after BLOG_SIDEBAR_FRESH_SECONDS, or right away on a blog write) exactly
+one request takes a short cache lock and recomputes; everyone else keeps
+getting the stale copy meanwhile, so a burst of traffic never turns into
+a burst of identical queries.
+
+A blog write bumps the generation. A refresh reads the generation before
+it queries and stores its result only if no write has bumped it since,
+so a refresh that raced a write can't store pre-write lists as fresh.
+
+Run `manage.py refresh_sidebars` from cron to refresh on a schedule.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Blog
+
+SIDEBAR_KEY = "my_blog:sidebars"
+GENERATION_KEY = "my_blog:sidebars:generation"
+LOCK_KEY = "my_blog:sidebars:lock"
+SIDEBAR_SIZE = 5
+FRESH_SECONDS = getattr(settings, "BLOG_SIDEBAR_FRESH_SECONDS", 60)
+# How long past its deadline a stale copy may still be served.
+STALE_SECONDS = getattr(settings, "BLOG_SIDEBAR_STALE_SECONDS", 3600)
+LOCK_SECONDS = 30
+
+
+def compute_sidebars():
+    # Only what the sidebar templates render.
+    blogs = Blog.objects.only("title", "slug", "thumbnail", "date_created", "views")
+    return {
+        "recent_blogs": list(blogs.order_by("-date_created")[:SIDEBAR_SIZE]),
+        "popular_blogs": list(blogs.order_by("-views")[:SIDEBAR_SIZE]),
+    }
+
+
+def current_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Evicted or never set: start from a value no stored entry has.
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def refresh_sidebars():
+    generation = current_generation()
+    sidebars = compute_sidebars()
+    if cache.get(GENERATION_KEY) == generation:
+        cache.set(
+            SIDEBAR_KEY,
+            (generation, time.time() + FRESH_SECONDS, sidebars),
+            FRESH_SECONDS + STALE_SECONDS,
+        )
+    return sidebars
+
+
+def get_sidebars():
+    """Return ``{"recent_blogs": [...], "popular_blogs": [...]}``."""
+    found = cache.get_many([SIDEBAR_KEY, GENERATION_KEY])
+    entry = found.get(SIDEBAR_KEY)
+    if entry is not None:
+        generation, fresh_until, sidebars = entry
+        if generation == found.get(GENERATION_KEY) and fresh_until > time.time():
+            return sidebars
+
+    if cache.add(LOCK_KEY, True, LOCK_SECONDS):
+        try:
+            return refresh_sidebars()
+        finally:
+            cache.delete(LOCK_KEY)
+
+    # Somebody else is recomputing.
+    if entry is not None:
+        return entry[2]
+    return compute_sidebars()
+
+
+def mark_sidebars_stale():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        current_generation()
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import Blog
+from .sidebar import mark_sidebars_stale
+
+
+@receiver(post_save, sender=Blog)
+def index_blog(sender, instance, **kwargs):
+    if search.fts_available():
+        search.index_blog(instance)
+
+
+@receiver(post_delete, sender=Blog)
+def unindex_blog(sender, instance, **kwargs):
+    if search.fts_available():
+        search.unindex_blog(instance.pk)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+def refresh_sidebars_on_write(sender, **kwargs):
+    mark_sidebars_stale()
@@ -0,0 +1,11 @@
+from django import template
+
+from ..search import render_highlight
+
+register = template.Library()
+
+
+@register.filter
+def highlight(text):
+    """Render a search_title/search_snippet with its matches in <mark>."""
+    return render_highlight(text or "")
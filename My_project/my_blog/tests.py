@@ -1,3 +1,216 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Blog
+from .search import rebuild_blog_index, search_blogs
+from . import sidebar
+from .sidebar import LOCK_KEY, get_sidebars
+from .view_counter import view_counter, write_views
+
+# Tests flush view counts explicitly; time-based flushes would add
+# queries at random points, and leftovers must not reach the dev database.
+no_timed_flush = override_settings(BLOG_VIEW_FLUSH_INTERVAL=None)
+
+
+def setUpModule():
+    no_timed_flush.enable()
+
+
+def tearDownModule():
+    view_counter.discard()
+    no_timed_flush.disable()
+
+
+class BlogSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def make(self, title, content):
+        return Blog.objects.create(title=title, content=content)
+
+    def search(self, term):
+        return [blog.title for blog in search_blogs(Blog.objects.all(), term)]
+
+    def test_title_matches_rank_first(self):
+        self.make("Notes", "a long post that mentions django once")
+        self.make("Django tips", "short")
+        self.assertEqual(self.search("django"), ["Django tips", "Notes"])
+
+    def test_phrase_and_prefix(self):
+        self.make("One", "the query set is lazy")
+        self.make("Two", "set the query later")
+        self.assertEqual(self.search('"query set"'), ["One"])
+        self.assertEqual(sorted(self.search("quer*")), ["One", "Two"])
+
+    def test_index_follows_saves_and_deletes(self):
+        blog = self.make("Draft", "old words")
+        blog.content = "new words"
+        blog.save()
+        self.assertEqual(self.search("old"), [])
+        self.assertEqual(self.search("new"), ["Draft"])
+        blog.delete()
+        self.assertEqual(self.search("new"), [])
+
+    def test_rebuild_picks_up_bulk_writes(self):
+        Blog.objects.bulk_create(
+            [Blog(title="Bulk", slug="bulk", content="imported")]
+        )
+        self.assertEqual(self.search("imported"), [])
+        rebuild_blog_index()
+        self.assertEqual(self.search("imported"), ["Bulk"])
+
+    def test_listing_highlights_matches_and_escapes_content(self):
+        self.make("Caching <b>guide</b>", "how to use the cache framework")
+        response = self.client.get(
+            reverse("my_blog:blog_listing_view"), {"search": "cach*"}
+        )
+        self.assertContains(response, "<mark>Caching</mark> &lt;b&gt;guide&lt;/b&gt;")
+        self.assertContains(response, "use the <mark>cache</mark> framework")
+
+    def test_listing_search_query_count(self):
+        for i in range(10):
+            self.make(f"Post {i}", "searchable text")
+        get_sidebars()
+        # count + page + highlights
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("my_blog:blog_listing_view"), {"search": "searchable"}
+            )
+        self.assertEqual(len(response.context["blogs"]), 3)
+
+
+class BlogSidebarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.blogs = [
+            Blog.objects.create(title=f"Blog {i}", content="x", views=i)
+            for i in range(7)
+        ]
+
+    def titles(self, blogs):
+        return [blog.title for blog in blogs]
+
+    def test_sidebars_are_computed_once(self):
+        with self.assertNumQueries(2):
+            get_sidebars()
+        with self.assertNumQueries(0):
+            sidebars = get_sidebars()
+        self.assertEqual(
+            self.titles(sidebars["popular_blogs"]),
+            ["Blog 6", "Blog 5", "Blog 4", "Blog 3", "Blog 2"],
+        )
+
+    def test_blog_write_refreshes_sidebars(self):
+        get_sidebars()
+        Blog.objects.create(title="Newest", content="x", views=100)
+        sidebars = get_sidebars()
+        self.assertEqual(sidebars["recent_blogs"][0].title, "Newest")
+        self.assertEqual(sidebars["popular_blogs"][0].title, "Newest")
+
+    def test_refresh_racing_a_write_is_not_stored_as_fresh(self):
+        compute = sidebar.compute_sidebars
+
+        def compute_then_write():
+            sidebars = compute()
+            # Committed after the lists were read.
+            Blog.objects.create(title="Newest", content="x", views=100)
+            return sidebars
+
+        with mock.patch.object(
+            sidebar, "compute_sidebars", side_effect=compute_then_write
+        ):
+            get_sidebars()
+        sidebars = get_sidebars()
+        self.assertEqual(sidebars["recent_blogs"][0].title, "Newest")
+
+    def test_stale_copy_is_served_while_another_request_recomputes(self):
+        get_sidebars()
+        self.blogs[6].delete()
+        cache.add(LOCK_KEY, True)
+        with self.assertNumQueries(0):
+            sidebars = get_sidebars()
+        self.assertEqual(sidebars["recent_blogs"][0].title, "Blog 6")
+        cache.delete(LOCK_KEY)
+        with self.assertNumQueries(2):
+            sidebars = get_sidebars()
+        self.assertEqual(sidebars["recent_blogs"][0].title, "Blog 5")
+
+    def test_detail_view_uses_cached_sidebars(self):
+        get_sidebars()
+        # blog lookup only
+        with self.assertNumQueries(1):
+            response = self.client.get(self.blogs[0].get_absolute_url())
+        self.assertEqual(
+            self.titles(response.context["recent_blogs"]),
+            ["Blog 6", "Blog 5", "Blog 4", "Blog 3", "Blog 2"],
+        )
+
+
+class BlogViewCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counter.discard()
+        self.first = Blog.objects.create(title="First", content="x", views=5)
+        self.second = Blog.objects.create(title="Second", content="x")
+
+    def test_hits_are_buffered_until_flush(self):
+        for _ in range(3):
+            self.client.get(self.first.get_absolute_url())
+        self.client.get(self.second.get_absolute_url())
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views, 5)
+        self.assertEqual(view_counter.lag()["views"], 4)
+
+        # one UPDATE, plus SAVEPOINT/RELEASE inside the test transaction
+        with self.assertNumQueries(3):
+            self.assertEqual(view_counter.flush(), 4)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.views, self.second.views), (8, 1))
+        self.assertEqual(view_counter.lag(), {"blogs": 0, "views": 0, "seconds": 0.0})
+
+    def test_write_views_batches_many_blogs(self):
+        blogs = Blog.objects.bulk_create(
+            [Blog(title=f"B{i}", slug=f"b{i}", content="x") for i in range(700)]
+        )
+        # three UPDATEs of up to 300 blogs, plus SAVEPOINT/RELEASE
+        with self.assertNumQueries(5):
+            write_views({blog.pk: 2 for blog in blogs})
+        self.assertEqual(Blog.objects.filter(views=2).count(), 700)
+
+    @override_settings(BLOG_VIEW_FLUSH_MAX_PENDING=2)
+    def test_flushes_when_too_many_blogs_are_pending(self):
+        view_counter.increment(self.first.pk)
+        view_counter.increment(self.second.pk)
+        self.assertEqual(view_counter.lag()["views"], 0)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views, 6)
+
+    @override_settings(BLOG_VIEW_FLUSH_INTERVAL=0.05)
+    def test_background_thread_flushes_after_the_interval(self):
+        flushed = threading.Event()
+
+        def flush(blocking=True):
+            view_counter.discard()
+            flushed.set()
+            return 1
+
+        # No further view arrives to trigger it.
+        with mock.patch.object(view_counter, "flush", side_effect=flush):
+            view_counter.increment(self.first.pk)
+            self.assertTrue(flushed.wait(5))
+
+    def test_failed_flush_keeps_the_counts(self):
+        view_counter.increment(self.first.pk, 3)
+        with mock.patch(
+            "my_blog.view_counter.write_views", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            view_counter.flush()
+        self.assertEqual(view_counter.lag()["views"], 3)
+        view_counter.flush()
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views, 8)
@@ -0,0 +1,44 @@
+"""
+Helpers shared by the bench_* management commands of all apps.
+
+Benchmarks never touch db.sqlite3: they run against a throwaway test
+database that is created on entry and destroyed on exit.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def scratch_database(verbosity=0, test_name=None):
+    """
+    ``test_name`` puts the scratch database in that file instead of the
+    default (in memory on SQLite), e.g. to keep a large table out of RSS.
+    """
+    old_name = connection.settings_dict["NAME"]
+    test_settings = connection.settings_dict["TEST"]
+    old_test_name = test_settings.get("NAME")
+    if test_name:
+        test_settings["NAME"] = test_name
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+        test_settings["NAME"] = old_test_name
+
+
+def timeit(func, repeat=20):
+    """Return the median wall time of ``func()`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
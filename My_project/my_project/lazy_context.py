@@ -0,0 +1,45 @@
+"""
+Lazy context processors.
+
+Context processors run on every render that has a request, whether or not
+the template uses what they return. Decorating one with
+``lazy_processor("key", ...)`` defers it: each declared key becomes a
+SimpleLazyObject, and the processor runs (once per render) the first time
+a template touches any of them. Pages that never mention the keys never
+pay for building the values.
+
+    @lazy_processor("signupform", "loginform")
+    def forms(request):
+        return {"signupform": SignUpForm(), "loginform": LogInForm()}
+
+The decorated function is still registered in TEMPLATES as usual. The
+processors Django ships (auth, messages, debug, request) are already
+cheap or lazy, so only the project's own need wrapping.
+"""
+
+import functools
+
+from django.utils.functional import SimpleLazyObject
+
+
+def lazy_processor(*keys):
+    """Run the decorated context processor only when a template uses ``keys``."""
+
+    def decorator(processor):
+        @functools.wraps(processor)
+        def wrapper(request):
+            result = None
+
+            def value(key):
+                nonlocal result
+                if result is None:
+                    result = processor(request)
+                return result[key]
+
+            return {
+                key: SimpleLazyObject(functools.partial(value, key)) for key in keys
+            }
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,30 @@
-from django.contrib import admin
-from .models import Category, Blog, Product
+from django.contrib import admin, messages
+from .exports import export_actions
+from .models import Category, Blog, Product, AuthToken
 
 # Register your models here.
-admin.site.register((Category, Blog, Product))
+admin.site.register(Category)
+
+
+@admin.register(Blog, Product)
+class ExportableAdmin(admin.ModelAdmin):
+    actions = export_actions
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ["user", "name", "created_at", "expires_at", "revoked_at"]
+    readonly_fields = ["key_hash"]
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+        # Tokens added here get a key like AuthToken.issue(); it can only be
+        # shown now, since just its hash is stored.
+        key = obj.set_new_key()
+        super().save_model(request, obj, form, change)
+        self.message_user(
+            request,
+            f"The key for {obj} is {key}. Copy it now: it won't be shown again.",
+            messages.WARNING,
+        )
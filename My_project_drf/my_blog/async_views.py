@@ -0,0 +1,259 @@
+"""
+Native async variants of the read-only blog and product endpoints,
+mounted under /api/async/ next to the sync ones.
+
+Under ASGI, Django runs a sync view in a worker thread for the whole
+request. These views are coroutines instead: AsyncAPIView.dispatch()
+awaits authentication (``aauthenticate()``), permissions
+(``ahas_permission()``), pagination (``apaginate_queryset()``) and the
+handler, which reads through the async ORM (aget(), acount(),
+aiterator()) and the async cache API. Response caching, conditional
+requests and view counting work as on the sync views; those decorators
+switch to their async versions for coroutines.
+
+Authenticators and permissions without an async method are run with
+sync_to_async(), except DRF's own permissions, which only look at
+request.user. Throttles are checked as they are, so they must not query
+the database. Writes (POST, PUT, DELETE...) stay on the sync endpoints.
+
+Django's async ORM still runs every query through sync_to_async(), so
+this saves threads while waiting, not database work; bench_asgi compares
+the two under load.
+"""
+
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from rest_framework import exceptions, status
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import (
+    AllowAny,
+    BasePermission,
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import fastpath
+from .cache import cache_response
+from .conditional import condition_on
+from .models import Blog, Category, Product
+from .pagination import AsyncPageNumberPagination, alist
+from .serializers import BlogSerializer, ProductSerializer
+from .sparse import sparse_params
+from .view_counter import counts_views
+from .views import BLOG_LIST_PARAMS, BlogDetailView, BlogListView, ProductListCreateView
+
+# Permissions that only read request.user, called without leaving the loop.
+QUERY_FREE_PERMISSIONS = (
+    AllowAny,
+    IsAuthenticated,
+    IsAdminUser,
+    IsAuthenticatedOrReadOnly,
+)
+
+
+async def call_permission(permission, name, *args):
+    """Await ``permission.a<name>()``, or call ``<name>()`` as best fits."""
+    async_check = getattr(permission, f"a{name}", None)
+    if async_check is not None:
+        return await async_check(*args)
+    check = getattr(permission, name)
+    if isinstance(permission, QUERY_FREE_PERMISSIONS) or (
+        getattr(type(permission), name) is getattr(BasePermission, name)
+    ):
+        return check(*args)
+    return await sync_to_async(check)(*args)
+
+
+class AsyncAPIView(APIView):
+    """APIView for ``async def`` handlers."""
+
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            # APIView.options() is sync; it reads nothing from the database.
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """initial(), awaiting authentication and permissions."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """
+        Request._authenticate() with ``aauthenticate()``, so request.user
+        is set before anything reads it synchronously.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth = await authenticator.aauthenticate(request)
+                else:
+                    user_auth = await sync_to_async(authenticator.authenticate)(
+                        request
+                    )
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        for permission in self.get_permissions():
+            if not await call_permission(permission, "has_permission", request, self):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not await call_permission(
+                permission, "has_object_permission", request, self, obj
+            ):
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, "message", None),
+                    code=getattr(permission, "code", None),
+                )
+
+
+class AsyncGenericAPIView(AsyncAPIView, GenericAPIView):
+    async def aget_object(self):
+        """get_object() with aget()."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+        await self.acheck_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+
+class AsyncBlogListView(AsyncAPIView, BlogListView):
+    page_number_pagination_class = AsyncPageNumberPagination
+
+    @cache_response("blog-list", models=[Blog, Category], params=BLOG_LIST_PARAMS)
+    async def get(self, request):
+        sparse = sparse_params(request, BlogSerializer)
+        filterset = self.get_filterset(request, sparse)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=400)
+        queryset = filterset.qs
+        paginator = self.get_paginator(request)
+        plan = fastpath.plan_for(BlogSerializer, sparse)
+        if plan is not None:
+            rows = await paginator.apaginate_queryset(
+                plan.values(queryset, "date_created"), request
+            )
+            return paginator.get_paginated_response(await plan.aserialize(rows))
+        result_page = await paginator.apaginate_queryset(queryset, request)
+        serializer = BlogSerializer(result_page, many=True, context=sparse)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class AsyncBlogDetailView(AsyncAPIView, BlogDetailView):
+    async def aget_object(self, pk):
+        try:
+            return await BlogSerializer.setup_eager_loading(Blog.objects).aget(pk=pk)
+        except Blog.DoesNotExist:
+            return None
+
+    @counts_views()
+    @method_decorator(condition_on(Blog, "date_updated", counter="views"))
+    @cache_response("blog-detail", models=[Blog, Category], object_model=Blog)
+    async def get(self, request, pk):
+        item = await self.aget_object(pk)
+        if not item:
+            return Response(
+                {"error": "Blog not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = BlogSerializer(item)
+        return Response(serializer.data)
+
+
+class AsyncProductListView(AsyncGenericAPIView, ProductListCreateView):
+    async def get(self, request, *args, **kwargs):
+        self.sparse = sparse_params(request, ProductSerializer)
+        plan = fastpath.plan_for(ProductSerializer, self.sparse)
+        queryset = self.filter_queryset(self.get_queryset())
+        if plan is not None:
+            queryset = plan.values(queryset)
+        page = await self.apaginate_queryset(queryset)
+        rows = page if page is not None else await alist(queryset)
+        if plan is not None:
+            data = await plan.aserialize(rows, request)
+        else:
+            data = self.get_serializer(rows, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+@method_decorator(condition_on(Product, "updated_at"), name="get")
+class AsyncProductDetailView(AsyncGenericAPIView):
+    queryset = Product.objects.all()
+    serializer_class = ProductSerializer
+
+    def get_queryset(self):
+        return ProductSerializer.setup_eager_loading(super().get_queryset())
+
+    async def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(await self.aget_object())
+        return Response(serializer.data)
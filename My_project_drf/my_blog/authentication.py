@@ -1,29 +1,157 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from django.contrib.auth.models import User
+
+from .models import AuthToken
+
+
+class TTLLRUCache:
+    """
+    Thread-safe, size-bounded LRU mapping whose entries expire ``ttl``
+    seconds after they were stored.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_user(self, user_pk):
+        """Drop every entry whose value is a ``(user, ...)`` tuple for user_pk."""
+        with self._lock:
+            stale = [
+                key
+                for key, (_, value) in self._data.items()
+                if value[0].pk == user_pk
+            ]
+            for key in stale:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Keyed by the token hash; values are (user, expires_at). A revoked token
+# stays usable in a process for at most TOKEN_AUTH_CACHE_TTL seconds.
+token_cache = TTLLRUCache(
+    maxsize=getattr(settings, "TOKEN_AUTH_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "TOKEN_AUTH_CACHE_TTL", 60),
+)
 
 
 class CustomTokenAuthentication(BaseAuthentication):
     """
     Custom authentication using a token.
+
+    Clients send ``Authorization: Token <key>`` (the bare key is accepted
+    too). Keys are looked up by hash in AuthToken; hot tokens are served
+    from an in-process cache without touching the database.
     """
 
+    keyword = "Token"
+
     def authenticate(self, request):
+        key_hash = self.get_key_hash(request)
+        if key_hash is None:
+            return None
+        return (self.get_user(key_hash), None)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views (see async_views.py)."""
+        key_hash = self.get_key_hash(request)
+        if key_hash is None:
+            return None
+        cached = token_cache.get(key_hash)
+        if cached is None:
+            cached = await self.aload_token(key_hash)
+            token_cache.set(key_hash, cached)
+        return (self.check_cached(key_hash, cached), None)
+
+    def get_key_hash(self, request):
         token = request.headers.get("Authorization")
         if not token:
             return None
 
-        # Replace with your actual token validation logic
-        if token != "valid-token":
+        parts = token.split()
+        if len(parts) == 2 and parts[0].lower() == self.keyword.lower():
+            token = parts[1]
+        elif len(parts) != 1:
             raise AuthenticationFailed("Invalid or missing token.")
 
-        # Retrieve the user associated with the token
+        return AuthToken.hash_key(token)
+
+    def get_user(self, key_hash):
+        cached = token_cache.get(key_hash)
+        if cached is None:
+            cached = self.load_token(key_hash)
+            token_cache.set(key_hash, cached)
+        return self.check_cached(key_hash, cached)
+
+    def check_cached(self, key_hash, cached):
+        user, expires_at = cached
+        if expires_at is not None and expires_at <= timezone.now():
+            token_cache.discard(key_hash)
+            raise AuthenticationFailed("Token has expired.")
+        # Hand out a copy so a request can't mutate the cached instance.
+        return copy.copy(user)
+
+    def token_queryset(self, key_hash):
+        return AuthToken.objects.select_related("user").filter(
+            key_hash=key_hash, revoked_at__isnull=True
+        )
+
+    def load_token(self, key_hash):
+        try:
+            token = self.token_queryset(key_hash).get()
+        except AuthToken.DoesNotExist:
+            raise AuthenticationFailed("Invalid or missing token.")
+        return self.token_user(token)
+
+    async def aload_token(self, key_hash):
         try:
-            # Adjust this logic to retrieve a user based on your setup
-            user = User.objects.get(
-                username="SAM"
-            )  # Example: fixed user for "valid-token"
-        except User.DoesNotExist:
-            raise AuthenticationFailed("User not found.")
-
-        return (user, None)
+            token = await self.token_queryset(key_hash).aget()
+        except AuthToken.DoesNotExist:
+            raise AuthenticationFailed("Invalid or missing token.")
+        return self.token_user(token)
+
+    def token_user(self, token):
+        if not token.user.is_active:
+            raise AuthenticationFailed("User inactive or deleted.")
+        return (token.user, token.expires_at)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,153 @@
+"""
+Bulk product writes for ProductBulkView.
+
+Items without an ``id`` are created, items with one update that product.
+They are processed in chunks of CHUNK_SIZE:
+
+1. every item is validated by ProductBulkItemSerializer, which does no
+   queries; two serializer instances (full and partial) are reused for
+   the whole request, because building a ModelSerializer's fields costs
+   more than validating an item;
+2. the checks that need the database run once per chunk: which slugs are
+   taken, which categories and which ids exist;
+3. the valid items are written inside a transaction per chunk: new ones
+   with bulk_create, updates with a bulk_create upsert on the id.
+
+Invalid items, including NDJSON lines that don't parse, are skipped and
+reported by their index in the payload; the rest are still written.
+"""
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from . import search
+from .models import Category, Product
+from .parsers import InvalidLine
+from .serializers import ProductBulkItemSerializer
+
+CHUNK_SIZE = 1000
+
+
+def item_error(index, message):
+    return {"index": index, "errors": {"non_field_errors": [message]}}
+
+
+def chunked(items, size):
+    chunk = []
+    for index, item in enumerate(items):
+        chunk.append((index, item))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_save_products(items, chunk_size=CHUNK_SIZE):
+    """
+    Create or update products from an iterable of dicts. Returns
+    ``{"created": n, "updated": n, "errors": [{"index": i, "errors": ...}]}``.
+    """
+    result = {"created": 0, "updated": 0, "errors": []}
+    # Slugs used earlier in this payload, so duplicates across chunks are
+    # caught too.
+    claimed = set()
+    serializers = {
+        False: ProductBulkItemSerializer(),
+        True: ProductBulkItemSerializer(partial=True),
+    }
+    for chunk in chunked(items, chunk_size):
+        created, updated, errors = save_chunk(chunk, claimed, serializers)
+        result["created"] += created
+        result["updated"] += updated
+        result["errors"].extend(errors)
+    result["errors"].sort(key=lambda error: error["index"])
+    return result
+
+
+def save_chunk(chunk, claimed, serializers):
+    errors = []
+    valid = []
+    for index, item in chunk:
+        if isinstance(item, InvalidLine):
+            errors.append(item_error(index, item.message))
+            continue
+        if not isinstance(item, dict):
+            errors.append(item_error(index, "Expected an object."))
+            continue
+        try:
+            data = serializers["id" in item].run_validation(item)
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": as_serializer_error(exc)})
+        else:
+            valid.append((index, data))
+
+    slugs = {data["slug"] for _, data in valid if "slug" in data}
+    ids = {data["id"] for _, data in valid if "id" in data}
+    category_ids = {data["category"] for _, data in valid if "category" in data}
+    taken = dict(Product.objects.filter(slug__in=slugs).values_list("slug", "pk"))
+    existing = Product.objects.in_bulk(ids)
+    categories = set(
+        Category.objects.filter(pk__in=category_ids).values_list("pk", flat=True)
+    )
+
+    to_create, to_update = [], []
+    # Only the fields some item in the chunk actually sets are written.
+    update_fields = {"updated_at"}
+    for index, data in valid:
+        pk = data.pop("id", None)
+        item_errors = {}
+        if pk is not None and pk not in existing:
+            item_errors["id"] = [f"Product {pk} does not exist."]
+        slug = data.get("slug")
+        if slug is not None:
+            if taken.get(slug, pk) != pk or slug in claimed:
+                item_errors["slug"] = ["product with this slug already exists."]
+        if "category" in data and data["category"] not in categories:
+            item_errors["category"] = [
+                f'Invalid pk "{data["category"]}" - object does not exist.'
+            ]
+        if item_errors:
+            errors.append({"index": index, "errors": item_errors})
+            continue
+        if slug is not None:
+            claimed.add(slug)
+
+        if "category" in data:
+            data["category_id"] = data.pop("category")
+        if pk is None:
+            to_create.append((index, Product(**data)))
+        else:
+            product = existing[pk]
+            for field, value in data.items():
+                setattr(product, field, value)
+            update_fields.update(data)
+            to_update.append((index, product))
+
+    try:
+        with transaction.atomic():
+            Product.objects.bulk_create([product for _, product in to_create])
+            if to_update:
+                # An upsert on the primary key rather than bulk_update(): the
+                # CASE WHEN expressions bulk_update() builds per row and field
+                # cost ~10x more than the insert. The rows were just loaded,
+                # so every column is filled in, and auto_now still applies.
+                Product.objects.bulk_create(
+                    [product for _, product in to_update],
+                    update_conflicts=True,
+                    unique_fields=["id"],
+                    update_fields=sorted(update_fields),
+                )
+            if search.fts_available():
+                # Bulk writes send no post_save, so index the chunk here.
+                search.index_products(
+                    [product.pk for _, product in to_create + to_update]
+                )
+    except IntegrityError as exc:
+        # Lost a race with another writer; nothing in this chunk was saved.
+        for index, _ in to_create + to_update:
+            errors.append(item_error(index, f"Not saved, retry: {exc}"))
+        return 0, 0, errors
+
+    return len(to_create), len(to_update), errors
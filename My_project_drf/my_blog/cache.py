@@ -0,0 +1,182 @@
+"""
+Versioned response cache for the read-only blog endpoints.
+
+Every cache key embeds the current version counter of each model the
+response depends on. Writes bump the counters (see signals.py), which
+orphans every older entry at once without scanning or deleting keys;
+orphans simply age out. Works with any Django cache backend, including
+locmem and file-based ones.
+
+Note: QuerySet.update() and bulk_create() don't send signals, so code
+that uses them must call bump_version() itself.
+
+Detail responses can also depend on a per-object counter
+(``object_model``); invalidate_objects() orphans just those objects'
+entries, for changes too frequent to bump the whole model for.
+"""
+
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+CACHE_ALIAS = getattr(settings, "BLOG_CACHE_ALIAS", "default")
+CACHE_TIMEOUT = getattr(settings, "BLOG_CACHE_TIMEOUT", 300)
+KEY_PREFIX = "my_blog"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def version_key(model, pk=None):
+    key = f"{KEY_PREFIX}:version:{model._meta.label_lower}"
+    return key if pk is None else f"{key}:{pk}"
+
+
+def get_versions(*keys):
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A time-based start value means an evicted counter can never
+            # come back at a number that old entries were stored under.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(*keys):
+    """get_versions() through the cache's async API."""
+    cache = get_cache()
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*models):
+    cache = get_cache()
+    for model in models:
+        key = version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_objects(model, pks):
+    """Orphan the cached responses that depend on these objects only."""
+    # get_versions() restarts a missing counter from the clock.
+    get_cache().delete_many([version_key(model, pk) for pk in pks])
+
+
+def response_cache_key(name, request, params, version_keys, kwargs):
+    """
+    Build the key for a GET, or return None when the request carries
+    query parameters the view doesn't know about (they would leak into
+    the pagination links of the cached body).
+    """
+    if not known_params(request, params):
+        return None
+    return make_key(name, request, kwargs, get_versions(*version_keys))
+
+
+async def aresponse_cache_key(name, request, params, version_keys, kwargs):
+    if not known_params(request, params):
+        return None
+    return make_key(name, request, kwargs, await aget_versions(*version_keys))
+
+
+def known_params(request, params):
+    return all(param in params for param in request.query_params)
+
+
+def make_key(name, request, kwargs, versions):
+    query = urlencode(
+        sorted(
+            (param, value)
+            for param in request.query_params
+            for value in request.query_params.getlist(param)
+        )
+    )
+    raw = "|".join(
+        [
+            request.get_host(),
+            request.path,
+            query,
+            repr(sorted(kwargs.items())),
+            *map(str, versions),
+        ]
+    )
+    return f"{KEY_PREFIX}:response:{name}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def cache_response(name, models, params=(), object_model=None, lookup_url_kwarg="pk"):
+    """
+    Cache successful responses of an APIView ``get`` method.
+
+    ``models`` are the models whose writes invalidate the response and
+    ``params`` the query parameters that can change it. With
+    ``object_model``, invalidate_objects() for the looked-up pk does too.
+    ``get`` may be a coroutine; the cache is then used through its async
+    API.
+    """
+
+    def get_version_keys(kwargs):
+        keys = [version_key(model) for model in models]
+        if object_model is not None:
+            keys.append(version_key(object_model, kwargs[lookup_url_kwarg]))
+        return keys
+
+    def decorator(get):
+        if iscoroutinefunction(get):
+
+            @wraps(get)
+            async def async_wrapper(self, request, *args, **kwargs):
+                key = await aresponse_cache_key(
+                    name, request, params, get_version_keys(kwargs), kwargs
+                )
+                if key is None:
+                    return await get(self, request, *args, **kwargs)
+
+                cache = get_cache()
+                data = await cache.aget(key)
+                if data is not None:
+                    return Response(data)
+
+                response = await get(self, request, *args, **kwargs)
+                if response.status_code == 200:
+                    await cache.aset(key, response.data, CACHE_TIMEOUT)
+                return response
+
+            return async_wrapper
+
+        @wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            key = response_cache_key(
+                name, request, params, get_version_keys(kwargs), kwargs
+            )
+            if key is None:
+                return get(self, request, *args, **kwargs)
+
+            cache = get_cache()
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            response = get(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Conditional requests (ETag / Last-Modified) for detail endpoints.
+
+Both validators are derived from the model's auto_now column, read with
+one primary-key values_list() lookup. A 304 or 412 is therefore answered
+without building the instance or running the serializer. For async views
+that lookup is awaited before Django's condition() runs.
+
+A ``counter`` column (Blog.views) changes without moving the timestamp,
+so for reads its value is appended to the ETag and If-Modified-Since is
+not trusted. If-Match ignores it: a view is not an edit, so a write based
+on a representation with an older count doesn't conflict.
+"""
+
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.views.decorators.http import condition
+
+_MISSING = object()
+
+COUNT_SUFFIX_RE = re.compile(r'-\d+"')
+
+
+def make_etag(model, pk, updated, count=None):
+    raw = f"{model._meta.label_lower}:{pk}:{updated.isoformat()}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    if count is not None:
+        return f'"{digest}-{count}"'
+    return f'"{digest}"'
+
+
+def condition_on(model, field, lookup_url_kwarg="pk", counter=None):
+    """
+    Wrap a view so GET/HEAD honour If-None-Match / If-Modified-Since and
+    unsafe methods honour If-Match. Use it with method_decorator().
+
+    Successful writes get the new ETag back so the client can chain
+    further conditional updates.
+    """
+    columns = [field, counter] if counter else [field]
+    safe_methods = ("GET", "HEAD")
+
+    def row_query(kwargs):
+        return model.objects.filter(pk=kwargs[lookup_url_kwarg]).values_list(
+            *columns
+        )
+
+    def get_row(request, kwargs):
+        # etag_func and last_modified_func share one lookup per request
+        row = getattr(request, "_condition_row", _MISSING)
+        if row is _MISSING:
+            row = row_query(kwargs).first()
+            request._condition_row = row
+        return row
+
+    def get_updated(request, *args, **kwargs):
+        row = get_row(request, kwargs)
+        return row[0] if row else None
+
+    def etag_for(row, kwargs, with_count):
+        count = row[1] if counter and with_count else None
+        return make_etag(model, kwargs[lookup_url_kwarg], row[0], count)
+
+    def get_etag(request, *args, **kwargs):
+        row = get_row(request, kwargs)
+        if row is None:
+            return None
+        return etag_for(row, kwargs, request.method in safe_methods)
+
+    def prepare(request):
+        if not counter:
+            return
+        if request.method in safe_methods:
+            request.META.pop("HTTP_IF_MODIFIED_SINCE", None)
+        elif "HTTP_IF_MATCH" in request.META:
+            request.META["HTTP_IF_MATCH"] = COUNT_SUFFIX_RE.sub(
+                '"', request.META["HTTP_IF_MATCH"]
+            )
+
+    def add_etag(request, response, kwargs):
+        # The new ETag in the form a GET returns it.
+        row = request._condition_row
+        if row is not None:
+            response.headers.setdefault("ETag", etag_for(row, kwargs, True))
+
+    def decorator(func):
+        conditional = condition(etag_func=get_etag, last_modified_func=get_updated)(
+            func
+        )
+
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_inner(request, *args, **kwargs):
+                prepare(request)
+                request._condition_row = await row_query(kwargs).afirst()
+                response = await conditional(request, *args, **kwargs)
+                if request.method not in safe_methods and response.status_code < 300:
+                    request._condition_row = await row_query(kwargs).afirst()
+                    add_etag(request, response, kwargs)
+                return response
+
+            return async_inner
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            prepare(request)
+            response = conditional(request, *args, **kwargs)
+            if request.method not in safe_methods and response.status_code < 300:
+                request._condition_row = row_query(kwargs).first()
+                add_etag(request, response, kwargs)
+            return response
+
+        return inner
+
+    return decorator
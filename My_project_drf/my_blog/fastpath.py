@@ -0,0 +1,220 @@
+"""
+Read-only fast path for list endpoints, switched on by API_FAST_LISTS.
+
+ModelSerializer(many=True) builds a model instance per row, then runs
+get_attribute() and to_representation() of every field on it. For plain
+columns most of that is overhead, so the list views can instead read
+values() dicts and map each column through a converter picked once per
+serializer and field set:
+
+* str, int and bool columns are copied as they are;
+* foreign keys come out of values() as the id, which is what
+  PrimaryKeyRelatedField renders;
+* ISO 8601 datetimes are converted to the current timezone, which is
+  looked up once per response rather than once per value;
+* everything else (Decimal, choices) goes through the serializer
+  field's own to_representation(), and files through their storage's
+  url(), so the JSON is byte-for-byte what the serializer gives
+  (tests.FastListParityTests checks this);
+* many-to-many ids are loaded for the whole page in one query shaped
+  like the prefetch the serializer path uses, so they come back in the
+  same order.
+
+Serializers with fields this can't map (nested or method fields,
+non-pk relations) get no plan, and the view falls back to them, as it
+does for ?expand=.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() returns these database values as-is.
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+
+def fast_lists_enabled():
+    return getattr(settings, "API_FAST_LISTS", False)
+
+
+def plan_for(serializer_class, sparse):
+    """The Plan for a list request, or None to use the serializer."""
+    if not fast_lists_enabled() or sparse.get("expand"):
+        return None
+    fields = sparse.get("fields")
+    # The serializer keeps its declared field order whatever the order
+    # of ?fields=, so "name,id" and "id,name,id" share a plan.
+    key = tuple(sorted(set(fields))) if fields else None
+    return compile_plan(serializer_class, key)
+
+
+# ?fields= is client input; bound the cache so varied values can't grow it.
+@lru_cache(maxsize=256)
+def compile_plan(serializer_class, fields=None):
+    serializer = serializer_class(context={"fields": fields and list(fields)})
+    opts = serializer_class.Meta.model._meta
+    columns = [opts.pk.attname]
+    plan_fields = []
+    files = []
+    many_to_many = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            return None
+        column = field.source.replace(".", "__")
+        convert = None
+        if isinstance(field, ManyRelatedField):
+            if not isinstance(field.child_relation, PrimaryKeyRelatedField):
+                return None
+            many_to_many.append((name, opts.get_field(field.source)))
+            plan_fields.append((name, None, None))
+            continue
+        elif isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                return None
+        elif isinstance(
+            field,
+            (
+                serializers.RelatedField,
+                serializers.BaseSerializer,
+                serializers.SerializerMethodField,
+            ),
+        ):
+            return None
+        elif isinstance(field, serializers.DateTimeField):
+            convert = iso_datetime(field)
+        elif isinstance(field, serializers.FileField):
+            if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+                return None
+            files.append(name)
+            convert = file_url(opts.get_field(column).storage)
+        elif not isinstance(field, IDENTITY_FIELDS):
+            convert = field.to_representation
+        columns.append(column)
+        plan_fields.append((name, column, convert))
+    return Plan(opts.pk.attname, columns, plan_fields, files, many_to_many)
+
+
+def iso_datetime(field):
+    """
+    DateTimeField.to_representation() minus the per-value timezone
+    lookup, when the output would be ISO 8601 in the current timezone.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if (
+        not settings.USE_TZ
+        or hasattr(field, "timezone")
+        or output_format is None
+        or output_format.lower() != ISO_8601
+    ):
+        return field.to_representation
+    return IsoDateTime(field)
+
+
+class IsoDateTime:
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self):
+        """The converter for one response."""
+        current = timezone.get_current_timezone()
+        fallback = self.field.to_representation
+
+        def convert(value):
+            if value.tzinfo is None:
+                return fallback(value)
+            text = value.astimezone(current).isoformat()
+            return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+        return convert
+
+
+def file_url(storage):
+    def convert(name):
+        # FileField renders an empty file as None, like a missing one.
+        return storage.url(name) if name else None
+
+    return convert
+
+
+def bind(convert):
+    return convert.bind() if isinstance(convert, IsoDateTime) else convert
+
+
+class Plan:
+    def __init__(self, pk, columns, fields, files, many_to_many):
+        self.pk = pk
+        self.columns = columns
+        self.fields = fields
+        self.files = files
+        self.many_to_many = many_to_many
+
+    def values(self, queryset, *extra):
+        """``queryset`` as dicts of the columns this plan reads."""
+        columns = dict.fromkeys([*self.columns, *extra])
+        return queryset.prefetch_related(None).values(*columns)
+
+    def serialize(self, rows, request=None):
+        """Turn values() dicts into the dicts the serializer would return."""
+        rows = list(rows)
+        data = self.convert(rows, request)
+        for name, pks, related in self.many_to_many_queries(rows):
+            fill_many_to_many(data, name, pks, related)
+        return data
+
+    async def aserialize(self, rows, request=None):
+        """serialize() for async views; ``rows`` must be a list."""
+        data = self.convert(rows, request)
+        for name, pks, related in self.many_to_many_queries(rows):
+            fill_many_to_many(data, name, pks, [pair async for pair in related])
+        return data
+
+    def convert(self, rows, request):
+        fields = [
+            (name, column, bind(convert)) for name, column, convert in self.fields
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in fields:
+                if column is None:
+                    item[name] = []  # many-to-many, filled in later
+                    continue
+                value = row[column]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        if request is not None:
+            for item in data:
+                for name in self.files:
+                    if item[name] is not None:
+                        item[name] = request.build_absolute_uri(item[name])
+        return data
+
+    def many_to_many_queries(self, rows):
+        """``(name, pks, (owner pk, related pk) queryset)`` per relation."""
+        if not rows:
+            return
+        pks = [row[self.pk] for row in rows]
+        for name, model_field in self.many_to_many:
+            lookup = model_field.related_query_name()
+            related = model_field.related_model.objects.filter(
+                **{f"{lookup}__in": pks}
+            ).values_list(lookup, "pk")
+            yield name, pks, related
+
+
+def fill_many_to_many(data, name, pks, related):
+    by_owner = {pk: item[name] for pk, item in zip(pks, data)}
+    for owner, pk in related:
+        by_owner[owner].append(pk)
@@ -0,0 +1,100 @@
+"""
+Minimal HTTP/1.1 load generator for bench_asgi.
+
+Runs as its own process (``python -m ...``) so the client doesn't share
+the server's interpreter: ``concurrency`` keep-alive connections each
+send GET requests back to back for ``duration`` seconds. Prints a JSON
+summary. Standard library only.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = None
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value:
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status
+
+
+async def worker(host, port, paths, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    requests = [
+        f"GET {path} HTTP/1.1\r\nHost: testserver\r\n\r\n".encode() for path in paths
+    ]
+    n = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[n % len(requests)])
+            n += 1
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(host, port, paths, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[
+            worker(host, port, paths, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ],
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    failures = [repr(result) for result in results if isinstance(result, Exception)]
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+        "errors": len(errors) + len(failures),
+        "failures": failures[:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+    summary = asyncio.run(
+        run(args.host, args.port, args.paths, args.concurrency, args.duration)
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.request import Request, urlopen
+
+import uvicorn
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from my_blog.models import Blog, Category, Product
+from my_blog.view_counter import view_counter
+
+from ._bench import scratch_database
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests/s and latency of the sync and /api/async/ views under "
+        "uvicorn, against a scratch SQLite file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument("--blogs", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 64])
+        parser.add_argument("--duration", type=float, default=5)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            with scratch_database(test_name=os.path.join(tmp, "bench.sqlite3")):
+                try:
+                    with override_settings(DEBUG=False):
+                        self.run(**options)
+                finally:
+                    # Pending counts belong to the scratch database.
+                    view_counter.discard()
+
+    def seed(self, products, blogs):
+        author = User.objects.create_user("author")
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(10)]
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                description="A product description. " * 5,
+                price="19.99",
+                stock=i,
+                category=categories[i % 10],
+            )
+            for i in range(products)
+        )
+        created = Blog.objects.bulk_create(
+            Blog(title=f"Blog {i}", slug=f"blog-{i}", content="x" * 500, author=author)
+            for i in range(blogs)
+        )
+        Blog.categories.through.objects.bulk_create(
+            Blog.categories.through(blog_id=blog.pk, category_id=category.pk)
+            for blog in created
+            for category in categories[:3]
+        )
+        return Product.objects.first().pk, Blog.objects.first().pk
+
+    def run(self, products, blogs, concurrency, duration, **options):
+        product_pk, blog_pk = self.seed(products, blogs)
+        endpoints = [
+            ("product list", "/products/"),
+            ("product detail", f"/products/{product_pk}/"),
+            ("blog cursor page", "/blogs/?pagination=cursor&page_size=20"),
+            ("blog detail", f"/blogs/{blog_pk}/"),
+        ]
+
+        self.stdout.write(
+            f"uvicorn, {products} products, {blogs} blogs, {duration:g}s per run"
+        )
+        # IsAdminOrReadOnly print()s on every blog request.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            with self.serve() as port:
+                for label, path in endpoints:
+                    for clients in concurrency:
+                        for prefix in ["/api", "/api/async"]:
+                            self.report(label, clients, prefix, path, port, duration)
+
+    def report(self, label, clients, prefix, path, port, duration):
+        url = prefix + path
+        self.warm_up(port, url)
+        result = self.load(port, url, clients, duration)
+        mode = "async" if prefix.endswith("async") else "sync"
+        self.stdout.write(
+            f"{label:>16} c={clients:<3} {mode:>5}: "
+            f"{result['rps']:7.1f} req/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  "
+            f"p99 {result['p99_ms']:7.1f} ms  "
+            f"errors {result['errors']}"
+        )
+        for failure in result["failures"]:
+            self.stderr.write(f"  {failure}")
+
+    @contextlib.contextmanager
+    def serve(self):
+        """Run uvicorn in a thread of this process, so it uses the scratch DB."""
+        port = free_port()
+        server = uvicorn.Server(
+            uvicorn.Config(
+                get_asgi_application(),
+                host="127.0.0.1",
+                port=port,
+                lifespan="off",
+                log_level="warning",
+                access_log=False,
+            )
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise CommandError("uvicorn did not start")
+            time.sleep(0.05)
+        try:
+            yield port
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    def warm_up(self, port, url):
+        request = Request(
+            f"http://127.0.0.1:{port}{url}", headers={"Host": "testserver"}
+        )
+        with urlopen(request) as response:
+            if response.status != 200:
+                raise CommandError(f"GET {url} returned {response.status}")
+
+    def load(self, port, url, clients, duration):
+        # A separate process, so the client doesn't compete for the GIL.
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "my_blog.management.commands._load",
+                f"--port={port}",
+                f"--concurrency={clients}",
+                f"--duration={duration}",
+                url,
+            ],
+            cwd=settings.BASE_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return json.loads(output)
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from my_blog.models import Blog
+from my_blog.pagination import BlogCursorPagination
+
+from ._bench import scratch_database, timeit
+
+
+class Command(BaseCommand):
+    help = "Compare page 1 with a deep page for offset vs cursor pagination."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000)
+        parser.add_argument("--page", type=int, default=10_000)
+        parser.add_argument("--page-size", type=int, default=2)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def run(self, rows, page, page_size, repeat, **options):
+        Blog.objects.bulk_create(
+            (
+                Blog(title=f"Blog {i}", slug=f"blog-{i}", content="x" * 200)
+                for i in range(rows)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {rows} blogs")
+        client = APIClient()
+
+        def offset_page(number):
+            return lambda: client.get("/api/blogs/", {"page": number})
+
+        # The cursor for page N is the key of the last row on page N - 1.
+        ordered = Blog.objects.order_by("-date_created", "-id")
+        last = ordered.values_list("date_created", "id")[(page - 1) * page_size - 1]
+        token = BlogCursorPagination.make_token(last)
+
+        def cursor_page(cursor=None):
+            params = {"pagination": "cursor", "page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            return lambda: client.get("/api/blogs/", params)
+
+        for label, func in [
+            ("offset page 1", offset_page(1)),
+            (f"offset page {page}", offset_page(page)),
+            ("cursor page 1", cursor_page()),
+            (f"cursor page {page}", cursor_page(token)),
+        ]:
+            self.stdout.write(f"{label:>24}: {timeit(func, repeat):8.2f} ms")
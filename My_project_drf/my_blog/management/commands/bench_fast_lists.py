@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from my_blog.cache import get_cache
+from my_blog.fastpath import compile_plan
+from my_blog.models import Blog, Category, Product
+from my_blog.serializers import BlogSerializer, ProductSerializer
+
+from ._bench import scratch_database, timeit
+
+
+class Command(BaseCommand):
+    help = "Rows/s of the list endpoints with and without API_FAST_LISTS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def seed(self, products, blogs):
+        author = User.objects.create_user("author")
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(10)]
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                description="A product description. " * 5,
+                price="19.99",
+                stock=i,
+                category=categories[i % 10],
+            )
+            for i in range(products)
+        )
+        created = Blog.objects.bulk_create(
+            Blog(title=f"Blog {i}", slug=f"blog-{i}", content="x" * 500, author=author)
+            for i in range(blogs)
+        )
+        Blog.categories.through.objects.bulk_create(
+            Blog.categories.through(blog_id=blog.pk, category_id=category.pk)
+            for blog in created
+            for category in categories[:3]
+        )
+
+    def run(self, products, page_size, repeat, **options):
+        self.seed(products, page_size)
+        client = APIClient()
+        blog_params = {"pagination": "cursor", "page_size": page_size}
+
+        for label, path, params, rows in [
+            ("products", "/api/products/", {}, products),
+            ("blogs", "/api/blogs/", blog_params, page_size),
+        ]:
+            for fast in [False, True]:
+
+                def get():
+                    get_cache().clear()
+                    client.get(path, params)
+
+                with override_settings(API_FAST_LISTS=fast):
+                    ms = timeit(get, repeat)
+                mode = "values() fast path" if fast else "serializer"
+                self.stdout.write(
+                    f"GET {label:>8} {mode:>18}: {ms:8.2f} ms "
+                    f"({rows / ms * 1000:9.0f} rows/s)"
+                )
+
+        # Serialization alone, rows already fetched.
+        for label, serializer, queryset in [
+            ("products", ProductSerializer, Product.objects.all()),
+            ("blogs", BlogSerializer, Blog.objects.all()[:page_size]),
+        ]:
+            instances = list(serializer.setup_eager_loading(queryset))
+            plan = compile_plan(serializer)
+            values = list(plan.values(queryset))
+            for mode, func in [
+                ("serializer", lambda: serializer(instances, many=True).data),
+                ("values() fast path", lambda: plan.serialize(values)),
+            ]:
+                ms = timeit(func, repeat)
+                self.stdout.write(
+                    f"serialize {label:>8} {mode:>18}: {ms:8.2f} ms "
+                    f"({len(values) / ms * 1000:9.0f} rows/s)"
+                )
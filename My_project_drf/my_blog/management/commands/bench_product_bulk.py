@@ -0,0 +1,86 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from my_blog.models import Category, Product
+from my_blog.views import ProductBulkView, ProductListCreateView
+
+from ._bench import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Time loading products one POST at a time against a single bulk "
+        "request to /api/products/bulk/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000)
+        parser.add_argument(
+            "--single-rows",
+            type=int,
+            default=2_000,
+            help="Products to POST one at a time for the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def items(self, prefix, count, **fields):
+        return [
+            {
+                "name": f"Product {i}",
+                "slug": f"{prefix}-{i}",
+                "description": "A sturdy product with a long description " * 4,
+                "price": "9.99",
+                "stock": i % 100,
+                "category": self.category.pk,
+                **fields,
+            }
+            for i in range(count)
+        ]
+
+    def run(self, rows, single_rows, **options):
+        self.category = Category.objects.create(name="Bench")
+        admin = User.objects.create_user("bench", is_staff=True)
+        factory = APIRequestFactory()
+
+        single = ProductListCreateView.as_view()
+        started = time.perf_counter()
+        for item in self.items("single", single_rows):
+            request = factory.post("/api/products/", item, format="json")
+            force_authenticate(request, admin)
+            single(request)
+        elapsed = time.perf_counter() - started
+        self.report("one POST per product", single_rows, elapsed)
+
+        bulk = ProductBulkView.as_view()
+        for label in ["bulk create", "bulk update"]:
+            if label == "bulk create":
+                payload = self.items("bulk", rows)
+            else:
+                pks = Product.objects.filter(slug__startswith="bulk-")
+                pks = pks.values_list("pk", flat=True)
+                payload = [{"id": pk, "stock": 0} for pk in pks]
+            # NDJSON is streamed; a JSON array this size would be refused by
+            # DATA_UPLOAD_MAX_MEMORY_SIZE.
+            body = "".join(json.dumps(item) + "\n" for item in payload)
+            request = factory.post(
+                "/api/products/bulk/", body, content_type="application/x-ndjson"
+            )
+            force_authenticate(request, admin)
+            started = time.perf_counter()
+            response = bulk(request)
+            elapsed = time.perf_counter() - started
+            assert not response.data.get("errors"), str(response.data)[:500]
+            self.report(label, len(payload), elapsed)
+
+    def report(self, label, count, elapsed):
+        self.stdout.write(
+            f"{label:>22}: {count:>7} products in {elapsed:7.2f} s "
+            f"({count / elapsed:9.0f} products/s)"
+        )
@@ -0,0 +1,116 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from my_blog import purge
+from my_blog.models import Category, Product, ProductDeleteJob
+from my_blog.search import rebuild_product_index
+
+from ._bench import scratch_database
+
+
+class Reader(threading.Thread):
+    """Reads a page of products in a loop and records each read's latency."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                started = time.perf_counter()
+                try:
+                    list(Product.objects.values_list("pk", "name")[:20])
+                except OperationalError:  # "database is locked"
+                    self.errors += 1
+                self.latencies.append((time.perf_counter() - started) * 1000)
+                time.sleep(0.005)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        latencies = sorted(self.latencies) or [0]
+        return (
+            f"reads {len(latencies)}, p50 {statistics.median(latencies):.1f} ms, "
+            f"max {latencies[-1]:.1f} ms, errors {self.errors}"
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Product.objects.all().delete() with the batched delete job, "
+        "with a concurrent reader measuring read latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument(
+            "--single-rows",
+            type=int,
+            default=200_000,
+            help="Rows for the single delete() (it loads every row).",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        # On disk, so the reader thread sees the same database.
+        with tempfile.TemporaryDirectory() as tmp:
+            with scratch_database(test_name=os.path.join(tmp, "bench.sqlite3")):
+                self.run(**options)
+
+    def seed(self, rows):
+        category, _ = Category.objects.get_or_create(name="Bench")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO my_blog_product (name, slug, description, price, "
+                "stock, available, category_id, created_at, updated_at) "
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n "
+                "WHERE i < %s) "
+                "SELECT 'Product ' || i, 'product-' || i, 'A sturdy product', "
+                "'9.99', 1, 1, %s, datetime('now'), datetime('now') FROM n",
+                [rows, category.pk],
+            )
+        rebuild_product_index()
+        # Start every run from a committed, checkpointed file.
+        connection.close()
+
+    def run(self, rows, single_rows, batch_size, **options):
+        self.seed(single_rows)
+        reader = Reader()
+        reader.start()
+        time.sleep(0.2)
+        started = time.perf_counter()
+        Product.objects.all().delete()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"delete() of {single_rows} rows: {elapsed:.2f} s in one transaction; "
+            f"{reader.stop()}"
+        )
+
+        self.seed(rows)
+        reader = Reader()
+        reader.start()
+        time.sleep(0.2)
+        started = time.perf_counter()
+        with override_settings(
+            PRODUCT_DELETE_IN_BACKGROUND=False, PRODUCT_DELETE_BATCH_SIZE=batch_size
+        ):
+            job = purge.start()
+        elapsed = time.perf_counter() - started
+        assert job.status == ProductDeleteJob.DONE, job.status
+        self.stdout.write(
+            f"delete job of {rows} rows: {elapsed:.2f} s in {job.batches} batches "
+            f"of {batch_size}, longest lock {job.max_batch_ms:.1f} ms; "
+            f"{reader.stop()}"
+        )
@@ -0,0 +1,86 @@
+import random
+
+from django.core.management.base import BaseCommand
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from my_blog.models import Category, Product
+from my_blog.search import FullTextSearchFilter, rebuild_product_index
+from my_blog.views import ProductListCreateView
+
+from ._bench import scratch_database, timeit
+
+WORDS = (
+    "red blue green black white running trail road leather canvas wool "
+    "cotton shoe boot sneaker jacket shirt lamp table chair desk book "
+    "novel guide light heavy sturdy soft classic modern vintage premium"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Compare SearchFilter (LIKE scans) with the FTS5 product search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def seed(self, rows):
+        rng = random.Random(42)
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(50)]
+        batch = []
+        for i in range(rows):
+            name = rng.choices(WORDS, k=3)
+            if i % 10_000 == 0:
+                name.append("zephyr")  # a selective term: 1 row in 10,000
+            batch.append(
+                Product(
+                    name=" ".join(name),
+                    slug=f"product-{i}",
+                    description=" ".join(rng.choices(WORDS, k=30)),
+                    price="9.99",
+                    stock=1,
+                    category=categories[i % len(categories)],
+                )
+            )
+            if len(batch) == 10_000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        rebuild_product_index()
+
+    def run(self, rows, repeat, limit, **options):
+        self.seed(rows)
+        self.stdout.write(f"Seeded {rows} products")
+        view = ProductListCreateView()
+        view.search_fields = ProductListCreateView.search_fields
+        factory = APIRequestFactory()
+
+        for term in ["zephyr", "zephyr boot", "leather", "vintage boot", "snea*"]:
+            request = Request(factory.get("/api/products/", {"search": term}))
+            for backend in [SearchFilter(), FullTextSearchFilter()]:
+                if term.endswith("*") and isinstance(backend, SearchFilter):
+                    continue
+
+                def first_page():
+                    queryset = backend.filter_queryset(
+                        request, Product.objects.all(), view
+                    )
+                    return list(queryset[:limit])
+
+                def count():
+                    return backend.filter_queryset(
+                        request, Product.objects.all(), view
+                    ).count()
+
+                name = type(backend).__name__
+                self.stdout.write(
+                    f"{term!r:>16} {name:>22}: "
+                    f"first {limit} {timeit(first_page, repeat):9.2f} ms, "
+                    f"count {timeit(count, repeat):9.2f} ms"
+                )
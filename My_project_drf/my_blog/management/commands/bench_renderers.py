@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from my_blog.cache import get_cache
+from my_blog.models import Category, Product
+from my_blog.renderers import MessagePackRenderer, ORJSONRenderer
+from my_blog.serializers import ProductSerializer
+
+from ._bench import scratch_database, timeit
+
+
+class Command(BaseCommand):
+    help = "Render time of product pages with the stdlib, orjson and msgpack."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def seed(self, products):
+        category = Category.objects.create(name="Category")
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                description="A product description. " * 5,
+                price=f"{i}.99",
+                stock=i,
+                category=category,
+            )
+            for i in range(products)
+        )
+
+    def run(self, page_size, repeat, **options):
+        self.seed(page_size)
+        data = ProductSerializer(Product.objects.all(), many=True).data
+        # The same page as plain Python values, the way a view could hand
+        # over model data without the serializer's string conversions.
+        raw = list(Product.objects.values())
+
+        for label, page in [("serializer data", data), ("raw values()", raw)]:
+            baseline = None
+            for renderer in [JSONRenderer(), ORJSONRenderer(), MessagePackRenderer()]:
+                ms = timeit(lambda: renderer.render(page), repeat)
+                baseline = baseline or ms
+                self.stdout.write(
+                    f"render {label:>15} {type(renderer).__name__:>19}: "
+                    f"{ms:7.3f} ms  {len(renderer.render(page)):6d} bytes  "
+                    f"x{baseline / ms:4.1f}"
+                )
+
+        client = APIClient()
+        for accept in ["application/json", "application/msgpack"]:
+
+            def get():
+                get_cache().clear()
+                client.get("/api/products/", HTTP_ACCEPT=accept)
+
+            ms = timeit(get, repeat // 10)
+            self.stdout.write(f"GET /api/products/ {accept:>19}: {ms:7.2f} ms")
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from my_blog.cache import get_cache
+from my_blog.models import Blog, Category, Product
+
+from ._bench import scratch_database, timeit
+
+TEXT = "A long description that mobile clients never show. " * 40
+
+
+class Command(BaseCommand):
+    help = "Payload size and latency of list endpoints with ?fields= / ?expand=."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(**options)
+
+    def seed(self, products):
+        author = User.objects.create_user("author")
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(10)]
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                description=TEXT,
+                price="19.99",
+                stock=i,
+                category=categories[i % 10],
+            )
+            for i in range(products)
+        )
+        blogs = Blog.objects.bulk_create(
+            Blog(title=f"Blog {i}", slug=f"blog-{i}", content=TEXT * 3, author=author)
+            for i in range(100)
+        )
+        Blog.categories.through.objects.bulk_create(
+            Blog.categories.through(blog_id=blog.pk, category_id=category.pk)
+            for blog in blogs
+            for category in categories[:3]
+        )
+
+    def run(self, products, repeat, **options):
+        self.seed(products)
+        client = APIClient()
+        cases = [
+            (f"{products} products", "/api/products/", {}),
+            ("", "/api/products/", {"fields": "id,name,price"}),
+            ("", "/api/products/", {"fields": "id,name", "expand": "category"}),
+            ("100 blogs", "/api/blogs/", {}),
+            ("", "/api/blogs/", {"fields": "id,title,date_created"}),
+            ("", "/api/blogs/", {"fields": "id,title", "expand": "author,categories"}),
+        ]
+        for label, path, params in cases:
+            if path == "/api/blogs/":
+                params = {"pagination": "cursor", "page_size": 100, **params}
+
+            def get():
+                # Time the query and serialization, not the response cache.
+                get_cache().clear()
+                response = client.get(path, params)
+                assert response.status_code == 200, response.content[:200]
+                return response
+
+            size = len(get().content)
+            shown = "&".join(
+                f"{k}={v}" for k, v in params.items() if k in ("fields", "expand")
+            )
+            self.stdout.write(
+                f"{label:>16} {shown or '(all fields)':<40} "
+                f"{size / 1024:9.1f} KiB {timeit(get, repeat):8.2f} ms"
+            )
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from my_blog import stock
+from my_blog.models import Category, Product
+
+from ._bench import scratch_database
+
+
+def read_modify_write(slug):
+    """What a client doing GET then PUT amounts to."""
+    product = Product.objects.get(slug=slug)
+    if product.stock < 1:
+        raise stock.InsufficientStock([])
+    product.stock -= 1
+    product.save(update_fields=["stock", "updated_at"])
+
+
+def conditional_update(slug):
+    stock.reserve([(slug, 1)])
+
+
+class Command(BaseCommand):
+    help = (
+        "Many threads reserving one unit at a time of one hot product: "
+        "read-modify-write against the conditional UPDATE in stock.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--stock", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        # On disk, so every thread opens the same database.
+        with tempfile.TemporaryDirectory() as tmp:
+            with scratch_database(test_name=os.path.join(tmp, "bench.sqlite3")):
+                self.run(**options)
+
+    def run(self, threads, stock, **options):
+        category = Category.objects.create(name="Bench")
+        product = Product.objects.create(
+            name="Hot",
+            slug="hot",
+            description="",
+            price="1.00",
+            stock=stock,
+            category=category,
+        )
+        connection.close()
+        for reserve in [read_modify_write, conditional_update]:
+            Product.objects.filter(pk=product.pk).update(stock=stock, available=True)
+            sold, errors, elapsed = self.hammer(reserve, threads)
+            left = Product.objects.get(pk=product.pk).stock
+            oversold = sold - (stock - left)
+            self.stdout.write(
+                f"{reserve.__name__:>20}: {sold} reservations in {elapsed:.2f} s "
+                f"({sold / elapsed:.0f}/s), stock left {left}, "
+                f"oversold {oversold}, lock errors {errors}"
+            )
+
+    def hammer(self, reserve, threads):
+        sold = []
+        errors = []
+        start = threading.Barrier(threads + 1)
+
+        def buyer():
+            mine = failed = 0
+            start.wait()
+            try:
+                while True:
+                    try:
+                        reserve("hot")
+                    except stock.InsufficientStock:
+                        break
+                    except OperationalError:  # "database is locked"
+                        failed += 1
+                    else:
+                        mine += 1
+            finally:
+                connection.close()
+                sold.append(mine)
+                errors.append(failed)
+
+        workers = [threading.Thread(target=buyer) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        return sum(sold), sum(errors), time.perf_counter() - started
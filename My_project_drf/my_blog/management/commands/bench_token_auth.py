@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from my_blog.authentication import CustomTokenAuthentication, token_cache
+from my_blog.models import AuthToken
+
+from ._bench import scratch_database, timeit
+
+
+class Command(BaseCommand):
+    help = "Measure token authentication cost per request, cached vs uncached."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(options["requests"])
+
+    def run(self, requests):
+        user = User.objects.create_user(username="bench", password="x")
+        _, key = AuthToken.issue(user)
+        request = Request(
+            APIRequestFactory().get("/api/user/", HTTP_AUTHORIZATION=f"Token {key}")
+        )
+        auth = CustomTokenAuthentication()
+
+        def uncached():
+            for _ in range(requests):
+                token_cache.clear()
+                auth.authenticate(request)
+
+        def cached():
+            for _ in range(requests):
+                auth.authenticate(request)
+
+        for label, func in [("uncached", uncached), ("cached", cached)]:
+            token_cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            per_request = timeit(func, repeat=5) * 1000 / requests
+            self.stdout.write(
+                f"{label:>9}: {per_request:8.1f} us/request, "
+                f"{len(queries) / requests:.2f} queries/request"
+            )
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from my_blog.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = "Issue an API token for a user, or revoke all of their tokens."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--name", default="")
+        parser.add_argument("--days", type=int, help="Expire after this many days.")
+        parser.add_argument("--revoke", action="store_true")
+
+    def handle(self, username, name, days, revoke, **options):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f"User {username!r} does not exist.")
+
+        if revoke:
+            count = AuthToken.revoke_for_user(user)
+            self.stdout.write(f"Revoked {count} token(s) for {username}.")
+            return
+
+        lifetime = timedelta(days=days) if days else None
+        token, key = AuthToken.issue(user, name=name, lifetime=lifetime)
+        self.stdout.write(key)
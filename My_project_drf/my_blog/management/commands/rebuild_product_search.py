@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from my_blog import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text index, e.g. after bulk imports."
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError("Full-text search needs the SQLite backend.")
+        with transaction.atomic():
+            search.rebuild_product_index()
+        self.stdout.write("Product search index rebuilt.")
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_blog', '0002_product'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-date_created', '-id'], name='blog_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from my_blog.search, so
+# later changes to that module can't alter what this migration does.
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS my_blog_product_fts USING fts5("
+            "name, description, category_name, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        # Column weights for bm25(): name, description, category_name.
+        cursor.execute(
+            "INSERT INTO my_blog_product_fts(my_blog_product_fts, rank) "
+            "VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')"
+        )
+        cursor.execute(
+            "INSERT INTO my_blog_product_fts(rowid, name, description, category_name) "
+            "SELECT p.id, p.name, p.description, c.name "
+            "FROM my_blog_product p JOIN my_blog_category c ON c.id = p.category_id"
+        )
+        cursor.execute(
+            "INSERT INTO my_blog_product_fts(my_blog_product_fts) VALUES ('optimize')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS my_blog_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("my_blog", "0004_authtoken"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
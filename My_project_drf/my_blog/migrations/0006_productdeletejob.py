@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_blog', '0005_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDeleteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('cancelled', 'Cancelled'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('batch_size', models.PositiveIntegerField()),
+                ('total', models.PositiveBigIntegerField(default=0)),
+                ('deleted', models.PositiveBigIntegerField(default=0)),
+                ('max_pk', models.BigIntegerField(null=True)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('max_batch_ms', models.FloatField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_blog', '0006_productdeletejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productdeletejob',
+            name='heartbeat_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+def mark_sold_out(apps, schema_editor):
+    # Until now a release re-enabled every product at zero stock.
+    Product = apps.get_model("my_blog", "Product")
+    Product.objects.filter(stock=0, available=False).update(sold_out=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('my_blog', '0007_productdeletejob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sold_out',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_sold_out, migrations.RunPython.noop),
+    ]
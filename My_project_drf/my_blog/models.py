@@ -1,5 +1,9 @@
+import hashlib
+import secrets
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
 from django.urls import reverse
 
@@ -24,6 +28,10 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField()
     available = models.BooleanField(default=True)
+    # Set when a reservation took the last unit (see stock.py), so a
+    # release re-enables only products that sold out, not ones an admin
+    # switched off.
+    sold_out = models.BooleanField(default=False, editable=False)
     category = models.ForeignKey(
         Category, related_name="products", on_delete=models.CASCADE
     )
@@ -34,6 +42,49 @@ class Product(models.Model):
         return self.name
 
 
+class ProductDeleteJob(models.Model):
+    """
+    A delete of every product, run in primary-key batches by
+    my_blog.purge. Products created after the job starts are kept.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (CANCELLED, "Cancelled"),
+        (FAILED, "Failed"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    batch_size = models.PositiveIntegerField()
+    total = models.PositiveBigIntegerField(default=0)
+    deleted = models.PositiveBigIntegerField(default=0)
+    # Highest id to delete (fixed at start) and the last id deleted so far.
+    max_pk = models.BigIntegerField(null=True)
+    last_pk = models.BigIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    # How long the slowest batch held the write lock, in milliseconds.
+    max_batch_ms = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Moved forward by every batch; an active job whose heartbeat is older
+    # than PRODUCT_DELETE_STALE_AFTER is taken to have lost its process.
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+
+    def is_active(self):
+        return self.status in (self.PENDING, self.RUNNING)
+
+    def __str__(self):
+        return f"Product delete #{self.pk} ({self.status})"
+
+
 class Blog(models.Model):
     STATUS_CHOICES = [
         ("draft", "Draft"),
@@ -60,6 +111,14 @@ class Blog(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves the keyset walk in BlogCursorPagination.
+            models.Index(
+                fields=["-date_created", "-id"], name="blog_created_id_idx"
+            ),
+        ]
+
     def get_absolute_url(self):
         return reverse(
             "my_blog:blog_detail_view",
@@ -88,3 +147,56 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.user} on {self.blog}"
+
+
+class AuthToken(models.Model):
+    """
+    API token for CustomTokenAuthentication. Only the SHA-256 of the key is
+    stored; the raw key is shown once, when the token is issued.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="auth_tokens"
+    )
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    name = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def set_new_key(self):
+        """Give the token a fresh key and return it; only its hash is kept."""
+        key = secrets.token_urlsafe(32)
+        self.key_hash = self.hash_key(key)
+        return key
+
+    @classmethod
+    def issue(cls, user, name="", lifetime=None):
+        """Create a token and return ``(token, raw_key)``."""
+        expires_at = timezone.now() + lifetime if lifetime else None
+        token = cls(user=user, name=name, expires_at=expires_at)
+        key = token.set_new_key()
+        token.save()
+        return token, key
+
+    @classmethod
+    def revoke_for_user(cls, user):
+        """Revoke every live token of ``user``."""
+        from .authentication import token_cache
+
+        revoked = cls.objects.filter(user=user, revoked_at__isnull=True).update(
+            revoked_at=timezone.now()
+        )
+        # Other processes pick this up once their cached entry expires.
+        token_cache.discard_user(user.pk)
+        return revoked
+
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f"Token for {self.user} ({self.name or self.pk})"
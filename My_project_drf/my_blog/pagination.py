@@ -1,7 +1,206 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+async def alist(queryset):
+    """list(queryset) for async code, read with aiterator()."""
+    return [row async for row in queryset.aiterator()]
 
 
 class BlogPagination(PageNumberPagination):
     page_size = 5  # Items per page
     page_size_query_param = "page_size"  # Allow clients to override
     max_page_size = 100  # Maximum items per page
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination that async views can await (see async_views.py)."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached_property; fill it in so the Page
+        # doesn't run COUNT(*) synchronously.
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        self.page.object_list = await alist(self.page.object_list)
+        return list(self.page)
+
+
+class BlogCursorPagination(BasePagination):
+    """
+    Keyset pagination over (date_created, id).
+
+    Every page is a range scan that starts right after the last row the
+    client saw, so page 10,000 costs the same as page 1: no COUNT(*) and
+    no OFFSET. The cursor is an opaque base64 token.
+    """
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page(await alist(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """The rows of the requested page, plus one."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        self.position, self.reverse = position, reverse
+
+        if reverse:
+            queryset = queryset.order_by("date_created", "id")
+        else:
+            queryset = queryset.order_by("-date_created", "-id")
+
+        if position is not None:
+            created, pk = position
+            # "created <= x AND (created < x OR id < y)" keeps a plain range
+            # on the leading index column, so SQLite walks the composite
+            # index instead of evaluating an OR over the whole table.
+            if reverse:
+                queryset = queryset.filter(
+                    Q(date_created__gte=created),
+                    Q(date_created__gt=created) | Q(id__gt=pk),
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(date_created__lte=created),
+                    Q(date_created__lt=created) | Q(id__lt=pk),
+                )
+
+        # Fetch one extra row to know whether another page follows.
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = position is not None, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = (
+            self.get_position(results[-1]) if has_next and results else None
+        )
+        self.previous_position = (
+            self.get_position(results[0]) if has_previous and results else None
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, blog):
+        if isinstance(blog, dict):  # values() rows from fastpath.py
+            return (blog["date_created"], blog["id"])
+        return (blog.date_created, blog.pk)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        token = self.make_token(position, reverse)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    @staticmethod
+    def make_token(position, reverse=False):
+        created, pk = position
+        payload = json.dumps(
+            {"c": created.isoformat(), "i": pk, "r": int(reverse)},
+            separators=(",", ":"),
+        )
+        return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(urlsafe_b64decode(padded.encode()).decode())
+            created = parse_datetime(payload["c"])
+            pk = int(payload["i"])
+            reverse = bool(payload.get("r", 0))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+        # A pk the database can't store would fail as an OverflowError (500)
+        # when the query runs.
+        if created is None or not -(2**63) <= pk < 2**63:
+            raise NotFound(self.invalid_cursor_message)
+        return (created, pk), reverse
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,80 @@
+import json
+
+import msgpack
+import orjson
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import MessagePackRenderer, ORJSONRenderer
+
+
+class InvalidLine:
+    """Stands in for an NDJSON line that isn't valid JSON."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON: one object per line. Returns a generator, so
+    items are decoded as they are consumed instead of all up front.
+
+    A malformed line comes out as an InvalidLine rather than raising: by
+    the time it is read, earlier items may already have been saved, so it
+    is reported as that item's error instead of failing the request.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+
+        def items():
+            for number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line.decode(encoding))
+                except ValueError as exc:
+                    item = InvalidLine(f"NDJSON parse error on line {number}: {exc}")
+                yield item
+
+        return items()
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser decoding with orjson. Being a JSONParser, it is still given
+    request.body, so DATA_UPLOAD_MAX_MEMORY_SIZE applies as before.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        # DRF hands other parsers the raw request stream, so enforce the
+        # request body limit here as request.body would.
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        body = stream.read() if limit is None else stream.read(limit + 1)
+        if limit is not None and len(body) > limit:
+            raise RequestDataTooBig(
+                "Request body exceeded settings.DATA_UPLOAD_MAX_MEMORY_SIZE."
+            )
+        try:
+            return msgpack.unpackb(body)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
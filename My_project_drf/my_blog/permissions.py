@@ -12,6 +12,10 @@ class IsAdminOrReadOnly(BasePermission):
             return True
         return request.user and request.user.is_staff
 
+    async def ahas_permission(self, request, view):
+        # For async views; reads nothing but request.user.
+        return self.has_permission(request, view)
+
 
 class IsOwner(BasePermission):
     """
@@ -35,6 +39,12 @@ class IsInGroup(BasePermission):
             and request.user.groups.filter(name=self.group_name).exists()
         )
 
+    async def ahas_permission(self, request, view):
+        return (
+            request.user.is_authenticated
+            and await request.user.groups.filter(name=self.group_name).aexists()
+        )
+
 
 class AccessDuringBusinessHours(BasePermission):
     """
@@ -0,0 +1,195 @@
+"""
+Batched delete of every product.
+
+``Product.objects.all().delete()`` loads every row so it can send
+post_delete (search.py listens for it), then holds SQLite's write lock
+for the whole table until it commits; readers stall or fail with
+"database is locked" meanwhile. A ProductDeleteJob instead walks the
+table in primary-key order and deletes PRODUCT_DELETE_BATCH_SIZE rows per
+short transaction, with plain DELETE statements that skip the collector:
+
+* each batch removes the rows and their search index entries and records
+  its progress on the job, all in one transaction;
+* only products that existed when the job started (id <= max_pk) are
+  deleted;
+* cancel() flips the job's status; the next batch's progress update then
+  matches no row and the batch rolls back, so the job stops between
+  batches;
+* PRODUCT_DELETE_PAUSE seconds between batches let waiting writers in.
+
+With PRODUCT_DELETE_IN_BACKGROUND (the default) start() runs the job on a
+daemon thread once the request's transaction commits; otherwise it runs
+before start() returns.
+
+Every batch moves the job's heartbeat_at forward. If the process running
+a job dies, the job stays "running" until its heartbeat is older than
+PRODUCT_DELETE_STALE_AFTER seconds. The next start() then marks it
+failed and starts a new job for the remaining rows. Should the old
+process still be alive after all, its next progress update matches no
+row, so it stops as if cancelled.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from . import search
+from .models import Product, ProductDeleteJob
+
+logger = logging.getLogger(__name__)
+
+TABLE = Product._meta.db_table
+
+
+class Cancelled(Exception):
+    pass
+
+
+def start():
+    """Return the active delete job, creating and starting one if needed."""
+    expire_stale()
+    active = ProductDeleteJob.objects.filter(
+        status__in=[ProductDeleteJob.PENDING, ProductDeleteJob.RUNNING]
+    ).first()
+    if active is not None:
+        return active
+    job = ProductDeleteJob.objects.create(
+        batch_size=getattr(settings, "PRODUCT_DELETE_BATCH_SIZE", 2000)
+    )
+    if getattr(settings, "PRODUCT_DELETE_IN_BACKGROUND", True):
+        thread = threading.Thread(
+            target=run_in_thread,
+            args=(job.pk,),
+            name=f"product-delete-{job.pk}",
+            daemon=True,
+        )
+        transaction.on_commit(thread.start)
+    else:
+        run(job)
+    return job
+
+
+def expire_stale():
+    """Fail active jobs that have shown no progress for too long."""
+    stale_after = getattr(settings, "PRODUCT_DELETE_STALE_AFTER", 300)
+    now = timezone.now()
+    return ProductDeleteJob.objects.filter(
+        status__in=[ProductDeleteJob.PENDING, ProductDeleteJob.RUNNING],
+        heartbeat_at__lt=now - timedelta(seconds=stale_after),
+    ).update(
+        status=ProductDeleteJob.FAILED,
+        error=f"No progress for {stale_after} seconds; the process was lost.",
+        finished_at=now,
+    )
+
+
+def run_in_thread(pk):
+    try:
+        run(ProductDeleteJob.objects.get(pk=pk))
+    finally:
+        connection.close()
+
+
+def run(job):
+    pause = getattr(settings, "PRODUCT_DELETE_PAUSE", 0.01)
+    if prepare(job):
+        try:
+            while delete_batch(job):
+                time.sleep(pause)
+        except Exception as exc:
+            logger.exception("Product delete job %s failed", job.pk)
+            ProductDeleteJob.objects.filter(
+                pk=job.pk, status=ProductDeleteJob.RUNNING
+            ).update(
+                status=ProductDeleteJob.FAILED,
+                error=str(exc),
+                finished_at=timezone.now(),
+            )
+        finally:
+            ProductDeleteJob.objects.filter(pk=job.pk).update(
+                max_batch_ms=job.max_batch_ms
+            )
+    job.refresh_from_db()
+    return job
+
+
+def prepare(job):
+    """Fix the id range to delete and mark the job running."""
+    bounds = Product.objects.aggregate(max_pk=Max("pk"), total=Count("pk"))
+    updated = ProductDeleteJob.objects.filter(
+        pk=job.pk, status=ProductDeleteJob.PENDING
+    ).update(status=ProductDeleteJob.RUNNING, heartbeat_at=timezone.now(), **bounds)
+    job.refresh_from_db()
+    return bool(updated)
+
+
+def next_upper_bound(job):
+    pks = Product.objects.filter(pk__gt=job.last_pk, pk__lte=job.max_pk)
+    pks = pks.order_by("pk").values_list("pk", flat=True)
+    boundary = list(pks[job.batch_size - 1 : job.batch_size])
+    return boundary[0] if boundary else job.max_pk
+
+
+def delete_batch(job):
+    """
+    Delete the next batch. Returns False once nothing is left or the job
+    was cancelled.
+    """
+    if job.max_pk is None or job.last_pk >= job.max_pk:
+        finish(job)
+        return False
+    low, high = job.last_pk, next_upper_bound(job)
+
+    started = time.perf_counter()
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {TABLE} WHERE id > %s AND id <= %s", [low, high]
+                )
+                deleted = cursor.rowcount
+            if search.fts_available():
+                search.unindex_range(low, high)
+            # The slowest batch so far; this one's time is only known after
+            # it commits, so it is saved with the next batch.
+            progressed = ProductDeleteJob.objects.filter(
+                pk=job.pk, status=ProductDeleteJob.RUNNING
+            ).update(
+                deleted=F("deleted") + deleted,
+                last_pk=high,
+                batches=F("batches") + 1,
+                max_batch_ms=job.max_batch_ms,
+                heartbeat_at=timezone.now(),
+            )
+            if not progressed:
+                raise Cancelled
+    except Cancelled:
+        return False
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    job.deleted += deleted
+    job.last_pk = high
+    job.batches += 1
+    job.max_batch_ms = max(job.max_batch_ms, elapsed_ms)
+    return True
+
+
+def finish(job):
+    ProductDeleteJob.objects.filter(
+        pk=job.pk, status=ProductDeleteJob.RUNNING
+    ).update(status=ProductDeleteJob.DONE, finished_at=timezone.now())
+
+
+def cancel(job):
+    """Stop an active job after its current batch; returns the job."""
+    ProductDeleteJob.objects.filter(
+        pk=job.pk, status__in=[ProductDeleteJob.PENDING, ProductDeleteJob.RUNNING]
+    ).update(status=ProductDeleteJob.CANCELLED, finished_at=timezone.now())
+    job.refresh_from_db()
+    return job
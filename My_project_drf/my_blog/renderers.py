@@ -0,0 +1,50 @@
+"""
+Faster JSON and MessagePack renderers, selected in settings.REST_FRAMEWORK
+(DEFAULT_RENDERER_CLASSES); the matching parsers are in parsers.py.
+
+ORJSONRenderer encodes with orjson, which handles str, numbers, dicts,
+lists, datetimes and UUIDs in C. Everything else (Decimal, lazy strings,
+querysets...) goes to the same JSONEncoder.default() that DRF's
+JSONRenderer uses, so the output is byte-for-byte what JSONRenderer
+gives (tests.RendererTests checks this). Requests for indented output
+(``Accept: application/json; indent=4``), and settings orjson can't
+follow (UNICODE_JSON or COMPACT_JSON off), are rendered by JSONRenderer.
+
+MessagePackRenderer answers ``Accept: application/msgpack`` (or
+``?format=msgpack``). Types msgpack doesn't know are converted the same
+way as for JSON: datetimes to ISO 8601 strings, UUIDs to strings,
+Decimals to floats, so both formats carry the same data.
+"""
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if data is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=ORJSON_OPTIONS
+        )
+        # The same escaping as JSONRenderer, see there.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder_class = JSONRenderer.encoder_class
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self.encoder_class().default)
@@ -0,0 +1,142 @@
+"""
+Full-text product search on SQLite FTS5.
+
+my_blog_product_fts mirrors each product's name, description and category
+name under the product's id (its rowid). Migration 0005 creates it and
+sets its rank to bm25() weighting name 10, description 1 and category
+name 5. signals.py keeps it in sync on save/delete; rebuild_product_index()
+reloads it after bulk writes, which don't send signals.
+
+Query syntax accepted from clients:
+
+    red shoe        both terms, any order
+    "running shoe"  exact phrase
+    sho*            prefix
+"""
+
+import re
+
+from django.db import connection
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+FTS_TABLE = "my_blog_product_fts"
+
+TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_available(conn=connection):
+    return conn.vendor == "sqlite"
+
+
+def rebuild_product_index(conn=connection):
+    """Reload the whole index from my_blog_product with set-based statements."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description, category_name) "
+            "SELECT p.id, p.name, p.description, c.name "
+            "FROM my_blog_product p JOIN my_blog_category c ON c.id = p.category_id"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def index_product(product):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description, category_name) "
+            "VALUES (%s, %s, %s, (SELECT name FROM my_blog_category WHERE id = %s))",
+            [product.pk, product.name, product.description, product.category_id],
+        )
+
+
+def index_products(pks):
+    """Re-index many products with set-based statements (after bulk writes)."""
+    pks = list(pks)
+    if not pks:
+        return
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", pks
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, name, description, category_name) "
+            "SELECT p.id, p.name, p.description, c.name "
+            "FROM my_blog_product p JOIN my_blog_category c ON c.id = p.category_id "
+            f"WHERE p.id IN ({placeholders})",
+            pks,
+        )
+
+
+def unindex_product(pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+
+def unindex_range(low, high):
+    """Drop the entries of products with low < id <= high."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid > %s AND rowid <= %s", [low, high]
+        )
+
+
+def reindex_category(category):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {FTS_TABLE} SET category_name = %s WHERE rowid IN "
+            "(SELECT id FROM my_blog_product WHERE category_id = %s)",
+            [category.name, category.pk],
+        )
+
+
+def to_match_expression(search):
+    """
+    Turn client input into a safe FTS5 MATCH expression. Every term is
+    quoted, so FTS5 operators and column filters typed by the client are
+    matched as plain text.
+    """
+    terms = []
+    for phrase, word in TOKEN_RE.findall(search):
+        prefix = False
+        if word:
+            prefix = word.endswith("*")
+            phrase = word.rstrip("*")
+        phrase = phrase.strip()
+        if not phrase:
+            continue
+        term = '"%s"' % phrase.replace('"', '""')
+        terms.append(term + "*" if prefix else term)
+    return " ".join(terms)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for SearchFilter on product lists: same ``search``
+    parameter, but matched against the FTS5 index and ordered by relevance.
+    Falls back to SearchFilter on databases without FTS5.
+    """
+
+    search_param = SearchFilter.search_param
+
+    def filter_queryset(self, request, queryset, view):
+        if not fts_available(connection):
+            return SearchFilter().filter_queryset(request, queryset, view)
+
+        search = request.query_params.get(self.search_param, "")
+        expression = to_match_expression(search)
+        if not expression:
+            return queryset
+
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[expression],
+            select={"search_rank": f"{FTS_TABLE}.rank"},
+            order_by=["search_rank"],
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return SearchFilter().get_schema_operation_parameters(view)
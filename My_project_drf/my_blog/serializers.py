@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Blog, Product
+from .models import Blog, Category, Product, ProductDeleteJob
+from .sparse import SparseFieldsMixin
 
 
 from django.contrib.auth.models import User
@@ -11,15 +12,37 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email"]
 
 
-class BlogSerializer(serializers.ModelSerializer):
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username"]
+
+
+class CategorySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ["id", "name", "slug"]
+
+
+class BlogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Views load rows through setup_eager_loading() (see sparse.py), so a
+    # page costs a fixed number of queries instead of one or two per blog.
+    expandable_fields = {
+        "author": AuthorSerializer,
+        "categories": CategorySummarySerializer,
+    }
+
     class Meta:
         model = Blog
         fields = "__all__"
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
 
+    field_columns = {"category_name": ["category__name"]}
+    expandable_fields = {"category": CategorySummarySerializer}
+
     class Meta:
         model = Product
         fields = [
@@ -35,3 +58,64 @@ class ProductSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+
+    def update(self, instance, validated_data):
+        # Availability set by hand overrides what reservations set.
+        if "available" in validated_data:
+            instance.sold_out = False
+        return super().update(instance, validated_data)
+
+
+class StockItemSerializer(serializers.Serializer):
+    slug = serializers.SlugField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class StockRequestSerializer(serializers.Serializer):
+    # One UPDATE per request; the cap keeps it well under SQLite's
+    # variable limit.
+    items = StockItemSerializer(many=True, allow_empty=False, max_length=200)
+
+
+class ProductDeleteJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductDeleteJob
+        fields = [
+            "id",
+            "status",
+            "total",
+            "deleted",
+            "batches",
+            "batch_size",
+            "max_batch_ms",
+            "error",
+            "created_at",
+            "finished_at",
+            "heartbeat_at",
+        ]
+        read_only_fields = fields
+
+
+class ProductBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Validates one item of a bulk write without touching the database:
+    slug uniqueness and category existence are checked for a whole chunk
+    at once in bulk.py.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    category = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "slug",
+            "description",
+            "price",
+            "stock",
+            "available",
+            "category",
+        ]
+        extra_kwargs = {"slug": {"validators": []}}
@@ -0,0 +1,70 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search
+from .cache import bump_version
+from .models import Blog, Category, Product
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_blog_cache(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Blog.categories.through)
+def invalidate_blog_categories_cache(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_version(Blog)
+
+
+# ETags are derived from date_updated / updated_at (see conditional.py),
+# so changes that alter a representation without saving the row itself
+# have to move the timestamp forward.
+
+
+@receiver(m2m_changed, sender=Blog.categories.through)
+def touch_blogs_on_categories_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            pks = [instance.pk]
+        else:
+            return
+    elif action in ("post_add", "post_remove"):
+        pks = pk_set
+    elif action == "pre_clear":
+        # The links are gone by post_clear, so touch the blogs up front.
+        pks = list(instance.blog_posts.values_list("pk", flat=True))
+    else:
+        return
+    Blog.objects.filter(pk__in=pks).update(date_updated=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+def touch_products_on_category_change(sender, instance, created, **kwargs):
+    # ProductSerializer exposes category_name
+    if not created:
+        Product.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    if search.fts_available():
+        search.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    if search.fts_available():
+        search.unindex_product(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    if not created and search.fts_available():
+        search.reindex_category(instance)
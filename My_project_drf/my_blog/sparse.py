@@ -0,0 +1,116 @@
+"""
+Sparse fieldsets (?fields=) and relation expansion (?expand=).
+
+    /api/products/?fields=id,name,price
+    /api/blogs/?fields=id,title,author&expand=author
+
+``?fields`` keeps only the named fields; ``?expand`` replaces a
+relation's id (or list of ids) with nested objects and implies the field.
+Both narrow the query, not just the output: setup_eager_loading() passes
+only() the columns the remaining fields read, joins a foreign key only
+when it is expanded or a field reads through it, and prefetches a
+many-to-many relation only when it is requested, loading just the ids
+unless it is expanded.
+
+Views read the parameters with sparse_params() and hand the result to
+both setup_eager_loading() and the serializer context.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+
+
+def split_param(request, name):
+    value = request.query_params.get(name, "")
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def sparse_params(request, serializer_class):
+    """
+    Return ``{"fields": [...] or None, "expand": [...]}`` for the request,
+    or raise ValidationError (400) for names the serializer doesn't have.
+    """
+    fields = split_param(request, "fields")
+    expand = split_param(request, "expand")
+    errors = {}
+    unknown = set(fields) - set(serializer_class.field_names())
+    if unknown:
+        errors["fields"] = [f"Unknown fields: {', '.join(sorted(unknown))}."]
+    unknown = set(expand) - set(serializer_class.expandable_fields)
+    if unknown:
+        errors["expand"] = [f"Cannot expand: {', '.join(sorted(unknown))}."]
+    if errors:
+        raise ValidationError(errors)
+    if fields:
+        fields += [name for name in expand if name not in fields]
+    return {"fields": fields or None, "expand": expand}
+
+
+class SparseFieldsMixin:
+    """
+    For ModelSerializers. Reads ``fields`` and ``expand`` from the
+    serializer context.
+    """
+
+    # Fields that read columns other than their own name; "rel__col"
+    # columns make setup_eager_loading() join "rel".
+    field_columns = {}
+    # Relation name -> serializer for its nested objects under ?expand=.
+    expandable_fields = {}
+
+    _field_names = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in self.context.get("expand", ()):
+            many = self.Meta.model._meta.get_field(name).many_to_many
+            self.fields[name] = self.expandable_fields[name](many=many, read_only=True)
+
+    @classmethod
+    def field_names(cls):
+        if cls.__dict__.get("_field_names") is None:
+            cls._field_names = list(cls().fields)
+        return cls._field_names
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=(), extra_columns=()):
+        """
+        Narrow ``queryset`` to what the serializer will read for these
+        ``fields`` and ``expand`` (see sparse_params()). ``extra_columns``
+        are loaded too, e.g. what ordering or pagination reads.
+        """
+        opts = cls.Meta.model._meta
+        columns = [opts.pk.name, *extra_columns]
+        related = []
+        prefetch = []
+        for name in fields or cls.field_names():
+            try:
+                model_field = opts.get_field(name)
+            except FieldDoesNotExist:
+                model_field = None
+            nested = (
+                cls.expandable_fields[name].Meta.fields if name in expand else None
+            )
+            if model_field is not None and model_field.many_to_many:
+                rows = model_field.related_model.objects.only(*(nested or ["pk"]))
+                prefetch.append(Prefetch(name, queryset=rows))
+            elif nested:
+                columns += [name] + [f"{name}__{column}" for column in nested]
+                related.append(name)
+            else:
+                for column in cls.field_columns.get(name, [name]):
+                    if "__" in column:
+                        relation = column.split("__")[0]
+                        columns.append(relation)
+                        related.append(relation)
+                    columns.append(column)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*columns)
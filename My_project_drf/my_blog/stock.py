@@ -0,0 +1,124 @@
+"""
+Stock reservation without read-modify-write.
+
+A reservation is one conditional UPDATE for the whole batch:
+
+    UPDATE my_blog_product
+       SET stock = stock - CASE slug WHEN 'a' THEN 2 WHEN 'b' THEN 1 END,
+           available = CASE WHEN slug = 'a' AND stock = 2 THEN 0 ... END,
+           sold_out = CASE WHEN slug = 'a' AND stock = 2 THEN 1 ... END,
+           updated_at = now
+     WHERE available
+       AND ((slug = 'a' AND stock >= 2) OR (slug = 'b' AND stock >= 1))
+
+The database checks and decrements each row in the same step, so
+concurrent buyers can neither oversell nor lose each other's updates,
+and nothing is locked or read beforehand. If fewer rows match than were
+asked for, the transaction rolls back and the batch is refused as a
+whole. Only then is stock read, to say which items were short.
+
+Unavailable products can't be reserved. A reservation that takes the
+last unit marks the product unavailable and sold out; a release makes
+sold-out products available again, but leaves ones an admin disabled
+alone.
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages, message="Insufficient stock."):
+        super().__init__(message)
+        # [{"slug": ..., "requested": n, "stock": n or None if unknown}]
+        self.shortages = shortages
+
+
+def merge(items):
+    """Sum the quantities of ``[(slug, quantity)]`` per slug."""
+    quantities = {}
+    for slug, quantity in items:
+        quantities[slug] = quantities.get(slug, 0) + quantity
+    return quantities
+
+
+def quantity_case(quantities):
+    return Case(
+        *[When(slug=slug, then=Value(n)) for slug, n in quantities.items()],
+        output_field=models.PositiveIntegerField(),
+    )
+
+
+def update_all(queryset, expected, **values):
+    """
+    Run ``queryset.update()``; roll it back and return False unless it
+    changed ``expected`` rows.
+    """
+    with transaction.atomic():
+        if queryset.update(updated_at=timezone.now(), **values) == expected:
+            return True
+        transaction.set_rollback(True)
+        return False
+
+
+def reserve(items):
+    """
+    Take ``[(slug, quantity)]`` out of stock, all or nothing. Raises
+    InsufficientStock when any product is missing or short.
+    """
+    quantities = merge(items)
+    matches = reduce(
+        or_, [Q(slug=slug, stock__gte=n) for slug, n in quantities.items()]
+    )
+    emptied = [Q(slug=slug, stock=n) for slug, n in quantities.items()]
+    if not update_all(
+        Product.objects.filter(matches, available=True),
+        len(quantities),
+        stock=F("stock") - quantity_case(quantities),
+        available=Case(
+            *[When(q, then=Value(False)) for q in emptied], default=F("available")
+        ),
+        sold_out=Case(
+            *[When(q, then=Value(True)) for q in emptied], default=F("sold_out")
+        ),
+    ):
+        raise InsufficientStock(shortages(quantities))
+
+
+def release(items):
+    """
+    Put ``[(slug, quantity)]`` back into stock, all or nothing. Raises
+    InsufficientStock listing the unknown products if there are any.
+    """
+    quantities = merge(items)
+    if not update_all(
+        Product.objects.filter(slug__in=quantities),
+        len(quantities),
+        stock=F("stock") + quantity_case(quantities),
+        available=Case(When(sold_out=True, then=Value(True)), default=F("available")),
+        sold_out=Value(False),
+    ):
+        raise InsufficientStock(
+            shortages(quantities, release=True), "Unknown product."
+        )
+
+
+def shortages(quantities, release=False):
+    rows = Product.objects.filter(slug__in=quantities).values_list(
+        "slug", "stock", "available"
+    )
+    # Nothing of an unavailable product can be reserved.
+    stock = {
+        slug: n if available or release else 0 for slug, n, available in rows
+    }
+    return [
+        {"slug": slug, "requested": n, "stock": stock.get(slug)}
+        for slug, n in quantities.items()
+        if slug not in stock or (not release and stock[slug] < n)
+    ]
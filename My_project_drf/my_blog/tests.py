@@ -1,3 +1,1399 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .authentication import token_cache
+from . import fastpath, purge
+from .models import AuthToken, Blog, Category, Product, ProductDeleteJob
+from .pagination import BlogCursorPagination
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .search import rebuild_product_index, to_match_expression
+from .serializers import BlogSerializer, ProductSerializer
+from .view_counter import view_counter
+
+# Tests flush view counts explicitly; time-based flushes would add
+# queries at random points, and leftovers must not reach the dev database.
+no_timed_flush = override_settings(BLOG_VIEW_FLUSH_INTERVAL=None)
+
+
+def setUpModule():
+    no_timed_flush.enable()
+
+
+def tearDownModule():
+    view_counter.discard()
+    no_timed_flush.disable()
+
+
+class BlogCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = Category.objects.create(name="Python")
+        cls.blogs = []
+        for i in range(7):
+            blog = Blog.objects.create(title=f"Blog {i}", content="content")
+            if i % 2 == 0:
+                blog.categories.add(cls.python)
+            cls.blogs.append(blog)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, url, params=None):
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            if not pages[-1]["next"]:
+                return pages
+            response = self.client.get(pages[-1]["next"])
+
+    def test_walks_every_row_once_newest_first(self):
+        pages = self.walk("/api/blogs/", {"pagination": "cursor", "page_size": 3})
+        ids = [row["id"] for page in pages for row in page["results"]]
+        self.assertEqual(ids, [blog.id for blog in reversed(self.blogs)])
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+        self.assertNotIn("count", pages[0])
+
+    def test_previous_link_returns_the_prior_page(self):
+        first = self.client.get(
+            "/api/blogs/", {"pagination": "cursor", "page_size": 3}
+        ).json()
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(back["previous"])
+        self.assertIsNotNone(back["next"])
+
+    def test_filters_are_kept_across_pages(self):
+        pages = self.walk(
+            "/api/blogs/",
+            {"pagination": "cursor", "page_size": 2, "categories": "python"},
+        )
+        ids = [row["id"] for page in pages for row in page["results"]]
+        expected = [blog.id for blog in reversed(self.blogs[::2])]
+        self.assertEqual(ids, expected)
+
+    def test_same_timestamp_is_broken_by_id(self):
+        Blog.objects.update(date_created=self.blogs[0].date_created)
+        pages = self.walk("/api/blogs/", {"pagination": "cursor", "page_size": 2})
+        ids = [row["id"] for page in pages for row in page["results"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), len(self.blogs))
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get("/api/blogs/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_out_of_range_cursor_id_is_404(self):
+        token = BlogCursorPagination.make_token((timezone.now(), 10**30))
+        response = self.client.get("/api/blogs/", {"cursor": token})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get("/api/blogs/")
+        self.assertEqual(response.json()["count"], len(self.blogs))
+        self.assertEqual(len(response.json()["results"]), 2)
+
+
+class BlogQueryBudgetTests(TestCase):
+    """
+    A page of blogs costs the same number of queries whatever its size:
+    one for the rows and one for all their categories.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="author", password="x")
+        categories = [Category.objects.create(name=f"Cat {i}") for i in range(3)]
+        for i in range(100):
+            blog = Blog.objects.create(
+                title=f"Blog {i}", content="content", author=cls.author
+            )
+            blog.categories.set(categories)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assert_page_queries(self, page_size):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                "/api/blogs/", {"pagination": "cursor", "page_size": page_size}
+            )
+        results = response.json()["results"]
+        self.assertEqual(len(results), page_size)
+        self.assertEqual(len(results[0]["categories"]), 3)
+        self.assertEqual(results[0]["author"], self.author.id)
+
+    def test_page_size_2(self):
+        self.assert_page_queries(2)
+
+    def test_page_size_50(self):
+        self.assert_page_queries(50)
+
+    def test_page_size_100(self):
+        self.assert_page_queries(100)
+
+    def test_page_number_mode(self):
+        # COUNT(*) + rows + categories
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/blogs/", {"page": 3})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_detail(self):
+        blog = Blog.objects.first()
+        # freshness lookup (ETag) + row + categories
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/blogs/{blog.pk}/")
+        self.assertEqual(len(response.json()["categories"]), 3)
+
+
+class BlogResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Python")
+        cls.blog = Blog.objects.create(title="First", content="content")
+        cls.blog.categories.add(cls.category)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_repeat_list_request_hits_no_queries(self):
+        first = self.client.get("/api/blogs/", {"title": "first", "page": 1})
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/blogs/", {"page": 1, "title": "first"})
+        self.assertEqual(second.json(), first.json())
+
+    def test_repeat_detail_request_hits_no_queries(self):
+        first = self.client.get(f"/api/blogs/{self.blog.pk}/")
+        # only the ETag lookup
+        with self.assertNumQueries(1):
+            second = self.client.get(f"/api/blogs/{self.blog.pk}/")
+        self.assertEqual(second.json(), first.json())
+
+    def test_not_found_is_not_cached(self):
+        self.client.get("/api/blogs/999/")
+        with self.assertNumQueries(2):
+            self.client.get("/api/blogs/999/")
+
+    def test_unknown_params_bypass_the_cache(self):
+        self.client.get("/api/blogs/", {"utm": "x"})
+        with self.assertNumQueries(3):
+            self.client.get("/api/blogs/", {"utm": "x"})
+
+    def test_blog_save_invalidates(self):
+        self.client.get(f"/api/blogs/{self.blog.pk}/")
+        self.blog.title = "Renamed"
+        self.blog.save()
+        response = self.client.get(f"/api/blogs/{self.blog.pk}/")
+        self.assertEqual(response.json()["title"], "Renamed")
+
+    def test_blog_delete_invalidates(self):
+        self.client.get("/api/blogs/")
+        self.blog.delete()
+        self.assertEqual(self.client.get("/api/blogs/").json()["count"], 0)
+
+    def test_m2m_change_invalidates(self):
+        self.client.get(f"/api/blogs/{self.blog.pk}/")
+        self.blog.categories.clear()
+        response = self.client.get(f"/api/blogs/{self.blog.pk}/")
+        self.assertEqual(response.json()["categories"], [])
+
+    def test_category_rename_invalidates_category_filter(self):
+        self.assertEqual(
+            self.client.get("/api/blogs/", {"categories": "django"}).json()["count"], 0
+        )
+        self.category.name = "Django"
+        self.category.save()
+        self.assertEqual(
+            self.client.get("/api/blogs/", {"categories": "django"}).json()["count"], 1
+        )
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = "django.core.cache.backends.filebased.FileBasedCache"
+            with override_settings(
+                CACHES={"default": {"BACKEND": backend, "LOCATION": location}}
+            ):
+                self.client.get("/api/blogs/")
+                with self.assertNumQueries(0):
+                    self.client.get("/api/blogs/")
+                self.blog.save()
+                with self.assertNumQueries(3):
+                    self.client.get("/api/blogs/")
+
+
+class ConditionalRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="x", is_staff=True
+        )
+        cls.category = Category.objects.create(name="Books")
+        cls.blog = Blog.objects.create(title="First", content="content")
+        cls.product = Product.objects.create(
+            name="Book",
+            slug="book",
+            description="A book",
+            price="9.99",
+            stock=3,
+            category=cls.category,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_blog_get_sends_validators(self):
+        response = self.client.get(f"/api/blogs/{self.blog.pk}/")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+    def test_blog_304_costs_one_query(self):
+        etag = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/blogs/{self.blog.pk}/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_blog_etag_changes_on_save_and_category_change(self):
+        first = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        self.blog.categories.add(self.category)
+        second = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        self.category.blog_posts.clear()
+        third = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        self.assertEqual(len({first, second, third}), 3)
+
+    def test_blog_put_with_stale_if_match_is_412(self):
+        self.client.force_authenticate(self.admin)
+        etag = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        self.blog.save()
+        response = self.client.put(
+            f"/api/blogs/{self.blog.pk}/",
+            {"title": "Lost", "content": "x", "categories": [self.category.pk]},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 412)
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.title, "First")
+
+    def test_blog_put_with_current_if_match_returns_new_etag(self):
+        self.client.force_authenticate(self.admin)
+        etag = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        response = self.client.put(
+            f"/api/blogs/{self.blog.pk}/",
+            {"title": "Updated", "content": "x", "categories": [self.category.pk]},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        fresh = self.client.get(f"/api/blogs/{self.blog.pk}/")["ETag"]
+        self.assertEqual(response["ETag"], fresh)
+
+    def test_product_304_costs_one_query(self):
+        etag = self.client.get(f"/api/products/{self.product.pk}/")["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"/api/products/{self.product.pk}/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_etag_changes_on_category_rename(self):
+        first = self.client.get(f"/api/products/{self.product.pk}/")["ETag"]
+        self.category.name = "Novels"
+        self.category.save()
+        second = self.client.get(f"/api/products/{self.product.pk}/")
+        self.assertNotEqual(second["ETag"], first)
+        self.assertEqual(second.json()["category_name"], "Novels")
+
+    def test_product_patch_with_stale_if_match_is_412(self):
+        etag = self.client.get(f"/api/products/{self.product.pk}/")["ETag"]
+        Product.objects.filter(pk=self.product.pk).update(stock=0)
+        self.product.save()
+        response = self.client.patch(
+            f"/api/products/{self.product.pk}/",
+            {"stock": 10},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 412)
+
+    def test_missing_product_is_404(self):
+        response = self.client.get("/api/products/999/")
+        self.assertEqual(response.status_code, 404)
+
+
+class TokenAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="sam", password="x")
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.token, self.key = AuthToken.issue(self.user)
+
+    def get_user(self, key):
+        return self.client.get("/api/user/", HTTP_AUTHORIZATION=f"Token {key}")
+
+    def test_only_the_hash_is_stored(self):
+        self.assertNotEqual(self.token.key_hash, self.key)
+        self.assertEqual(self.token.key_hash, AuthToken.hash_key(self.key))
+
+    def test_valid_token_authenticates(self):
+        response = self.get_user(self.key)
+        self.assertEqual(response.json()["username"], "sam")
+
+    def test_bare_key_is_accepted(self):
+        response = self.client.get("/api/user/", HTTP_AUTHORIZATION=self.key)
+        self.assertEqual(response.json()["username"], "sam")
+
+    def test_cached_token_costs_no_queries(self):
+        self.get_user(self.key)
+        with self.assertNumQueries(0):
+            response = self.get_user(self.key)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_token_is_rejected(self):
+        self.assertEqual(self.get_user("nope").status_code, 401)
+
+    def test_expired_token_is_rejected(self):
+        _, key = AuthToken.issue(self.user, lifetime=timedelta(seconds=-1))
+        self.assertEqual(self.get_user(key).status_code, 401)
+
+    def test_revocation_evicts_the_local_cache(self):
+        self.get_user(self.key)
+        AuthToken.revoke_for_user(self.user)
+        self.assertEqual(self.get_user(self.key).status_code, 401)
+
+    def test_token_added_in_admin_authenticates(self):
+        admin = User.objects.create_superuser(username="root", password="x")
+        self.client.force_login(admin)
+        response = self.client.post(
+            "/admin/my_blog/authtoken/add/",
+            {"user": self.user.pk, "name": "cli"},
+            follow=True,
+        )
+        [message] = [
+            str(m) for m in response.context["messages"] if "Copy it now" in str(m)
+        ]
+        key = message.split(" is ", 1)[1].split(".", 1)[0]
+        token = AuthToken.objects.get(name="cli")
+        self.assertEqual(token.key_hash, AuthToken.hash_key(key))
+        self.assertEqual(self.get_user(key).json()["username"], "sam")
+
+    def test_remote_revocation_propagates_after_ttl(self):
+        self.get_user(self.key)
+        # Another process revoked the token; ours still trusts its cache.
+        AuthToken.objects.update(revoked_at=self.token.created_at)
+        self.assertEqual(self.get_user(self.key).status_code, 200)
+        later = time.monotonic() + token_cache.ttl + 1
+        with mock.patch("my_blog.authentication.time.monotonic", return_value=later):
+            self.assertEqual(self.get_user(self.key).status_code, 401)
+
+
+class ProductFullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shoes = Category.objects.create(name="Shoes")
+        cls.books = Category.objects.create(name="Books")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def make(self, name, description, category):
+        return Product.objects.create(
+            name=name,
+            slug=name.lower().replace(" ", "-"),
+            description=description,
+            price="10.00",
+            stock=1,
+            category=category,
+        )
+
+    def search(self, term):
+        response = self.client.get("/api/products/", {"search": term})
+        return [row["name"] for row in response.json()]
+
+    def test_terms_are_anded(self):
+        self.make("Red Running Shoe", "light", self.shoes)
+        self.make("Red Book", "heavy", self.books)
+        self.assertEqual(self.search("red shoe"), ["Red Running Shoe"])
+
+    def test_phrase_query(self):
+        self.make("Trail Shoe", "for running on trails", self.shoes)
+        self.make("Road Shoe", "on trails for running", self.shoes)
+        self.assertEqual(self.search('"running on trails"'), ["Trail Shoe"])
+
+    def test_prefix_query(self):
+        self.make("Sneaker", "canvas", self.shoes)
+        self.assertEqual(self.search("snea*"), ["Sneaker"])
+        self.assertEqual(self.search("snea"), [])
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.make("Plain Boot", "goes well with a leather belt", self.shoes)
+        self.make("Leather Boot", "a boot", self.shoes)
+        self.assertEqual(self.search("leather"), ["Leather Boot", "Plain Boot"])
+
+    def test_category_name_is_searchable_and_follows_renames(self):
+        self.make("Hiker", "sturdy", self.shoes)
+        self.assertEqual(self.search("shoes"), ["Hiker"])
+        self.shoes.name = "Footwear"
+        self.shoes.save()
+        self.assertEqual(self.search("shoes"), [])
+        self.assertEqual(self.search("footwear"), ["Hiker"])
+
+    def test_updates_and_deletes_are_indexed(self):
+        product = self.make("Old Name", "text", self.books)
+        product.name = "New Name"
+        product.save()
+        self.assertEqual(self.search("old"), [])
+        self.assertEqual(self.search("new"), ["New Name"])
+        product.delete()
+        self.assertEqual(self.search("new"), [])
+
+    def test_rebuild_picks_up_bulk_writes(self):
+        Product.objects.bulk_create(
+            [
+                Product(
+                    name="Bulk Item",
+                    slug="bulk",
+                    description="x",
+                    price="1.00",
+                    stock=1,
+                    category=self.books,
+                )
+            ]
+        )
+        self.assertEqual(self.search("bulk"), [])
+        rebuild_product_index()
+        self.assertEqual(self.search("bulk"), ["Bulk Item"])
+
+    def test_combines_with_product_filter(self):
+        self.make("Blue Shoe", "x", self.shoes)
+        self.make("Blue Book", "x", self.books)
+        response = self.client.get(
+            "/api/products/", {"search": "blue", "category": "book"}
+        )
+        self.assertEqual([row["name"] for row in response.json()], ["Blue Book"])
+
+    def test_operators_are_matched_as_text(self):
+        self.assertEqual(
+            to_match_expression('name:x OR "a b" c* NEAR('),
+            '"name:x" "OR" "a b" "c"* "NEAR("',
+        )
+        self.assertEqual(self.search('OR AND NOT ") *'), [])
+
+
+class BlogViewCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counter.discard()
+        self.client = APIClient()
+        self.blog = Blog.objects.create(title="Counted", content="x", views=1)
+
+    def test_every_successful_get_is_counted(self):
+        url = f"/api/blogs/{self.blog.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.client.get(url)  # from the response cache
+        self.client.get(url, HTTP_IF_NONE_MATCH=etag)  # 304
+        self.client.get("/api/blogs/999/")  # 404, not counted
+        self.assertEqual(view_counter.lag()["views"], 3)
+        view_counter.flush()
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views, 4)
+
+    @override_settings(BLOG_VIEW_FLUSH_INTERVAL=0.05)
+    def test_background_thread_flushes_after_the_interval(self):
+        flushed = threading.Event()
+
+        def flush(blocking=True):
+            view_counter.discard()
+            flushed.set()
+            return 1
+
+        # No further view arrives to trigger it.
+        with mock.patch.object(view_counter, "flush", side_effect=flush):
+            self.client.get(f"/api/blogs/{self.blog.pk}/")
+            self.assertTrue(flushed.wait(5))
+
+    def test_flush_moves_etag_and_refreshes_cache(self):
+        url = f"/api/blogs/{self.blog.pk}/"
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url).json()["views"], 1)  # cached
+        view_counter.flush()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.json()["views"], 3)
+
+    def test_flush_keeps_date_updated_and_if_match(self):
+        url = f"/api/blogs/{self.blog.pk}/"
+        admin = User.objects.create_user(username="ed", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+        etag = self.client.get(url)["ETag"]
+        view_counter.flush()
+        blog = Blog.objects.get(pk=self.blog.pk)
+        self.assertEqual(blog.date_updated, self.blog.date_updated)
+        self.assertEqual(blog.views, 2)
+        category = Category.objects.create(name="Misc")
+        response = self.client.put(
+            url,
+            {"title": "Edited", "content": "y", "categories": [category.pk]},
+            format="json",
+            HTTP_IF_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], self.client.get(url)["ETag"])
+
+    def test_flush_leaves_other_cached_blogs_alone(self):
+        other = Blog.objects.create(title="Quiet", content="x")
+        self.client.get(f"/api/blogs/{other.pk}/")
+        view_counter.discard()
+        self.client.get(f"/api/blogs/{self.blog.pk}/")
+        view_counter.flush()
+        with self.assertNumQueries(1):  # the ETag lookup; the body is cached
+            self.client.get(f"/api/blogs/{other.pk}/")
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="x", is_staff=True
+        )
+        category = Category.objects.create(name="Books")
+        Product.objects.bulk_create(
+            Product(
+                name=f"Book {n}",
+                slug=f"book-{n}",
+                description="A book",
+                price="9.99",
+                stock=n,
+                category=category,
+            )
+            for n in range(3)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_products_csv(self):
+        response = self.client.get("/api/export/products.csv")
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("id,name,slug"))
+        self.assertIn("Book 2,book-2", lines[3])
+
+    def test_csv_neutralizes_formulas(self):
+        Product.objects.filter(slug="book-0").update(
+            name="=cmd|' /C calc'!A0", description="-2+3"
+        )
+        body = b"".join(self.client.get("/api/export/products.csv").streaming_content)
+        row = next(csv.reader(body.decode().splitlines()[1:]))
+        self.assertEqual(row[1:4], ["'=cmd|' /C calc'!A0", "book-0", "'-2+3"])
+
+    def test_products_ndjson_without_instances(self):
+        with mock.patch.object(Product, "__init__", side_effect=AssertionError):
+            response = self.client.get("/api/export/products.ndjson")
+            lines = b"".join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["price"], "9.99")
+
+    def test_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/api/export/blogs.csv").status_code, 401)
+
+    def test_unknown_export(self):
+        self.assertEqual(self.client.get("/api/export/users.csv").status_code, 404)
+
+
+class ProductBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username="admin", password="x", is_staff=True
+        )
+        cls.category = Category.objects.create(name="Books")
+        cls.product = Product.objects.create(
+            name="Old",
+            slug="old",
+            description="Old book",
+            price="5.00",
+            stock=1,
+            category=cls.category,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def item(self, n, **fields):
+        return {
+            "name": f"Book {n}",
+            "slug": f"book-{n}",
+            "description": "A book",
+            "price": "9.99",
+            "stock": n,
+            "category": self.category.pk,
+            **fields,
+        }
+
+    def post(self, items):
+        return self.client.post("/api/products/bulk/", items, format="json")
+
+    def test_creates_and_updates(self):
+        items = [self.item(n) for n in range(3)]
+        items.append({"id": self.product.pk, "stock": 42})
+        before = self.product.updated_at
+        response = self.post(items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"created": 3, "updated": 1, "errors": []}
+        )
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.name, self.product.stock), ("Old", 42))
+        self.assertGreater(self.product.updated_at, before)
+        self.assertEqual(Product.objects.count(), 4)
+
+    def test_queries_do_not_grow_with_items(self):
+        # Slug and category lookups, then insert and reindex in a savepoint.
+        with self.assertNumQueries(7):
+            self.post([self.item(n) for n in range(50)])
+        # 100 rows of 10 columns pass SQLite's 999 variables: two INSERTs.
+        with self.assertNumQueries(8):
+            self.post([self.item(n) for n in range(50, 150)])
+
+    def test_reports_per_item_errors(self):
+        response = self.post(
+            [
+                self.item(0),
+                self.item(1, slug="old"),
+                self.item(2, slug="book-0"),
+                self.item(3, category=999),
+                self.item(4, price="free"),
+                {"id": 999, "stock": 1},
+                "not an object",
+            ]
+        )
+        body = response.json()
+        self.assertEqual((body["created"], body["updated"]), (1, 0))
+        errors = {error["index"]: error["errors"] for error in body["errors"]}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4, 5, 6])
+        self.assertIn("slug", errors[1])
+        self.assertIn("slug", errors[2])
+        self.assertIn("category", errors[3])
+        self.assertIn("price", errors[4])
+        self.assertIn("id", errors[5])
+
+    def test_ndjson_and_search_index(self):
+        body = "\n".join(json.dumps(self.item(n)) for n in range(2)) + "\n"
+        response = self.client.post(
+            "/api/products/bulk/", body, content_type="application/x-ndjson"
+        )
+        self.assertEqual(response.json()["created"], 2)
+        found = self.client.get("/api/products/", {"search": "book"}).json()
+        self.assertEqual(
+            sorted(row["name"] for row in found), ["Book 0", "Book 1", "Old"]
+        )
+
+    def test_rejects_non_list(self):
+        self.assertEqual(self.post(self.item(0)).status_code, 400)
+        for body in [b"5", b"null", b'"text"']:
+            with self.subTest(body):
+                response = self.client.post(
+                    "/api/products/bulk/", body, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_malformed_ndjson_line_is_an_item_error(self):
+        lines = [json.dumps(self.item(0)), "{not json", json.dumps(self.item(1))]
+        response = self.client.post(
+            "/api/products/bulk/",
+            "\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["created"], 2)
+        self.assertEqual([error["index"] for error in body["errors"]], [1])
+        self.assertIn("line 2", body["errors"][0]["errors"]["non_field_errors"][0])
+
+    def test_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post([self.item(0)]).status_code, 401)
+
+
+@override_settings(
+    PRODUCT_DELETE_IN_BACKGROUND=False,
+    PRODUCT_DELETE_BATCH_SIZE=3,
+    PRODUCT_DELETE_PAUSE=0,
+)
+class ProductDeleteJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Lamps")
+        for n in range(10):
+            cls.make(n)
+        cls.admin = User.objects.create_user(
+            username="admin", password="x", is_staff=True
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    @classmethod
+    def make(cls, n):
+        return Product.objects.create(
+            name=f"Lamp {n}",
+            slug=f"lamp-{n}",
+            description="A lamp",
+            price="1.00",
+            stock=1,
+            category=cls.category,
+        )
+
+    def search(self, term):
+        response = self.client.get("/api/products/", {"search": term})
+        return [row["name"] for row in response.json()]
+
+    def test_delete_runs_in_batches(self):
+        response = self.client.delete("/api/products/")
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(
+            (job["status"], job["total"], job["deleted"], job["batches"]),
+            ("done", 10, 10, 4),
+        )
+        self.assertEqual(
+            response["Location"], f"/api/products/delete-jobs/{job['id']}/"
+        )
+        self.assertFalse(Product.objects.exists())
+        self.assertEqual(self.search("lamp"), [])
+
+    def test_queries_per_batch_are_constant(self):
+        job = ProductDeleteJob.objects.create(batch_size=3)
+        purge.prepare(job)
+        # The next upper id, then DELETE, unindex and record progress in a
+        # savepoint.
+        with self.assertNumQueries(6):
+            self.assertTrue(purge.delete_batch(job))
+        self.assertEqual((job.deleted, job.batches), (3, 1))
+
+    def test_keeps_products_created_after_start(self):
+        job = ProductDeleteJob.objects.create(batch_size=3)
+        purge.prepare(job)
+        self.make(10)
+        while purge.delete_batch(job):
+            pass
+        self.assertEqual(
+            list(Product.objects.values_list("name", flat=True)), ["Lamp 10"]
+        )
+
+    def test_cancel_stops_after_current_batch(self):
+        job = ProductDeleteJob.objects.create(batch_size=3)
+        purge.prepare(job)
+        purge.delete_batch(job)
+        response = self.client.delete(f"/api/products/delete-jobs/{job.pk}/")
+        self.assertEqual(response.json()["status"], "cancelled")
+
+        self.assertFalse(purge.delete_batch(job))
+        self.assertEqual(Product.objects.count(), 7)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted), ("cancelled", 3))
+        self.assertEqual(len(self.search("lamp")), 7)
+
+    def test_returns_the_active_job(self):
+        job = ProductDeleteJob.objects.create(batch_size=3)
+        response = self.client.delete("/api/products/")
+        self.assertEqual(response.json()["id"], job.pk)
+        self.assertEqual(Product.objects.count(), 10)
+
+    def test_stale_job_is_replaced(self):
+        job = ProductDeleteJob.objects.create(batch_size=3)
+        purge.prepare(job)
+        # Its process died after the first batch.
+        purge.delete_batch(job)
+        with override_settings(PRODUCT_DELETE_STALE_AFTER=60):
+            response = self.client.delete("/api/products/")
+            self.assertEqual(response.json()["id"], job.pk)  # still fresh
+            ProductDeleteJob.objects.update(
+                heartbeat_at=timezone.now() - timedelta(seconds=61)
+            )
+            response = self.client.delete("/api/products/")
+        self.assertNotEqual(response.json()["id"], job.pk)
+        self.assertEqual(response.json()["status"], "done")
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductDeleteJob.FAILED)
+        self.assertFalse(Product.objects.exists())
+        # The old process, were it alive, would stop at its next batch.
+        self.assertFalse(purge.delete_batch(job))
+
+    def test_admin_only(self):
+        job = ProductDeleteJob.objects.create(batch_size=3)
+        user = User.objects.create_user(username="user", password="x")
+        for credentials in [None, user]:
+            self.client.force_authenticate(credentials)
+            for method, path in [
+                ("delete", "/api/products/"),
+                ("get", f"/api/products/delete-jobs/{job.pk}/"),
+                ("delete", f"/api/products/delete-jobs/{job.pk}/"),
+            ]:
+                with self.subTest(user=credentials, method=method, path=path):
+                    response = getattr(self.client, method)(path)
+                    self.assertIn(response.status_code, (401, 403))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductDeleteJob.PENDING)
+        self.assertEqual(Product.objects.count(), 10)
+
+
+class StockReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="x")
+        cls.admin = User.objects.create_user(
+            username="clerk", password="x", is_staff=True
+        )
+        category = Category.objects.create(name="Tea")
+        cls.green, cls.black = [
+            Product.objects.create(
+                name=slug.title(),
+                slug=slug,
+                description="",
+                price="3.00",
+                stock=stock,
+                category=category,
+            )
+            for slug, stock in [("green", 5), ("black", 1)]
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, action, *items):
+        return self.client.post(
+            f"/api/products/stock/{action}/",
+            {"items": [{"slug": slug, "quantity": n} for slug, n in items]},
+            format="json",
+        )
+
+    def stock(self):
+        rows = Product.objects.values_list("slug", "stock", "available")
+        return {slug: (stock, available) for slug, stock, available in rows}
+
+    def test_reserve_batch_in_one_update(self):
+        # The UPDATE inside a savepoint; nothing is read first.
+        with self.assertNumQueries(3):
+            response = self.post("reserve", ("green", 2), ("black", 1), ("green", 1))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock(), {"green": (2, True), "black": (0, False)})
+
+    def test_shortage_refuses_whole_batch(self):
+        response = self.post("reserve", ("green", 2), ("black", 2), ("oolong", 1))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["shortages"],
+            [
+                {"slug": "black", "requested": 2, "stock": 1},
+                {"slug": "oolong", "requested": 1, "stock": None},
+            ],
+        )
+        self.assertEqual(self.stock(), {"green": (5, True), "black": (1, True)})
+
+    def test_release_restocks_and_makes_available(self):
+        self.post("reserve", ("black", 1))
+        self.client.force_authenticate(self.admin)
+        response = self.post("release", ("black", 2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock()["black"], (2, True))
+        self.assertEqual(self.post("release", ("oolong", 1)).status_code, 409)
+
+    def test_disabled_product_is_not_reserved_or_reenabled(self):
+        Product.objects.filter(slug="green").update(available=False)
+        response = self.post("reserve", ("green", 1))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["shortages"],
+            [{"slug": "green", "requested": 1, "stock": 0}],
+        )
+        self.client.force_authenticate(self.admin)
+        self.post("release", ("green", 1))
+        self.assertEqual(self.stock()["green"], (6, False))
+
+    def test_release_reenables_only_sold_out(self):
+        self.post("reserve", ("black", 1))
+        self.client.force_authenticate(self.admin)
+        self.client.patch(
+            f"/api/products/{self.black.pk}/", {"available": True}, format="json"
+        )
+        self.client.patch(
+            f"/api/products/{self.black.pk}/", {"available": False}, format="json"
+        )
+        self.post("release", ("black", 1))
+        self.assertEqual(self.stock()["black"], (1, False))
+
+    def test_reserve_moves_etag_source(self):
+        before = self.green.updated_at
+        self.post("reserve", ("green", 1))
+        self.green.refresh_from_db()
+        self.assertGreater(self.green.updated_at, before)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.post("reserve", ("green", 1)).status_code, 401)
+
+    def test_release_requires_admin(self):
+        self.assertEqual(self.post("release", ("green", 3)).status_code, 403)
+        self.assertEqual(self.stock()["green"], (5, True))
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="writer", password="x")
+        cls.category = Category.objects.create(name="Garden")
+        for n in range(3):
+            Product.objects.create(
+                name=f"Rake {n}",
+                slug=f"rake-{n}",
+                description="long " * 100,
+                price="4.50",
+                stock=1,
+                category=cls.category,
+            )
+            blog = Blog.objects.create(
+                title=f"Blog {n}", content="long " * 100, author=cls.author
+            )
+            blog.categories.add(cls.category)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        return response, [query["sql"] for query in queries]
+
+    def test_product_fields_narrow_the_select(self):
+        response, queries = self.get("/api/products/", fields="id,name,price")
+        rake = Product.objects.get(slug="rake-0")
+        self.assertEqual(
+            response.json()[0], {"id": rake.pk, "name": "Rake 0", "price": "4.50"}
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0])
+        self.assertNotIn("JOIN", queries[0])
+
+    def test_product_default_output_joins_category_once(self):
+        response, queries = self.get("/api/products/")
+        row = response.json()[0]
+        self.assertEqual(len(row), 11)
+        self.assertEqual(row["category_name"], "Garden")
+        self.assertEqual(len(queries), 1)
+
+    def test_product_expand_category(self):
+        response, queries = self.get("/api/products/", fields="name", expand="category")
+        self.assertEqual(
+            response.json()[0],
+            {
+                "name": "Rake 0",
+                "category": {
+                    "id": self.category.pk,
+                    "name": "Garden",
+                    "slug": "garden",
+                },
+            },
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertIn("JOIN", queries[0])
+
+    def test_blog_fields_and_expand(self):
+        response, queries = self.get(
+            "/api/blogs/",
+            pagination="cursor",
+            fields="id,title",
+            expand="author,categories",
+        )
+        result = response.json()["results"][0]
+        self.assertEqual(set(result), {"id", "title", "author", "categories"})
+        self.assertEqual(
+            result["author"], {"id": self.author.pk, "username": "writer"}
+        )
+        self.assertEqual(result["categories"][0]["name"], "Garden")
+        # Rows with the author joined, then the categories; no per-row
+        # query for the cursor's date_created.
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("content", queries[0])
+
+    def test_blog_without_categories_skips_prefetch(self):
+        response, queries = self.get("/api/blogs/", fields="id,title")
+        self.assertEqual(set(response.json()["results"][0]), {"id", "title"})
+        # COUNT(*) and the rows
+        self.assertEqual(len(queries), 2)
+
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get("/api/products/", {"fields": "id,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.json())
+        response = self.client.get("/api/blogs/", {"expand": "content"})
+        self.assertEqual(response.status_code, 400)
+
+
+class FastListParityTests(TestCase):
+    """API_FAST_LISTS must not change a single byte of the list responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="writer", password="x")
+        categories = [Category.objects.create(name=f"Ünïcode {i}") for i in range(3)]
+        for n, price in enumerate(["5", "5.1", "1234.56", "0.00"]):
+            Product.objects.create(
+                name=f"Product “{n}”",
+                slug=f"product-{n}",
+                description="Line one\nline two",
+                price=price,
+                stock=n,
+                available=n % 2 == 0,
+                category=categories[n % 3],
+            )
+        for n in range(7):
+            blog = Blog.objects.create(
+                title=None if n == 3 else f"Blog {n}",
+                slug=f"blog-{n}",
+                content="x" * n,
+                author=None if n == 2 else author,
+                status="published" if n % 2 else "draft",
+                thumbnail="uploads/blog_images/a.png" if n == 1 else "",
+            )
+            blog.categories.set(categories[: n % 4])
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_same(self, path, params):
+        responses = []
+        for fast in [False, True]:
+            with override_settings(API_FAST_LISTS=fast):
+                cache.clear()
+                responses.append(self.client.get(path, params))
+        slow, fast = responses
+        self.assertEqual(slow.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_products(self):
+        for params in [
+            {},
+            {"fields": "id,name,price"},
+            {"fields": "price,id,name,id"},
+            {"fields": "category_name,updated_at"},
+            {"search": "product"},
+            {"price_min": "5", "category": "1"},
+        ]:
+            with self.subTest(**params):
+                self.assert_same("/api/products/", params)
+
+    def test_blogs(self):
+        for params in [
+            {},
+            {"page": 2},
+            {"pagination": "cursor", "page_size": 3},
+            {"pagination": "cursor", "page_size": 10},
+            {"pagination": "cursor", "fields": "id,categories,thumbnail"},
+            {"title": "Blog"},
+        ]:
+            with self.subTest(**params):
+                self.assert_same("/api/blogs/", params)
+
+    def test_cursor_walk(self):
+        params = {"pagination": "cursor", "page_size": 2}
+        with override_settings(API_FAST_LISTS=True):
+            body = self.client.get("/api/blogs/", params).json()
+        slow = self.client.get(body["next"]).content
+        cache.clear()
+        with override_settings(API_FAST_LISTS=True):
+            self.assertEqual(self.client.get(body["next"]).content, slow)
+
+    @override_settings(API_FAST_LISTS=True)
+    def test_query_counts(self):
+        self.assertIsNotNone(fastpath.compile_plan(ProductSerializer))
+        self.assertIsNotNone(fastpath.compile_plan(BlogSerializer))
+        with self.assertNumQueries(1):
+            self.client.get("/api/products/")
+        # COUNT(*), the rows, and the page's category ids
+        with self.assertNumQueries(3):
+            self.client.get("/api/blogs/")
+
+    @override_settings(API_FAST_LISTS=True)
+    def test_field_order_shares_a_plan(self):
+        plans = [
+            fastpath.plan_for(ProductSerializer, {"fields": fields})
+            for fields in [["id", "name"], ["name", "id", "name"]]
+        ]
+        self.assertIs(plans[0], plans[1])
+
+    @override_settings(API_FAST_LISTS=True)
+    def test_expand_uses_the_serializer(self):
+        response = self.client.get("/api/products/", {"expand": "category"})
+        self.assertIsInstance(response.json()[0]["category"], dict)
+
+
+class RendererTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Staff, so test_parsers can release what it reserved.
+        cls.user = User.objects.create_user(
+            username="buyer", password="x", is_staff=True
+        )
+        category = Category.objects.create(name="Thé")
+        cls.product = Product.objects.create(
+            name="Green “tea”\u2028",
+            slug="green",
+            description="",
+            price="3.10",
+            stock=5,
+            category=category,
+        )
+
+    def test_orjson_matches_json_renderer(self):
+        data = {
+            "text": "Ünïcode \u2028\u2029 \"quoted\"",
+            "decimal": Decimal("1234.50"),
+            "aware": datetime(2024, 5, 1, 12, 30, 1, 250, tzinfo=dt_timezone.utc),
+            "naive": datetime(2024, 5, 1, 12, 30),
+            "date": date(2024, 5, 1),
+            "uuid": uuid.UUID(int=1),
+            "lazy": gettext_lazy("Not found."),
+            "duration": timedelta(minutes=1),
+            "nested": [{1: None, "float": 0.1, "big": 2**53}],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        body = ProductSerializer(Product.objects.all(), many=True).data
+        self.assertEqual(ORJSONRenderer().render(body), JSONRenderer().render(body))
+
+    def test_indent_falls_back_to_json_renderer(self):
+        data = {"a": [1, 2]}
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_msgpack_negotiation(self):
+        response = self.client.get("/api/products/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            self.client.get("/api/products/").json(),
+        )
+        response = self.client.get("/api/products/", {"format": "msgpack"})
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+
+    def test_msgpack_converts_like_json(self):
+        data = {
+            "decimal": Decimal("2.5"),
+            "when": datetime(2024, 5, 1, tzinfo=dt_timezone.utc),
+            "uuid": uuid.UUID(int=1),
+        }
+        self.assertEqual(
+            msgpack.unpackb(MessagePackRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_parsers(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        items = {"items": [{"slug": "green", "quantity": 2}]}
+        response = client.post(
+            "/api/products/stock/reserve/",
+            msgpack.packb(items),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.status_code, 200)
+        response = client.post(
+            "/api/products/stock/release/",
+            json.dumps(items),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+        for content_type, body in [
+            ("application/json", b'{"items": ['),
+            ("application/msgpack", msgpack.packb(items)[:-3]),
+        ]:
+            with self.subTest(content_type):
+                response = client.post(
+                    "/api/products/stock/reserve/", body, content_type=content_type
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("parse error", response.json()["detail"])
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_msgpack_body_limit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        body = msgpack.packb({"items": [{"slug": "x" * 200, "quantity": 1}]})
+        response = client.post(
+            "/api/products/stock/reserve/", body, content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncViewTests(TestCase):
+    """The /api/async/ views answer exactly like the sync ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="writer", password="x")
+        categories = [Category.objects.create(name=f"Topic {i}") for i in range(3)]
+        for n in range(4):
+            Product.objects.create(
+                name=f"Product {n}",
+                slug=f"product-{n}",
+                description="A product",
+                price=f"{n}.50",
+                stock=n,
+                category=categories[n % 3],
+            )
+        for n in range(5):
+            blog = Blog.objects.create(
+                title=f"Blog {n}",
+                slug=f"blog-{n}",
+                content="x" * n,
+                author=cls.author if n % 2 else None,
+            )
+            blog.categories.set(categories[: n % 4])
+        cls.blog = blog
+        cls.product = Product.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        view_counter.discard()
+
+    def assert_same(self, path, params=None, **headers):
+        sync = self.client.get(f"/api{path}", params, headers=headers)
+        cache.clear()
+        response = self.client.get(f"/api/async{path}", params, headers=headers)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(
+            response.content.replace(b"/api/async/", b"/api/"), sync.content
+        )
+        return response
+
+    def test_lists(self):
+        for fast in [False, True]:
+            for path, params in [
+                ("/blogs/", {}),
+                ("/blogs/", {"page": 2}),
+                ("/blogs/", {"page": "last"}),
+                ("/blogs/", {"page": 9}),
+                ("/blogs/", {"pagination": "cursor", "page_size": 2}),
+                ("/blogs/", {"fields": "id,author", "expand": "author"}),
+                ("/blogs/", {"views_min": "x"}),
+                ("/products/", {}),
+                ("/products/", {"search": "product", "price_min": "1"}),
+                ("/products/", {"fields": "id,name,category_name"}),
+                ("/products/", {"expand": "category"}),
+                ("/products/", {"fields": "nope"}),
+            ]:
+                with self.subTest(fast=fast, path=path, **params):
+                    with override_settings(API_FAST_LISTS=fast):
+                        self.assert_same(path, params)
+
+    def test_cursor_links_walk_the_async_view(self):
+        params = {"pagination": "cursor", "page_size": 2}
+        body = self.client.get("/api/async/blogs/", params).json()
+        self.assertIn("/api/async/blogs/", body["next"])
+        self.assertEqual(len(self.client.get(body["next"]).json()["results"]), 2)
+
+    def test_details(self):
+        for path in [
+            f"/blogs/{self.blog.pk}/",
+            "/blogs/999/",
+            f"/products/{self.product.pk}/",
+            "/products/999/",
+        ]:
+            with self.subTest(path):
+                self.assert_same(path)
+
+    def test_conditional_requests_and_view_counts(self):
+        for path in [f"/blogs/{self.blog.pk}/", f"/products/{self.product.pk}/"]:
+            with self.subTest(path):
+                response = self.assert_same(path)
+                self.assertEqual(
+                    self.client.get(
+                        f"/api/async{path}", HTTP_IF_NONE_MATCH=response["ETag"]
+                    ).status_code,
+                    304,
+                )
+        # The sync GET, the async one and the async 304.
+        self.assertEqual(view_counter.lag()["views"], 3)
+
+    def test_response_cache(self):
+        path = f"/api/async/blogs/{self.blog.pk}/"
+        self.client.get(path)
+        with self.assertNumQueries(1):  # only the conditional lookup
+            self.assertEqual(self.client.get(path).status_code, 200)
+
+    def test_token_authentication(self):
+        _, key = AuthToken.issue(self.author)
+        path = f"/api/async/products/{self.product.pk}/"
+        with self.assertNumQueries(3):  # token, ETag lookup, product
+            self.assertEqual(
+                self.client.get(path, HTTP_AUTHORIZATION=f"Token {key}").status_code,
+                200,
+            )
+        with self.assertNumQueries(2):  # token cached
+            self.client.get(path, HTTP_AUTHORIZATION=f"Token {key}")
+        response = self.client.get(path, HTTP_AUTHORIZATION="Token nope")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+    def test_writes_stay_on_the_sync_views(self):
+        response = self.client.post("/api/async/products/", {})
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Allow"], "GET, HEAD, OPTIONS")
+        self.assertEqual(self.client.options("/api/async/products/").status_code, 200)
+
+    async def test_runs_in_the_event_loop(self):
+        # Any synchronous query here would raise SynchronousOnlyOperation.
+        response = await self.async_client.get(
+            "/api/async/blogs/", {"pagination": "cursor"}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(f"/api/async/blogs/{self.blog.pk}/")
+        self.assertEqual(response.json()["title"], self.blog.title)
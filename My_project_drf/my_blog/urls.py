@@ -3,24 +3,66 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .async_views import (
+    AsyncBlogDetailView,
+    AsyncBlogListView,
+    AsyncProductDetailView,
+    AsyncProductListView,
+)
 from .views import (
     BlogListView,
+    ProductBulkView,
+    ProductDeleteJobView,
     ProductListCreateView,
     ProductRetrieveUpdateDestoryView,
+    StockView,
     UserDetailView,
     BlogDetailView,
+    ExportView,
 )
 
 urlpatterns = [
     path("blogs/", BlogListView.as_view(), name="blog-list"),
     path("blogs/<int:pk>/", BlogDetailView.as_view(), name="blog-detail"),
     path("products/", ProductListCreateView.as_view(), name="product-list"),
+    path("products/bulk/", ProductBulkView.as_view(), name="product-bulk"),
+    path(
+        "products/stock/reserve/",
+        StockView.as_view(action="reserve"),
+        name="stock-reserve",
+    ),
+    path(
+        "products/stock/release/",
+        StockView.as_view(action="release"),
+        name="stock-release",
+    ),
+    path(
+        "products/delete-jobs/<int:pk>/",
+        ProductDeleteJobView.as_view(),
+        name="product-delete-job",
+    ),
     path(
         "products/<int:pk>/",
         ProductRetrieveUpdateDestoryView.as_view(),
         name="product-detail",
     ),
+    # Async variants of the read-only endpoints, for ASGI (see async_views.py)
+    path("async/blogs/", AsyncBlogListView.as_view(), name="async-blog-list"),
+    path(
+        "async/blogs/<int:pk>/",
+        AsyncBlogDetailView.as_view(),
+        name="async-blog-detail",
+    ),
+    path(
+        "async/products/", AsyncProductListView.as_view(), name="async-product-list"
+    ),
+    path(
+        "async/products/<int:pk>/",
+        AsyncProductDetailView.as_view(),
+        name="async-product-detail",
+    ),
     path("user/", UserDetailView.as_view(), name="user_detail"),
+    path("export/<slug:name>.<str:fmt>", ExportView.as_view(), name="export"),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
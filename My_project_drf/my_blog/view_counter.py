@@ -0,0 +1,217 @@
+"""
+Write-behind counter for Blog.views.
+
+A row UPDATE per page hit would serialize every reader behind SQLite's
+single writer. Instead hits are added to an in-process buffer and written
+out together, one ``UPDATE ... SET views = views + CASE id WHEN ...``
+statement per batch of blogs:
+
+* by a background thread every BLOG_VIEW_FLUSH_INTERVAL seconds (None
+  disables this), started by the first counted view, so counts don't
+  wait for the next hit to be written,
+* by the request that makes BLOG_VIEW_FLUSH_MAX_PENDING blogs wait,
+* and at interpreter exit, so a graceful shutdown loses nothing.
+
+``views`` therefore lags real traffic by up to one flush interval per
+process; lag() reports how far behind this process is. A flush leaves
+date_updated alone, since a view is not an edit. Instead the blog detail
+ETag includes ``views`` (see conditional.py), and the flush orphans the
+cached detail responses of just the blogs it touched, so a response
+never carries counts its ETag doesn't cover. Cached blog lists keep the
+counts they were rendered with until their next invalidation or expiry.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import Case, F, Value, When
+
+from .cache import invalidate_objects
+from .models import Blog
+
+logger = logging.getLogger(__name__)
+
+# Blogs per UPDATE; keeps the statement well under SQLite's variable limit.
+BATCH_SIZE = 300
+
+
+def write_views(counts):
+    """Add ``{blog_pk: views}`` to Blog.views in batched UPDATE statements."""
+    items = list(counts.items())
+    with transaction.atomic():
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start : start + BATCH_SIZE]
+            Blog.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                views=F("views")
+                + Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in batch],
+                    default=Value(0),
+                    output_field=models.PositiveIntegerField(),
+                )
+            )
+    # update() sends no signals (see cache.py).
+    invalidate_objects(Blog, counts)
+
+
+class ViewCounter:
+    def __init__(self):
+        self._pending = Counter()
+        self._oldest = None
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+
+    def increment(self, pk, count=1):
+        if self.add(pk, count):
+            self.flush_quietly()
+
+    async def aincrement(self, pk, count=1):
+        # Only a due flush, which writes to the database, leaves the loop.
+        if self.add(pk, count):
+            await sync_to_async(self.flush_quietly)()
+
+    def add(self, pk, count):
+        """Buffer ``count`` views of ``pk``; return whether a flush is due."""
+        with self._lock:
+            self._pending[pk] += count
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            pending = len(self._pending)
+
+        if getattr(settings, "BLOG_VIEW_FLUSH_INTERVAL", 10) is not None:
+            self._start_flusher()
+        return pending >= getattr(settings, "BLOG_VIEW_FLUSH_MAX_PENDING", 1000)
+
+    def flush_quietly(self):
+        try:
+            # Another thread already flushing is as good as us doing it.
+            self.flush(blocking=False)
+        except Exception:
+            logger.exception("Could not flush blog view counts")
+
+    def flush(self, blocking=True):
+        """Write all buffered counts; returns the number of views written."""
+        if not self._flush_lock.acquire(blocking=blocking):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+                oldest, self._oldest = self._oldest, None
+            self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            try:
+                write_views(pending)
+            except Exception:
+                # Put the counts back so the next flush retries them.
+                with self._lock:
+                    self._pending.update(pending)
+                    if self._oldest is None or oldest < self._oldest:
+                        self._oldest = oldest
+                raise
+            written = sum(pending.values())
+            logger.info(
+                "Flushed %d blog views for %d blogs, %.1fs behind",
+                written,
+                len(pending),
+                time.monotonic() - oldest,
+            )
+            return written
+        finally:
+            self._flush_lock.release()
+
+    def lag(self):
+        """How much this process has buffered and for how long."""
+        with self._lock:
+            oldest = self._oldest
+            return {
+                "blogs": len(self._pending),
+                "views": sum(self._pending.values()),
+                "seconds": time.monotonic() - oldest if oldest is not None else 0.0,
+            }
+
+    def discard(self):
+        """Drop buffered counts without writing them (tests)."""
+        with self._lock:
+            self._pending.clear()
+            self._oldest = None
+
+    def _start_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically,
+                    name="blog-view-flush",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def _flush_periodically(self):
+        # Ends when the interval is set to None; the next counted view
+        # starts a new thread if it is turned back on.
+        while True:
+            interval = getattr(settings, "BLOG_VIEW_FLUSH_INTERVAL", 10)
+            if interval is None:
+                return
+            wait = self._last_flush + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            elif not self.lag()["blogs"]:
+                time.sleep(interval)
+            else:
+                try:
+                    self.flush_quietly()
+                finally:
+                    # This thread's own connection; don't hold it between ticks.
+                    connections.close_all()
+
+
+view_counter = ViewCounter()
+
+
+def counts_views(lookup_url_kwarg="pk"):
+    """
+    Count a view for every successful GET of an APIView detail method,
+    including responses served from cache or answered with a 304.
+    """
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(self, request, *args, **kwargs):
+                response = await func(self, request, *args, **kwargs)
+                if response.status_code in (200, 304):
+                    await view_counter.aincrement(int(kwargs[lookup_url_kwarg]))
+                return response
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            response = func(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                view_counter.increment(int(kwargs[lookup_url_kwarg]))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+@atexit.register
+def flush_at_exit():
+    try:
+        view_counter.flush()
+    except Exception:
+        logger.exception("Could not flush blog view counts at exit")
@@ -1,18 +1,38 @@
+from types import GeneratorType
+
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.http import Http404
 from rest_framework.filters import SearchFilter
-from .models import Product, Blog
-from .serializers import ProductSerializer, BlogSerializer
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from .models import Product, Blog, Category, ProductDeleteJob
+from .serializers import (
+    BlogSerializer,
+    ProductDeleteJobSerializer,
+    ProductSerializer,
+    StockRequestSerializer,
+)
 from .filters import ProductFilter, BlogFilter
 from .serializers import BlogSerializer
-from .pagination import BlogPagination
+from .pagination import BlogPagination, BlogCursorPagination
 from .permissions import IsAdminOrReadOnly
 from .authentication import CustomTokenAuthentication
+from .cache import cache_response
+from .conditional import condition_on
+from .search import FullTextSearchFilter
+from .sparse import sparse_params
+from .view_counter import counts_views
+from .exports import EXPORTS, FORMATS, export_response
+from .bulk import bulk_save_products
+from .parsers import NDJSONParser
+from . import fastpath, purge, stock
 
 
 class UserDetailView(APIView):
@@ -29,22 +49,58 @@ class UserDetailView(APIView):
         )
 
 
+# Query parameters that can change a blog list response (see cache.py).
+BLOG_LIST_PARAMS = [
+    "views_min",
+    "views_max",
+    "title",
+    "categories",
+    "page",
+    "page_size",
+    "pagination",
+    "cursor",
+    "fields",
+    "expand",
+]
+
+
 class BlogListView(APIView):
     authentication_classes = [CustomTokenAuthentication]
     permission_classes = [IsAdminOrReadOnly]
+    page_number_pagination_class = PageNumberPagination
 
+    def get_paginator(self, request):
+        # ?pagination=cursor (or any ?cursor=) switches to keyset pages
+        if "cursor" in request.GET or request.GET.get("pagination") == "cursor":
+            return BlogCursorPagination()
+        paginator = self.page_number_pagination_class()
+        paginator.page_size = 2  # Items per page
+        return paginator
+
+    @cache_response("blog-list", models=[Blog, Category], params=BLOG_LIST_PARAMS)
     def get(self, request):
-        queryset = Blog.objects.all().order_by("-date_created")
-        filterset = BlogFilter(request.GET, queryset=queryset)
+        sparse = sparse_params(request, BlogSerializer)
+        filterset = self.get_filterset(request, sparse)
         if not filterset.is_valid():
             return Response(filterset.errors, status=400)
         queryset = filterset.qs
-        paginator = PageNumberPagination()
-        paginator.page_size = 2  # Items per page
+        paginator = self.get_paginator(request)
+        plan = fastpath.plan_for(BlogSerializer, sparse)
+        if plan is not None:
+            rows = paginator.paginate_queryset(
+                plan.values(queryset, "date_created"), request
+            )
+            return paginator.get_paginated_response(plan.serialize(rows))
         result_page = paginator.paginate_queryset(queryset, request)
-        serializer = BlogSerializer(result_page, many=True)
+        serializer = BlogSerializer(result_page, many=True, context=sparse)
         return paginator.get_paginated_response(serializer.data)
 
+    def get_filterset(self, request, sparse):
+        queryset = BlogSerializer.setup_eager_loading(
+            Blog.objects.all(), **sparse, extra_columns=["date_created"]
+        ).order_by("-date_created", "-id")
+        return BlogFilter(request.GET, queryset=queryset)
+
     def post(self, request):
         serializer = BlogSerializer(data=request.data)
         if serializer.is_valid():
@@ -59,10 +115,13 @@ class BlogDetailView(APIView):
 
     def get_object(self, pk):
         try:
-            return Blog.objects.get(pk=pk)
+            return BlogSerializer.setup_eager_loading(Blog.objects).get(pk=pk)
         except Blog.DoesNotExist:
             return None
 
+    @counts_views()
+    @method_decorator(condition_on(Blog, "date_updated", counter="views"))
+    @cache_response("blog-detail", models=[Blog, Category], object_model=Blog)
     def get(self, request, pk):
         item = self.get_object(pk)
         if not item:
@@ -72,6 +131,7 @@ class BlogDetailView(APIView):
         serializer = BlogSerializer(item)
         return Response(serializer.data)
 
+    @method_decorator(condition_on(Blog, "date_updated", counter="views"))
     def put(self, request, pk):
         item = self.get_object(pk)
         if not item:
@@ -107,18 +167,135 @@ class ProductListCreateView(generics.ListCreateAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     # No button is made since we are also creating
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    # ?search= goes through the FTS5 index (see search.py)
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     search_fields = ["name", "description", "category__name"]
     filterset_class = ProductFilter
+    # ?fields= / ?expand= of the current list request (see sparse.py)
+    sparse = {}
+
+    def list(self, request, *args, **kwargs):
+        self.sparse = sparse_params(request, ProductSerializer)
+        plan = fastpath.plan_for(ProductSerializer, self.sparse)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        rows = plan.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page, request))
+        return Response(plan.serialize(rows, request))
+
+    def get_queryset(self):
+        return ProductSerializer.setup_eager_loading(
+            super().get_queryset(), **self.sparse
+        )
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), **self.sparse}
+
+    def get_permissions(self):
+        # Deleting every product is for admins only.
+        if self.request.method == "DELETE":
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    def delete(self, request, *args, **kwargs):
+        # Runs as a batched job (see purge.py); poll the returned URL for
+        # progress or DELETE it to cancel.
+        job = purge.start()
+        data = ProductDeleteJobSerializer(job).data
+        location = reverse("product-delete-job", kwargs={"pk": job.pk})
+        return Response(
+            data, status=status.HTTP_202_ACCEPTED, headers={"Location": location}
+        )
+
+
+class ProductDeleteJobView(generics.RetrieveAPIView):
+    permission_classes = [IsAdminUser]
+    queryset = ProductDeleteJob.objects.all()
+    serializer_class = ProductDeleteJobSerializer
 
     def delete(self, request, *args, **kwargs):
-        Product.objects.all().delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        job = purge.cancel(self.get_object())
+        return Response(self.get_serializer(job).data)
+
+
+class ProductBulkView(APIView):
+    """
+    Create and update many products in one request: a JSON array, or
+    NDJSON with one product per line (or any format the default parsers
+    read, e.g. MessagePack). Items with an "id" are updates. NDJSON is
+    read as it streams in; other formats are buffered and so are capped
+    by DATA_UPLOAD_MAX_MEMORY_SIZE.
+    """
 
+    permission_classes = [IsAdminUser]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser]
 
+    def post(self, request):
+        items = request.data
+        # A list, or the generator NDJSONParser returns.
+        if not isinstance(items, (list, GeneratorType)):
+            return Response(
+                {"detail": "Expected a list of products."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = bulk_save_products(items)
+        return Response(result)
+
+
+class StockView(APIView):
+    """
+    POST {"items": [{"slug": ..., "quantity": n}, ...]} to reserve or
+    release stock for every item, or for none of them (see stock.py).
+    """
+
+    permission_classes = [IsAuthenticated]
+    action = None  # "reserve" or "release"
+
+    def get_permissions(self):
+        # Reservations aren't recorded per user, so putting stock back is
+        # left to admins.
+        if self.action == "release":
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    def post(self, request):
+        serializer = StockRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = [
+            (item["slug"], item["quantity"])
+            for item in serializer.validated_data["items"]
+        ]
+        try:
+            getattr(stock, self.action)(items)
+        except stock.InsufficientStock as exc:
+            return Response(
+                {"detail": str(exc), "shortages": exc.shortages},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(serializer.data)
+
+
+@method_decorator(condition_on(Product, "updated_at"), name="get")
+@method_decorator(condition_on(Product, "updated_at"), name="put")
+@method_decorator(condition_on(Product, "updated_at"), name="patch")
 class ProductRetrieveUpdateDestoryView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     lookup_field = "pk"
     filter_backends = [SearchFilter]
     search_fields = ["name", "description", "category__name"]
+
+
+class ExportView(APIView):
+    """Stream a whole table as CSV or NDJSON (see exports.py)."""
+
+    authentication_classes = [CustomTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name, fmt):
+        if name not in EXPORTS or fmt not in FORMATS:
+            raise Http404("Unknown export")
+        model, fields = EXPORTS[name]
+        return export_response(model.objects.all(), fields, fmt, name)
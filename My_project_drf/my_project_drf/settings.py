@@ -49,6 +49,20 @@ REST_FRAMEWORK = {
         "my_blog.authentication.CustomTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    # orjson for JSON and MessagePack on request (see my_blog/renderers.py).
+    # Use rest_framework.renderers.JSONRenderer and parsers.JSONParser
+    # instead to go back to the standard library encoder.
+    "DEFAULT_RENDERER_CLASSES": [
+        "my_blog.renderers.ORJSONRenderer",
+        "my_blog.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "my_blog.parsers.ORJSONParser",
+        "my_blog.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -91,6 +105,34 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Blog API response cache (see my_blog/cache.py)
+BLOG_CACHE_ALIAS = "default"
+BLOG_CACHE_TIMEOUT = 300
+
+# CustomTokenAuthentication in-process token cache (see my_blog/authentication.py)
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_CACHE_TTL = 60  # seconds a revoked token may still be accepted
+
+# Write-behind Blog.views counter (see my_blog/view_counter.py)
+BLOG_VIEW_FLUSH_INTERVAL = 10  # seconds
+BLOG_VIEW_FLUSH_MAX_PENDING = 1000  # blogs
+
+# Serve GET lists from values() rows instead of the serializers
+# (see my_blog/fastpath.py)
+API_FAST_LISTS = False
+
+# Batched "delete all products" job (see my_blog/purge.py)
+PRODUCT_DELETE_BATCH_SIZE = 2000  # rows per transaction
+PRODUCT_DELETE_PAUSE = 0.01  # seconds between batches
+PRODUCT_DELETE_IN_BACKGROUND = True
+PRODUCT_DELETE_STALE_AFTER = 300  # seconds without progress before a job is failed
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators